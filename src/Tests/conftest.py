@@ -0,0 +1,77 @@
+"""
+Общие данные тестов: небольшая синтетическая структура ORG, конфигурация генератора пользователей
+и уменьшенный конвейер main().
+"""
+
+import copy
+
+import pandas as pd
+import pytest
+
+import src.main as main_module
+from src.main import LOADER_CONFIG
+
+
+def make_org_data(num_tb: int = 4, num_gosb: int = 3, num_units: int = 5) -> pd.DataFrame:
+    """
+    Синтетический лист ORG: num_tb ТБ по num_gosb ГОСБ по num_units подразделений.
+
+    Коды ГОСБ повторяются между ТБ, как в реальных данных.
+    """
+    rows = []
+    for tb in range(num_tb):
+        for gosb in range(num_gosb):
+            for unit in range(num_units):
+                rows.append({
+                    'Код подразделения': f"{tb + 1}{gosb}{unit:03d}",
+                    'Код ТБ': str(tb + 1),
+                    'Полное ТБ': f"Территориальный банк {tb + 1}",
+                    'Короткое ТБ': f"ТБ{tb + 1}",
+                    'Код ГОСБ': str(gosb),
+                    'Полное ГОСБ': f"Отделение {tb + 1}-{gosb}",
+                    'Короткое ГОСБ': f"ГОСБ{tb + 1}-{gosb}"
+                })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def org_data() -> pd.DataFrame:
+    """Синтетический лист ORG (60 подразделений)."""
+    return make_org_data()
+
+
+@pytest.fixture
+def users_config() -> dict:
+    """Конфигурация USERS с фиксированным seed и без фиксированного распределения."""
+    config = copy.deepcopy(LOADER_CONFIG['USERS'])
+    config['seed'] = 20261018
+    config['fixed_distribution'] = {}
+    config['parallel'] = {}
+    config['stream_batch_size'] = None
+    config['statistics_report'] = False
+    config['split'] = {}
+    return config
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch, org_data):
+    """
+    Небольшой конвейер main() в каталоге tmp_path: входной CSV ORG из синтетической
+    структуры и уменьшенные количества пользователей и клиентов.
+    """
+    monkeypatch.chdir(tmp_path)
+    source_columns = {target: source for source, target in main_module.LOADER_CONFIG['ORG']['column_mapping'].items()}
+    org_data.rename(columns=source_columns).to_csv(tmp_path / 'org.csv', sep=';', index=False, encoding='utf-8')
+
+    config = copy.deepcopy(main_module.LOADER_CONFIG)
+    config['ORG'].update(input_file=str(tmp_path / 'org.csv'), cache_dir=None, filters={})
+    config['USERS'].update(seed=7, fixed_distribution={})
+    config['USERS']['business_blocks']['KMKKSB']['count'] = 200
+    config['USERS']['business_blocks']['MNS']['count'] = 80
+    config['CLIENTS']['count'] = 300
+
+    monkeypatch.setattr(main_module, 'LOADER_CONFIG', config)
+    monkeypatch.setattr(main_module, 'LOG_DIR', str(tmp_path / 'log'))
+    monkeypatch.setattr(main_module, 'LOG_LEVEL', 'INFO')
+    monkeypatch.setattr(main_module, 'RESULT_CACHE_DIR', None)
+    return config
@@ -0,0 +1,127 @@
+"""
+Тесты помесячного индекса менеджеров и листа движения клиентов (src/main.py, ManagerMonthIndex, ClientChangeGenerator).
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from openpyxl import load_workbook
+
+import src.main as main_module
+from src.main import ManagerMonthIndex, OrgIndex
+
+
+@pytest.fixture
+def manager_index(org_data):
+    """Индекс по случайной матрице движения: часть пользователей - менеджеры, часть месяцев без подразделения."""
+    rng = np.random.default_rng(5)
+    org_index = OrgIndex(org_data)
+    movement = rng.integers(-1, org_index.num_units, size=(300, 6)).astype(np.int32)
+    movement[:, 2] = np.where(movement[:, 2] < 0, 0, movement[:, 2])  # Месяц без пропусков
+    movement[:, 4] = -1  # Месяц без активных пользователей
+    managers = rng.random(300) < 0.4
+    return ManagerMonthIndex(movement, managers, org_index), movement, managers
+
+
+def expected_groups(index, movement, managers, month, level):
+    """Наивный расчет: активные менеджеры месяца по группам уровня."""
+    active = np.flatnonzero(managers & (movement[:, month] >= 0))
+    groups = index.unit_groups[level][movement[active, month]]
+    return {int(group): sorted(active[groups == group].tolist()) for group in np.unique(groups)}
+
+
+@pytest.mark.parametrize('level', ManagerMonthIndex.LEVELS)
+def test_csr_bounds_cover_active_managers(manager_index, level):
+    """Границы групп монотонны, начинаются с 0 и заканчиваются количеством активных менеджеров месяца."""
+    index, movement, managers = manager_index
+    for month in range(index.months):
+        bounds = index.bounds[level][month]
+        active_count = int((managers & (movement[:, month] >= 0)).sum())
+
+        assert bounds[0] == 0 and bounds[-1] == active_count
+        assert (np.diff(bounds) >= 0).all()
+        assert len(index.members[level][month]) == active_count
+
+
+@pytest.mark.parametrize('level', ManagerMonthIndex.LEVELS)
+def test_csr_groups_match_naive_grouping(manager_index, level):
+    """Отрезок группы - ровно активные менеджеры подразделений этой группы в этом месяце."""
+    index, movement, managers = manager_index
+    num_groups = index.bounds[level].shape[1] - 1
+    for month in range(index.months):
+        expected = expected_groups(index, movement, managers, month, level)
+        for group in range(num_groups):
+            assert sorted(index.managers(month, level, group).tolist()) == expected.get(group, [])
+
+
+def test_managers_by_codes(manager_index, org_data):
+    """Поиск по кодам ТБ и ГОСБ совпадает с подразделениями менеджеров; неизвестный код - пустой массив."""
+    index, movement, managers = manager_index
+    month = 1
+    unit_rows = movement[:, month]
+    active = managers & (unit_rows >= 0)
+    tb_codes = org_data['Код ТБ'].to_numpy()
+    gosb_codes = org_data['Код ГОСБ'].to_numpy()
+
+    assert sorted(index.managers_in_tb(month, '2').tolist()) == np.flatnonzero(
+        active & (tb_codes[unit_rows] == '2')).tolist()
+    assert sorted(index.managers_in_gosb(month, '2', '1').tolist()) == np.flatnonzero(
+        active & (tb_codes[unit_rows] == '2') & (gosb_codes[unit_rows] == '1')).tolist()
+    assert len(index.managers_in_tb(month, 'нет')) == 0
+    assert len(index.managers_in_gosb(month, '2', 'нет')) == 0
+
+
+@pytest.mark.parametrize('level', ManagerMonthIndex.LEVELS)
+def test_sample_returns_group_member(manager_index, level):
+    """Выбор возвращает менеджера своей группы или -1 для группы без активных менеджеров."""
+    index, movement, managers = manager_index
+    rng = np.random.default_rng(1)
+    num_groups = index.bounds[level].shape[1] - 1
+    groups = np.repeat(np.arange(num_groups), 20)
+    for month in range(index.months):
+        chosen = index.sample(month, level, groups, rng.random(len(groups)))
+        expected = expected_groups(index, movement, managers, month, level)
+        for group, manager in zip(groups.tolist(), chosen.tolist()):
+            if group in expected:
+                assert manager in expected[group]
+            else:
+                assert manager == -1
+
+
+def test_sample_nearest_falls_back_to_wider_level(manager_index):
+    """Ближайший менеджер - из ГОСБ подразделения, иначе из ТБ, иначе любой; в пустом месяце -1."""
+    index, movement, managers = manager_index
+    rng = np.random.default_rng(2)
+    unit_rows = np.arange(index.org_index.num_units)
+    for month in range(index.months):
+        chosen = index.sample_nearest(month, unit_rows, rng.random(len(unit_rows)))
+        active = managers & (movement[:, month] >= 0)
+        if not active.any():
+            assert (chosen == -1).all()
+            continue
+        gosb = expected_groups(index, movement, managers, month, 'gosb')
+        tb = expected_groups(index, movement, managers, month, 'tb')
+        for unit, manager in zip(unit_rows.tolist(), chosen.tolist()):
+            gosb_members = gosb.get(int(index.unit_groups['gosb'][unit]), [])
+            tb_members = tb.get(int(index.unit_groups['tb'][unit]), [])
+            if gosb_members:
+                assert manager in gosb_members
+            elif tb_members:
+                assert manager in tb_members
+            else:
+                assert active[manager]
+
+
+@pytest.mark.parametrize('enabled', [False, True])
+def test_client_cng_sheet_is_optional(pipeline, monkeypatch, enabled):
+    """Лист CLIENT_CNG записывается только при enabled: True (по умолчанию выключен)."""
+    assert main_module.LOADER_CONFIG['CLIENT_CNG']['enabled'] is False
+    pipeline['CLIENT_CNG']['enabled'] = enabled
+    monkeypatch.setattr(main_module, 'OUTPUT_DIR', 'OUT')
+    main_module.main()
+
+    (output_file,) = Path('OUT').glob('*.xlsx')
+    sheet_names = load_workbook(output_file, read_only=True).sheetnames
+    assert ('CLIENT_CNG' in sheet_names) == enabled
+    assert 'METRICS' in sheet_names
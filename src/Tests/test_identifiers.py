@@ -0,0 +1,166 @@
+"""
+Тесты модуля уникальных идентификаторов (src/main.py, МОДУЛЬ УНИКАЛЬНЫХ ИДЕНТИФИКАТОРОВ).
+"""
+
+import numpy as np
+import pytest
+
+from src.main import CombinationAllocator, FioAllocator, InnAllocator, KeyedPermutation, TabNumberAllocator
+
+
+NAME_DATA = {
+    'surnames': ['Иванов', 'Петров', 'Сидоров'],
+    'first_names': ['Иван', 'Петр'],
+    'patronymics': ['Иванович', 'Петрович', 'Ильич', 'Иванович']
+}
+
+
+@pytest.mark.parametrize('domain_size', [1, 2, 3, 10, 97, 1000, 4097])
+def test_keyed_permutation_is_bijection(domain_size):
+    """Перестановка отображает диапазон на себя без повторов, значения не выходят за диапазон."""
+    permutation = KeyedPermutation(domain_size, key=12345)
+    values = permutation.permute(np.arange(domain_size))
+
+    assert values.dtype == np.int64
+    assert values.min() >= 0 and values.max() < domain_size
+    assert np.array_equal(np.sort(values), np.arange(domain_size))
+
+
+def test_keyed_permutation_cycle_walking_stays_in_range():
+    """Диапазон чуть больше степени двойки: большинство значений сети вне диапазона и уходят в прогулку по циклу."""
+    domain_size = 2 ** 12 + 1
+    permutation = KeyedPermutation(domain_size, key=7)
+    assert 2 ** (2 * permutation.half_bits) > domain_size
+
+    values = permutation.permute(np.arange(domain_size))
+    assert len(np.unique(values)) == domain_size
+    assert values.max() < domain_size
+
+
+def test_keyed_permutation_depends_on_key_and_is_deterministic():
+    """Один ключ - одна перестановка, разные ключи - разные перестановки."""
+    positions = np.arange(500)
+    first = KeyedPermutation(500, key=1).permute(positions)
+
+    assert np.array_equal(first, KeyedPermutation(500, key=1).permute(positions))
+    assert not np.array_equal(first, KeyedPermutation(500, key=2).permute(positions))
+
+
+def test_keyed_permutation_rejects_empty_domain():
+    """Пустой диапазон перестановки недопустим."""
+    with pytest.raises(ValueError):
+        KeyedPermutation(0, key=1)
+
+
+def test_tab_number_allocator_unique_until_exhausted():
+    """Табельные номера уникальны между выдачами и лежат в диапазоне; сверх диапазона выдача запрещена."""
+    allocator = TabNumberAllocator(1000, 1999, key=3)
+    numbers = np.concatenate([allocator.allocate(400), allocator.allocate(600)])
+
+    assert np.array_equal(np.sort(numbers), np.arange(1000, 2000))
+    assert allocator.remaining == 0
+    with pytest.raises(ValueError):
+        allocator.allocate(1)
+
+
+def test_fio_allocator_unique_within_capacity():
+    """Все комбинации пространства выдаются ровно по одному разу (повторы в списках удаляются)."""
+    allocator = FioAllocator(NAME_DATA, key=5)
+    assert allocator.capacity == 3 * 2 * 3
+
+    fio = allocator.allocate(allocator.capacity)
+    assert len(set(fio)) == allocator.capacity
+    assert not any('(' in value for value in fio)
+
+
+def test_fio_allocator_overflow_rounds_get_suffix():
+    """После исчерпания пространства следующий круг повторяет перестановку с номером круга в скобках."""
+    allocator = FioAllocator(NAME_DATA, key=5)
+    first_round = allocator.allocate(allocator.capacity)
+    second_round = allocator.allocate(allocator.capacity)
+    third = allocator.allocate_one()
+
+    assert list(second_round) == [f"{value} (2)" for value in first_round]
+    assert third == f"{first_round[0]} (3)"
+
+
+def inn_is_valid(inn: str) -> bool:
+    """Проверка контрольных цифр ИНН по строке (независимо от векторной реализации)."""
+    def control(digits, weights):
+        return sum(int(digit) * weight for digit, weight in zip(digits, weights)) % 11 % 10
+
+    if len(inn) == 10:
+        return control(inn[:9], (2, 4, 10, 3, 5, 9, 4, 6, 8)) == int(inn[9])
+    return (
+        control(inn[:10], (7, 2, 4, 10, 3, 5, 9, 4, 6, 8)) == int(inn[10])
+        and control(inn[:11], (3, 7, 2, 4, 10, 3, 5, 9, 4, 6, 8)) == int(inn[11])
+    )
+
+
+@pytest.mark.parametrize('individual, length', [(False, 10), (True, 12)])
+def test_inn_allocator_check_digits(individual, length):
+    """ИНН организаций (10 цифр) и ИП (12 цифр) уникальны, с кодом региона от 01 и верными контрольными цифрами."""
+    allocator = InnAllocator(individual, key=11)
+    values = np.concatenate([allocator.allocate(3000), allocator.allocate(2000)])
+    inns = [str(value).zfill(allocator.length) for value in values]
+
+    assert allocator.length == length
+    assert values.max() < 10 ** length
+    assert len(set(inns)) == len(inns)
+    assert all(int(inn[:2]) >= 1 for inn in inns)  # Код региона от 01
+    assert all(inn_is_valid(inn) for inn in inns)
+
+
+def test_inn_check_digit_known_values():
+    """Контрольные цифры известных корректных ИНН."""
+    organization = np.array([770708389], dtype=np.int64)  # ИНН 7707083893
+    person = np.array([5001000001], dtype=np.int64)
+
+    assert InnAllocator.check_digit(organization, InnAllocator.ORGANIZATION_WEIGHTS).tolist() == [3]
+    assert inn_is_valid('7707083893')
+    assert not inn_is_valid('7707083894')
+    person_11 = person * 10 + InnAllocator.check_digit(person, InnAllocator.PERSON_WEIGHTS_11)
+    person_12 = person_11 * 10 + InnAllocator.check_digit(person_11, InnAllocator.PERSON_WEIGHTS_12)
+    assert inn_is_valid(str(person_12[0]))
+
+
+def test_inn_allocator_rejects_exhausted_range():
+    """Запрос больше невыданного остатка диапазона - ошибка."""
+    allocator = InnAllocator(False, key=1)
+    with pytest.raises(ValueError):
+        allocator.allocate(allocator.remaining + 1)
+
+
+def test_combination_allocator_unique_within_capacity():
+    """Все комбинации пространства выдаются ровно по одному разу (повторы в списках удаляются)."""
+    allocator = CombinationAllocator([['a', 'b', 'a'], ['x', 'y', 'z'], ['1', '2']], key=9)
+    assert allocator.capacity == 2 * 3 * 2
+
+    first, rounds = allocator.allocate_indexes(5)
+    second, more_rounds = allocator.allocate_indexes(allocator.capacity - 5)
+    combinations = list(zip(*[np.concatenate(pair) for pair in zip(first, second)]))
+
+    assert len(set(combinations)) == allocator.capacity
+    assert not rounds.any() and not more_rounds.any()
+    assert all(0 <= index < len(values) for combination in combinations
+               for index, values in zip(combination, allocator.values))
+
+
+def test_combination_allocator_overflow_rounds_get_suffix():
+    """После исчерпания пространства комбинации повторяются по кругу с номером круга в скобках."""
+    allocator = CombinationAllocator([['a', 'b'], ['x', 'y']], key=9)
+    indexes, rounds = allocator.allocate_indexes(3 * allocator.capacity)
+    strings = allocator.values[0][indexes[0]] + ' ' + allocator.values[1][indexes[1]]
+    marked = CombinationAllocator.mark_rounds(strings.copy(), rounds)
+
+    assert rounds.tolist() == [0] * 4 + [1] * 4 + [2] * 4
+    assert list(strings[4:8]) == list(strings[:4])
+    assert list(marked[:4]) == list(strings[:4])
+    assert list(marked[4:8]) == [f"{value} (2)" for value in strings[:4]]
+    assert list(marked[8:]) == [f"{value} (3)" for value in strings[:4]]
+
+
+def test_combination_allocator_rejects_empty_list():
+    """Пустой список значений делает пространство комбинаций пустым - ошибка."""
+    with pytest.raises(ValueError):
+        CombinationAllocator([['a'], []], key=1)
@@ -0,0 +1,84 @@
+"""
+Тесты генератора показателей (src/main.py, IndicatorEngine).
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.main import LOADER_CONFIG, METRIC_QUARTER_MONTHS, IndicatorEngine
+
+
+BLOCK_NAMES = {code: block['name'] for code, block in LOADER_CONFIG['USERS']['business_blocks'].items()}
+
+
+def make_engine(tmp_path, active):
+    """Генератор показателей для len(active) пользователей с чередующимися бизнес-блоками."""
+    config = copy.deepcopy(LOADER_CONFIG['METRICS'])
+    config['seed'] = 3
+    count = active.shape[0]
+    names = list(BLOCK_NAMES.values())
+    users = pd.DataFrame({
+        'Табельный номер': [f"{number:08d}" for number in range(count)],
+        'ФИО': [f"Пользователь {number}" for number in range(count)],
+        'Бизнес-блок': [names[number % len(names)] for number in range(count)]
+    })
+    return IndicatorEngine(config, users, BLOCK_NAMES, active=active, output_dir=str(tmp_path))
+
+
+def naive_rollup(engine, period_months):
+    """Наивное агрегирование циклом: сумма или среднее месяцев с подразделением, NaN без них."""
+    num_indicators, count = engine.values.shape[:2]
+    periods = engine.months // period_months
+    result = np.full((num_indicators, count, periods), np.nan)
+    for k in range(num_indicators):
+        for user in range(count):
+            for period in range(periods):
+                months = range(period * period_months, (period + 1) * period_months)
+                values = [engine.values[k, user, month] for month in months if engine.active[user, month]]
+                if values:
+                    total = sum(values) / len(values) if engine.aggregations[k] == 'mean' else sum(values)
+                    result[k, user, period] = np.round(total, engine.decimals[k])
+    return result
+
+
+@pytest.fixture
+def active():
+    """Случайная активность: часть пользователей без подразделения целый квартал или весь год."""
+    rng = np.random.default_rng(8)
+    active = rng.random((40, 12)) < 0.7
+    active[0] = True
+    active[1] = False
+    active[2, :METRIC_QUARTER_MONTHS] = False
+    return active
+
+
+@pytest.mark.parametrize('period_months', [METRIC_QUARTER_MONTHS, 12])
+def test_rollup_matches_naive_aggregation(tmp_path, active, period_months):
+    """Кварталы и год совпадают с наивной суммой / средним по месяцам с подразделением."""
+    engine = make_engine(tmp_path, active)
+    engine.values = engine._generate_values()
+    assert set(engine.aggregations) == {'sum', 'mean'}
+
+    rollup = engine._rollup(period_months)
+    np.testing.assert_allclose(rollup, naive_rollup(engine, period_months), rtol=1e-12, equal_nan=True)
+
+
+def test_rollup_empty_periods_are_nan(tmp_path, active):
+    """Период без месяцев с подразделением пустой, даже у показателей с агрегированием 'sum'."""
+    engine = make_engine(tmp_path, active)
+    engine.values = engine._generate_values()
+    quarters = engine._rollup(METRIC_QUARTER_MONTHS)
+
+    assert np.isnan(engine.values[:, ~active]).all()
+    assert np.isnan(quarters[:, 1]).all()
+    assert np.isnan(quarters[:, 2, 0]).all() and not np.isnan(quarters[:, 2, 1:]).any()
+    assert not np.isnan(quarters[:, 0]).any()
+
+
+def test_months_must_be_multiple_of_quarter(tmp_path):
+    """Количество месяцев не кратно кварталу - ошибка."""
+    with pytest.raises(ValueError):
+        make_engine(tmp_path, np.ones((4, 10), dtype=bool))
@@ -0,0 +1,74 @@
+"""
+Тесты индекса организационной структуры (src/main.py, OrgIndex).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.main import ORG_ATTRIBUTE_COLUMNS, OrgIndex
+
+
+def naive_unit(org_data, unit_code):
+    """Поиск подразделения по DataFrame, который заменяет индекс (первое вхождение кода)."""
+    return org_data[org_data['Код подразделения'].astype(str) == str(unit_code)].iloc[0]
+
+
+def test_lookup_matches_dataframe_scan(org_data):
+    """Номер строки и атрибуты каждого подразделения совпадают с поиском по DataFrame."""
+    index = OrgIndex(org_data)
+    assert index.num_units == len(org_data)
+
+    for row, unit_code in enumerate(org_data['Код подразделения']):
+        assert index.row_of(unit_code) == row
+        assert index.get_attributes(unit_code) == tuple(naive_unit(org_data, unit_code)[ORG_ATTRIBUTE_COLUMNS])
+
+
+def test_numeric_codes_match_string_codes(org_data):
+    """Коды из Excel (числа) и из CSV (строки) находят одно подразделение; неизвестный код - KeyError."""
+    index = OrgIndex(org_data)
+    assert index.row_of(int('21003')) == index.row_of('21003')
+    with pytest.raises(KeyError):
+        index.row_of('99999')
+
+
+def test_duplicate_units_keep_first_row(org_data):
+    """Повторное подразделение в ORG не добавляет строку индекса, атрибуты - из первого вхождения."""
+    duplicate = org_data.iloc[[3]].assign(**{'Полное ГОСБ': 'Дубликат'})
+    index = OrgIndex(pd.concat([org_data, duplicate], ignore_index=True))
+
+    assert index.num_units == len(org_data)
+    assert index.get_attributes(org_data['Код подразделения'].iloc[3]) == tuple(org_data.iloc[3][ORG_ATTRIBUTE_COLUMNS])
+
+
+def test_hierarchy_matches_masks(org_data):
+    """Подразделения ТБ и ГОСБ совпадают с масками DataFrame; ГОСБ с одинаковым кодом в разных ТБ различаются."""
+    index = OrgIndex(org_data)
+    for tb_code in org_data['Код ТБ'].unique():
+        tb_mask = org_data['Код ТБ'] == tb_code
+        assert sorted(index.units_in_tb(tb_code).tolist()) == np.flatnonzero(tb_mask).tolist()
+        for gosb_code in org_data.loc[tb_mask, 'Код ГОСБ'].unique():
+            gosb_mask = tb_mask & (org_data['Код ГОСБ'] == gosb_code)
+            assert sorted(index.units_in_gosb(tb_code, gosb_code).tolist()) == np.flatnonzero(gosb_mask).tolist()
+
+    first, second = index.units_in_gosb('1', '0'), index.units_in_gosb('2', '0')
+    assert index.gosb_ids[first[0]] != index.gosb_ids[second[0]]
+    assert len(index.units_in_tb('нет')) == 0
+    assert len(index.units_in_gosb('1', 'нет')) == 0
+
+
+def test_attributes_frame_joins_by_row(org_data):
+    """Векторное соединение по номерам строк совпадает с выборкой строк DataFrame."""
+    index = OrgIndex(org_data)
+    rows = np.random.default_rng(0).integers(0, index.num_units, size=200)
+
+    frame = index.attributes_frame(rows)
+    expected = org_data.iloc[rows][['Код подразделения'] + ORG_ATTRIBUTE_COLUMNS].reset_index(drop=True)
+    pd.testing.assert_frame_equal(frame[expected.columns], expected, check_dtype=False)
+    assert list(index.attributes_frame(rows, ['Код ТБ']).columns) == ['Код подразделения', 'Код ТБ']
+
+
+def test_missing_columns_raise(org_data):
+    """Без колонок атрибутов индекс не строится."""
+    with pytest.raises(ValueError):
+        OrgIndex(org_data.drop(columns=['Полное ГОСБ']))
@@ -0,0 +1,152 @@
+"""
+Тесты загрузчика организационных единиц (src/main.py, OrgUnitsLoader).
+"""
+
+import copy
+
+import pandas as pd
+import pytest
+
+from src.main import LOADER_CONFIG, OrgUnitsLoader
+
+
+def source_frame(org_data):
+    """Структура ORG с исходными именами колонок входного CSV."""
+    source_columns = {target: source for source, target in LOADER_CONFIG['ORG']['column_mapping'].items()}
+    return org_data.rename(columns=source_columns)
+
+
+@pytest.fixture
+def org_csv(tmp_path, org_data):
+    """Входной CSV ORG (исходные имена колонок, разделитель ';') из синтетической структуры."""
+    path = tmp_path / 'org.csv'
+    source_frame(org_data).to_csv(path, sep=';', index=False, encoding='utf-8')
+    return path
+
+
+def make_loader(org_csv, tmp_path, **overrides):
+    """Загрузчик ORG для входного CSV; ТБ 2 и ГОСБ 0 исключаются фильтрами."""
+    config = copy.deepcopy(LOADER_CONFIG['ORG'])
+    config.update(
+        input_file=str(org_csv),
+        cache_dir=None,
+        chunk_size=None,
+        filters={'tb_code_exclude': {'2'}, 'gosb_code_exclude': {'0'}}
+    )
+    config.update(overrides)
+    return OrgUnitsLoader(config, 'test', output_dir=str(tmp_path / 'OUT'))
+
+
+def expected_rows(org_data):
+    """Строки ORG после фильтров загрузчика с индексом 0..N-1."""
+    kept = org_data[(org_data['Код ТБ'] != '2') & (org_data['Код ГОСБ'] != '0')]
+    return kept[list(LOADER_CONFIG['ORG']['column_mapping'].values())].reset_index(drop=True)
+
+
+@pytest.mark.parametrize('chunk_size', [None, 7])
+def test_prepare_returns_range_index_on_every_path(org_csv, tmp_path, org_data, chunk_size):
+    """Файл целиком, порции и попадание в кэш дают одинаковые данные с индексом 0..N-1."""
+    cache_dir = str(tmp_path / 'cache')
+    fresh = make_loader(org_csv, tmp_path, chunk_size=chunk_size, cache_dir=cache_dir).prepare()
+    cached = make_loader(org_csv, tmp_path, chunk_size=chunk_size, cache_dir=cache_dir).prepare()
+
+    for data in (fresh, cached):
+        assert isinstance(data.index, pd.RangeIndex) and data.index.start == 0
+        pd.testing.assert_frame_equal(data, expected_rows(org_data))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1000])
+def test_load_filtered_matches_full_load(org_csv, tmp_path, chunk_size):
+    """Потоковая загрузка порциями дает те же строки, что загрузка файла целиком с фильтрацией."""
+    loader = make_loader(org_csv, tmp_path, chunk_size=chunk_size)
+    expected = loader.filter_data(loader.load_csv()).reset_index(drop=True)
+    pd.testing.assert_frame_equal(loader.load_filtered(), expected)
+
+
+def test_only_required_columns_are_read(tmp_path, org_data):
+    """Колонки, не нужные маппингу и фильтрам, не читаются из CSV ни целиком, ни порциями."""
+    path = tmp_path / 'org.csv'
+    source_frame(org_data).assign(EXTRA='x', COMMENT='y').to_csv(path, sep=';', index=False, encoding='utf-8')
+    loader = make_loader(path, tmp_path, chunk_size=5)
+    required = set(loader._required_columns())
+
+    assert set(loader.load_csv().columns) == required
+    assert set(loader.load_filtered().columns) == required
+
+
+@pytest.mark.parametrize('chunk_size', [None, 5])
+def test_missing_filter_column_raises(tmp_path, org_data, chunk_size):
+    """Без колонки фильтра TB_CODE подготовка завершается ошибкой на обоих путях."""
+    path = tmp_path / 'org.csv'
+    source_frame(org_data).drop(columns=['TB_CODE']).to_csv(path, sep=';', index=False, encoding='utf-8')
+    with pytest.raises(ValueError):
+        make_loader(path, tmp_path, chunk_size=chunk_size).prepare()
+
+
+@pytest.mark.parametrize('chunk_size', [None, 5])
+def test_empty_file_raises(tmp_path, org_data, chunk_size):
+    """Файл только с заголовками - ошибка на обоих путях."""
+    path = tmp_path / 'org.csv'
+    source_frame(org_data).iloc[:0].to_csv(path, sep=';', index=False, encoding='utf-8')
+    with pytest.raises(ValueError):
+        make_loader(path, tmp_path, chunk_size=chunk_size).prepare()
+
+
+def fail(*args, **kwargs):
+    """Заглушка чтения CSV: при попадании в кэш файл не читается."""
+    raise AssertionError("Повторное чтение входного CSV")
+
+
+def test_cache_key_tracks_input_filters_and_mapping(org_csv, tmp_path):
+    """Ключ кэша меняется при изменении содержимого файла, фильтров или маппинга и не зависит от порядка фильтров."""
+    loader = make_loader(org_csv, tmp_path)
+    key = loader._cache_key()
+
+    assert make_loader(org_csv, tmp_path)._cache_key() == key
+    reordered = make_loader(org_csv, tmp_path, filters={'tb_code_exclude': ['2'], 'gosb_code_exclude': ['0']})
+    assert reordered._cache_key() == key
+
+    assert make_loader(org_csv, tmp_path, filters={'tb_code_exclude': {'3'}, 'gosb_code_exclude': {'0'}})._cache_key() != key
+    mapping = {source: f"{target} (новое)" for source, target in LOADER_CONFIG['ORG']['column_mapping'].items()}
+    assert make_loader(org_csv, tmp_path, column_mapping=mapping)._cache_key() != key
+
+    with open(org_csv, 'a', encoding='utf-8') as f:
+        f.write('\n')
+    assert make_loader(org_csv, tmp_path)._cache_key() != key
+
+
+def test_cache_hit_skips_csv(org_csv, tmp_path, org_data, monkeypatch):
+    """Повторная подготовка с тем же файлом берется из кэша без чтения CSV."""
+    cache_dir = str(tmp_path / 'cache')
+    make_loader(org_csv, tmp_path, cache_dir=cache_dir).prepare()
+    assert len(list((tmp_path / 'cache').iterdir())) == 1
+
+    monkeypatch.setattr(OrgUnitsLoader, 'load_csv', fail)
+    monkeypatch.setattr(OrgUnitsLoader, 'load_filtered', fail)
+    pd.testing.assert_frame_equal(make_loader(org_csv, tmp_path, cache_dir=cache_dir).prepare(), expected_rows(org_data))
+
+
+def test_cache_miss_after_input_change(org_csv, tmp_path, org_data):
+    """После изменения входного файла кэш не используется: данные готовятся заново и кэшируются под новым ключом."""
+    cache_dir = str(tmp_path / 'cache')
+    make_loader(org_csv, tmp_path, cache_dir=cache_dir).prepare()
+
+    changed = org_data.copy()
+    changed.loc[changed['Код ГОСБ'] != '0', 'Полное ГОСБ'] = 'Новое наименование'
+    source_frame(changed).to_csv(org_csv, sep=';', index=False, encoding='utf-8')
+    data = make_loader(org_csv, tmp_path, cache_dir=cache_dir).prepare()
+
+    assert (data['Полное ГОСБ'] == 'Новое наименование').all()
+    assert len(list((tmp_path / 'cache').iterdir())) == 2
+
+
+def test_corrupt_cache_falls_back_to_csv(org_csv, tmp_path, org_data):
+    """Поврежденный файл кэша не прерывает подготовку: данные читаются из CSV, кэш перезаписывается."""
+    cache_dir = str(tmp_path / 'cache')
+    loader = make_loader(org_csv, tmp_path, cache_dir=cache_dir)
+    loader.prepare()
+    cache_path = loader._cache_path(loader._cache_key())
+    cache_path.write_bytes(b'not a cache file')
+
+    pd.testing.assert_frame_equal(make_loader(org_csv, tmp_path, cache_dir=cache_dir).prepare(), expected_rows(org_data))
+    pd.testing.assert_frame_equal(loader._load_cache(cache_path), expected_rows(org_data))
@@ -0,0 +1,58 @@
+"""
+Тесты конвейера main(): передача данных между этапами и запись книги (src/main.py, ГЛАВНАЯ ФУНКЦИЯ).
+"""
+
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+import src.main as main_module
+
+
+def run_pipeline(monkeypatch) -> Path:
+    """Запуск main() с выходным каталогом OUT; путь к единственной книге результата."""
+    monkeypatch.setattr(main_module, 'OUTPUT_DIR', 'OUT')
+    main_module.main()
+    (output_file,) = Path('OUT').glob('*.xlsx')
+    return output_file
+
+
+def sheet_frame(path, sheet_name) -> pd.DataFrame:
+    """Лист книги в DataFrame (значения как записаны в ячейках)."""
+    rows = list(load_workbook(path, read_only=True)[sheet_name].iter_rows(values_only=True))
+    return pd.DataFrame(rows[1:], columns=rows[0])
+
+
+def test_org_passed_in_memory_keeps_string_codes(pipeline, monkeypatch, tmp_path, org_data):
+    """ORG передается генератору пользователей в памяти: Excel не читается, коды с лидирующими нулями сохраняются."""
+    source_columns = {target: source for source, target in pipeline['ORG']['column_mapping'].items()}
+    org_data['Код подразделения'] = '0' + org_data['Код подразделения']
+    org_data.rename(columns=source_columns).to_csv(tmp_path / 'org.csv', sep=';', index=False, encoding='utf-8')
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Повторное чтение выходного Excel файла")
+
+    monkeypatch.setattr(pd, 'read_excel', fail)
+    output_file = run_pipeline(monkeypatch)
+
+    users = sheet_frame(output_file, 'USERS')
+    assert set(users['Код подразделения']) == set(org_data['Код подразделения'])
+    assert users['Код подразделения'].str.startswith('0').all()
+
+
+def test_all_sheets_written_once_to_one_workbook(pipeline, monkeypatch):
+    """Все листы добавляются в одну сессию книги, которая записывается на диск один раз."""
+    monkeypatch.setattr(main_module, 'EXCEL_ENGINE', 'openpyxl')
+    saves = []
+    original_save = Workbook.save
+
+    def counting_save(workbook, filename):
+        saves.append(filename)
+        return original_save(workbook, filename)
+
+    monkeypatch.setattr(Workbook, 'save', counting_save)
+    output_file = run_pipeline(monkeypatch)
+
+    assert len(saves) == 1
+    assert load_workbook(output_file, read_only=True).sheetnames == ['ORG', 'USERS', 'USER_CNG', 'CLIENTS', 'METRICS']
@@ -0,0 +1,81 @@
+"""
+Тесты воспроизводимых запусков и кэша результатов (src/main.py, ГЛАВНАЯ ФУНКЦИЯ).
+"""
+
+import re
+from pathlib import Path
+
+import pytest
+
+import src.main as main_module
+
+
+def run(monkeypatch, output_dir: str) -> dict:
+    """Запуск main() с выходным каталогом output_dir; файлы результата по имени без таймштампа."""
+    monkeypatch.setattr(main_module, 'OUTPUT_DIR', output_dir)
+    main_module.main()
+    return {
+        re.sub(r'_\d{8}_\d{4}', '', path.name): path.read_bytes()
+        for path in sorted(Path(output_dir).iterdir())
+    }
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'xml'])
+def test_seeded_runs_are_byte_identical(pipeline, monkeypatch, engine):
+    """Два запуска с одним seed создают побайтно одинаковые файлы (включая лист CLIENT_CNG)."""
+    pipeline['CLIENT_CNG']['enabled'] = True
+    monkeypatch.setattr(main_module, 'EXCEL_ENGINE', engine)
+    monkeypatch.setattr(main_module, 'EXCEL_WORKERS', 1)
+
+    first = run(monkeypatch, 'run1')
+    second = run(monkeypatch, 'run2')
+
+    assert first and first.keys() == second.keys()
+    for name in first:
+        assert first[name] == second[name], name
+
+
+def test_result_cache_hit_and_miss(pipeline, monkeypatch):
+    """Повтор с теми же параметрами берется из кэша; другой seed или движок записи - новая генерация."""
+    monkeypatch.setattr(main_module, 'RESULT_CACHE_DIR', 'cache')
+    monkeypatch.setattr(main_module, 'OUTPUT_DIR', 'OUT')
+    main_module.main()
+    assert len(list(Path('cache').glob('result_*.json'))) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Генерация при попадании в кэш")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(main_module, 'OrgUnitsLoader', fail)
+        main_module.main()
+
+        pipeline['USERS']['seed'] = 8
+        with pytest.raises(AssertionError):
+            main_module.main()
+        pipeline['USERS']['seed'] = 7
+
+        patched.setattr(main_module, 'EXCEL_ENGINE', 'xml')
+        with pytest.raises(AssertionError):
+            main_module.main()
+
+
+def test_result_cache_miss_when_output_deleted(pipeline, monkeypatch):
+    """Удаленный файл результата делает запись кэша недействительной."""
+    monkeypatch.setattr(main_module, 'RESULT_CACHE_DIR', 'cache')
+    monkeypatch.setattr(main_module, 'OUTPUT_DIR', 'OUT')
+    main_module.main()
+    for path in Path('OUT').iterdir():
+        path.unlink()
+
+    main_module.main()
+    assert any(Path('OUT').iterdir())
+
+
+def test_result_cache_key_covers_code(pipeline, monkeypatch, tmp_path):
+    """Ключ кэша меняется вместе с кодом модуля."""
+    key = main_module._result_cache_key(pipeline, 7)
+    changed_code = tmp_path / 'main.py'
+    changed_code.write_text(Path(main_module.__file__).read_text(encoding='utf-8') + '\n# changed\n', encoding='utf-8')
+    monkeypatch.setattr(main_module, '__file__', str(changed_code))
+
+    assert main_module._result_cache_key(pipeline, 7) != key
@@ -0,0 +1,78 @@
+"""
+Тесты приемников листов в отдельные файлы (src/main.py, FileSink, CsvSink, ParquetSink, FeatherSink).
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from src.main import FILE_SINKS, OUTPUT_FORMATS, WorkbookSession
+
+
+def parts():
+    """Две части листа: текстовая колонка с лидирующими нулями и пропуском, числовая колонка."""
+    yield pd.DataFrame({'Табельный номер': ['00000001', '00000002'], 'Значение': [1.5, 2.0]})
+    yield pd.DataFrame({'Табельный номер': ['00000003', None], 'Значение': [3.25, 4.0]})
+
+
+def read_back(path, output_format):
+    """Чтение файла приемника (CSV не хранит типы: текстовая колонка читается строкой)."""
+    if output_format == 'csv':
+        return pd.read_csv(path, sep=';', encoding='utf-8', dtype={'Табельный номер': str})
+    if output_format == 'parquet':
+        return pd.read_parquet(path)
+    return pd.read_feather(path)
+
+
+@pytest.mark.parametrize('output_format', list(FILE_SINKS))
+def test_sheet_written_to_separate_file(tmp_path, output_format):
+    """Лист формата, отличного от xlsx, записывается отдельным файлом {base}_{timestamp}_{лист}; книга его не содержит."""
+    if output_format != 'csv':
+        pytest.importorskip('pyarrow')
+    session = WorkbookSession('test', str(tmp_path), timestamp='20261018_000000')
+    path = Path(session.add_sheet(parts(), 'DATA', text_columns=['Табельный номер'], output_format=output_format))
+    session.add_sheet(pd.DataFrame({'A': [1]}), 'XLSX')
+    workbook_path = session.save()
+
+    assert path.name == f"test_20261018_000000_DATA{OUTPUT_FORMATS[output_format]}"
+    assert session.output_files['DATA'] == str(path)
+    assert load_workbook(workbook_path, read_only=True).sheetnames == ['XLSX']
+
+    data = read_back(path, output_format)
+    expected = pd.concat(list(parts()), ignore_index=True)
+    assert data['Табельный номер'].iloc[:3].tolist() == expected['Табельный номер'].iloc[:3].tolist()
+    assert data['Табельный номер'].isna().tolist() == [False, False, False, True]
+    assert data['Значение'].tolist() == expected['Значение'].tolist()
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'feather'])
+def test_arrow_text_columns_are_strings(tmp_path, output_format):
+    """Текстовые колонки в схеме Parquet/Feather имеют тип string, даже если в данных числа."""
+    pa = pytest.importorskip('pyarrow')
+    chunks = [pd.DataFrame({'Код': [1, 2], 'Число': [1, 2]}), pd.DataFrame({'Код': [3], 'Число': [3]})]
+    path = tmp_path / f"data{OUTPUT_FORMATS[output_format]}"
+
+    assert FILE_SINKS[output_format]().write(iter(chunks), path, ['Код']) == 3
+    schema = pa.parquet.read_schema(path) if output_format == 'parquet' else pa.feather.read_table(path).schema
+    assert schema.field('Код').type == pa.string()
+    assert schema.field('Число').type == pa.int64()
+
+
+def test_only_file_sheets_return_file_path(tmp_path):
+    """Без листов xlsx книга не создается, save() возвращает путь файла приемника."""
+    session = WorkbookSession('test', str(tmp_path))
+    path = session.add_sheet(parts(), 'DATA', output_format='csv')
+
+    assert session.save() == path
+    assert not list(tmp_path.glob('*.xlsx'))
+
+
+def test_unsupported_format_and_formulas_raise(tmp_path):
+    """Неизвестный формат и формулы вне xlsx - ошибка."""
+    session = WorkbookSession('test', str(tmp_path))
+    with pytest.raises(ValueError):
+        session.add_sheet(parts(), 'DATA', output_format='json')
+    with pytest.raises(ValueError):
+        session.add_sheet(parts(), 'DATA', output_format='csv', formula_columns={'Значение': 'A{row}'})
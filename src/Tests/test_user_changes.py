@@ -0,0 +1,219 @@
+"""
+Тесты генератора движения пользователей (src/main.py, МОДУЛЬ ГЕНЕРАЦИИ ДВИЖЕНИЯ ПОЛЬЗОВАТЕЛЕЙ).
+"""
+
+import copy
+
+import numpy as np
+import pytest
+
+from src.main import LOADER_CONFIG, USER_CNG_CATEGORIES, CapacityLedger, OrgIndex, UserChangeGenerator, UserGenerator, UserStore
+
+
+def make_user_changes(users_config, org_data, tmp_path, as_frame=False, **overrides):
+    """Генератор движения по пользователям синтетической структуры ORG (без записи листа)."""
+    users = UserGenerator(users_config, org_data, 'test', output_dir=str(tmp_path))
+    store = users._distribute_users_to_org_units()
+    config = copy.deepcopy(LOADER_CONFIG['USER_CNG'])
+    config.update(overrides)
+    return UserChangeGenerator(
+        config,
+        store.to_frame() if as_frame else store,
+        org_data,
+        users_config['gray_zone'],
+        output_dir=str(tmp_path),
+        users_seed=users_config['seed'],
+        unit_counts=users.unit_counts,
+        block_names=[block['name'] for block in users_config['business_blocks'].values()]
+    )
+
+
+def simulate(generator):
+    """Категории и матрица движения (как в process, без записи листа)."""
+    generator.categories = generator._categorize_users()
+    generator.movement = generator._simulate_movements()
+    return generator.movement
+
+
+@pytest.fixture
+def user_changes(users_config, org_data, tmp_path):
+    """Генератор движения после симуляции с повышенной вероятностью переходов."""
+    generator = make_user_changes(users_config, org_data, tmp_path, move_probability=0.5)
+    simulate(generator)
+    return generator
+
+
+def category_mask(generator, category):
+    """Маска пользователей категории движения."""
+    return generator.categories == USER_CNG_CATEGORIES.index(category)
+
+
+def test_gray_zone_users_excluded(user_changes, users_config):
+    """Пользователи "Серая зона" не участвуют в движении."""
+    gray_zone = users_config['gray_zone']
+    assert not user_changes.users['Табельный номер'].isin(gray_zone['tab_numbers']).any()
+    assert not user_changes.users['ФИО'].isin(gray_zone['fio_options']).any()
+    assert user_changes.movement.shape == (len(user_changes.users), user_changes.months)
+
+
+def test_category_rules(user_changes):
+    """stay не меняют подразделение, gosb остаются в ТБ, уволенные не возвращаются, принятые - на место с листа USERS."""
+    movement = user_changes.movement
+    baseline = user_changes.baseline_rows[:, None]
+    tb_ids = user_changes.org_index.tb_ids
+
+    stay = category_mask(user_changes, 'stay')
+    assert (movement[stay] == baseline[stay]).all()
+
+    gosb = category_mask(user_changes, 'gosb')
+    assert (tb_ids[movement[gosb]] == tb_ids[baseline[gosb]]).all()
+    assert (movement[gosb] != baseline[gosb]).any()
+
+    dismissed = movement[category_mask(user_changes, 'dismissed')]
+    assert (dismissed[:, 0] >= 0).all()
+    assert ((dismissed[:, 1:] >= 0) <= (dismissed[:, :-1] >= 0)).all()
+
+    hired = category_mask(user_changes, 'hired')
+    assert (movement[hired, 0] == -1).all()
+    assigned = movement[hired] >= 0
+    assert (assigned[:, 1:] >= assigned[:, :-1]).all()
+    assert (np.where(assigned, movement[hired], baseline[hired]) == baseline[hired]).all()
+
+
+def moves(generator, category):
+    """Переходы категории: (строка до, строка после) между соседними месяцами."""
+    movement = generator.movement[category_mask(generator, category)]
+    before, after = movement[:, :-1], movement[:, 1:]
+    moved = (before >= 0) & (after >= 0) & (before != after)
+    return before[moved], after[moved]
+
+
+def test_tb_moves_change_tb(user_changes):
+    """Каждый переход категории tb меняет ТБ, каждый переход категории gosb - ГОСБ внутри ТБ."""
+    tb_ids, gosb_ids = user_changes.org_index.tb_ids, user_changes.org_index.gosb_ids
+
+    before, after = moves(user_changes, 'tb')
+    assert len(before) > 0
+    assert (tb_ids[before] != tb_ids[after]).all()
+
+    before, after = moves(user_changes, 'gosb')
+    assert len(before) > 0
+    assert (tb_ids[before] == tb_ids[after]).all()
+    assert (gosb_ids[before] != gosb_ids[after]).all()
+
+
+def test_category_shares(user_changes):
+    """Количества категорий соответствуют долям конфигурации (метод наибольших остатков)."""
+    counts = np.bincount(user_changes.categories, minlength=len(USER_CNG_CATEGORIES))
+    expected = user_changes.category_shares * len(user_changes.users)
+    assert counts.sum() == len(user_changes.users)
+    assert (np.abs(counts - expected) < 1).all()
+
+
+def test_simulation_is_reproducible(users_config, org_data, tmp_path):
+    """Один seed USERS - одинаковая матрица движения."""
+    first = simulate(make_user_changes(users_config, org_data, tmp_path))
+    second = simulate(make_user_changes(users_config, org_data, tmp_path))
+    assert np.array_equal(first, second)
+
+
+def test_store_codes_match_frame_input(users_config, org_data, tmp_path, monkeypatch):
+    """Хранилище дает те же коды и движение, что и DataFrame листа USERS, без сборки строк до вывода."""
+    from_frame = make_user_changes(users_config, org_data, tmp_path, as_frame=True)
+    simulate(from_frame)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Сборка строк пользователей при симуляции")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(UserStore, 'to_frame', fail)
+        from_store = make_user_changes(users_config, org_data, tmp_path)
+        simulate(from_store)
+
+    assert np.array_equal(from_store.baseline_rows, from_frame.baseline_rows)
+    assert np.array_equal(from_store.block_ids, from_frame.block_ids)
+    assert np.array_equal(from_store.movement, from_frame.movement)
+    assert from_store.users.equals(from_frame.users)
+
+
+def test_invalid_category_shares_raise(users_config, org_data, tmp_path):
+    """Доли категорий должны быть заданы полностью и давать в сумме 1.0."""
+    with pytest.raises(ValueError):
+        make_user_changes(users_config, org_data, tmp_path, categories={'stay': 0.5, 'gosb': 0.2})
+
+
+def occupancy(generator):
+    """Фактическая занятость месяцы x подразделения x блоки по матрице движения."""
+    num_units, num_blocks = generator.capacity.shape
+    counts = np.zeros((generator.months, num_units, num_blocks), dtype=np.int64)
+    for month in range(generator.months):
+        rows = generator.movement[:, month]
+        assigned = rows >= 0
+        np.add.at(counts[month], (rows[assigned], generator.block_ids[assigned]), 1)
+    return counts
+
+
+def test_capacity_never_exceeded(user_changes):
+    """Ни в одном месяце занятость (подразделение, блок) не превышает места с листа USERS."""
+    assert (occupancy(user_changes) <= user_changes.capacity).all()
+
+
+def test_every_slot_keeps_an_employee(user_changes):
+    """В каждой паре (подразделение, блок) с местами в каждом месяце есть сотрудник блока."""
+    assert (occupancy(user_changes)[:, user_changes.capacity > 0] > 0).all()
+
+
+def test_ledger_matches_movement(user_changes):
+    """Учет мест, который ведется по изменениям, совпадает с пересчетом по матрице движения."""
+    assert np.array_equal(user_changes.ledger.occupied, occupancy(user_changes))
+    assert not user_changes.ledger.reserved.any()  # Все принятые пользователи заняли свои места
+
+
+def check_free_index(ledger):
+    """Индекс свободных мест совпадает с матрицей свободных мест текущего месяца."""
+    free = ledger.free_slots() > 0
+    bounds, units = ledger.free_index()
+    for block in range(ledger.num_blocks):
+        for tb_id, tb_code in enumerate(ledger.org_index.tb_codes):
+            key = block * ledger.num_tb + tb_id
+            expected = np.flatnonzero(free[:, block] & (ledger.org_index.tb_ids == tb_id))
+            assert sorted(units[bounds[key]:bounds[key + 1]].tolist()) == expected.tolist()
+            assert sorted(ledger.units_accepting(tb_code, block).tolist()) == expected.tolist()
+            for unit in expected:
+                assert ledger.can_accept(int(unit), block)
+
+
+def test_capacity_ledger_free_index_under_random_operations(org_data):
+    """Индекс свободных мест остается верным после случайных перемещений, увольнений и приемов."""
+    rng = np.random.default_rng(0)
+    org_index = OrgIndex(org_data)
+    capacity = rng.integers(1, 4, size=(org_index.num_units, 2))
+    ledger = CapacityLedger(capacity, org_index, months=6)
+
+    # Занята примерно половина мест, одно место пары (0, 0) зарезервировано за будущим приемом
+    units, blocks = np.nonzero(capacity > 1)
+    taken = rng.random(len(units)) < 0.5
+    ledger.start(units[taken], blocks[taken], np.array([0]), np.array([0]))
+    check_free_index(ledger)
+
+    for _ in range(ledger.months - 1):
+        ledger.next_month()
+        for _ in range(50):
+            action = rng.integers(3)
+            occupied_units, occupied_blocks = np.nonzero(ledger.occupied[ledger.month])
+            free_units, free_blocks = np.nonzero(ledger.free_slots() > 0)
+            if action == 0 and len(free_units):
+                pick = rng.integers(len(free_units))
+                ledger.apply(free_units[pick:pick + 1], free_blocks[pick:pick + 1], 1)
+            elif action == 1 and len(occupied_units):
+                pick = rng.integers(len(occupied_units))
+                ledger.apply(occupied_units[pick:pick + 1], occupied_blocks[pick:pick + 1], -1)
+            elif len(occupied_units):
+                pick = rng.integers(len(occupied_units))
+                block = int(occupied_blocks[pick])
+                targets = np.flatnonzero(ledger.free_slots()[:, block] > 0)
+                if len(targets):
+                    ledger.move(int(occupied_units[pick]), int(rng.choice(targets)), block)
+            check_free_index(ledger)
+            assert (ledger.occupied[ledger.month] + ledger.reserved <= ledger.capacity).all()
+            assert (ledger.occupied[ledger.month] >= 0).all()
@@ -0,0 +1,234 @@
+"""
+Тесты генератора пользователей (src/main.py, МОДУЛЬ ГЕНЕРАЦИИ ПОЛЬЗОВАТЕЛЕЙ).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.main import USER_COLUMNS, USER_GENDERS, UserGenerator, UserStore
+
+
+def generate(users_config, org_data, tmp_path, parallel=None):
+    """Распределение пользователей генератором с заданными параметрами параллельной генерации."""
+    if parallel is not None:
+        users_config['parallel'] = {'enabled': True, **parallel}
+    generator = UserGenerator(users_config, org_data, 'test', output_dir=str(tmp_path))
+    return generator, generator._distribute_users_to_org_units()
+
+
+def users_frame(users):
+    """Пользователи хранилища (режим batch) или списка словарей (режим single) колонками листа USERS."""
+    return users.to_frame() if isinstance(users, UserStore) else pd.DataFrame(users)[USER_COLUMNS]
+
+
+def regular_counts(generator, users):
+    """Матрица количеств обычных пользователей (подразделения x блоки) по хранилищу."""
+    regular = users.gray_tab < 0
+    num_blocks = len(generator.block_codes)
+    return np.bincount(
+        users.unit_row[regular].astype(np.int64) * num_blocks + users.block[regular],
+        minlength=generator.org_index.num_units * num_blocks
+    ).reshape(generator.org_index.num_units, num_blocks)
+
+
+@pytest.mark.parametrize('parallel', [{'workers': 1}, {'workers': 2}, {'workers': 2, 'shard_by': 'Код подразделения'}])
+def test_parallel_matches_serial_counts(users_config, org_data, tmp_path, parallel):
+    """Параллельная генерация дает те же количества по (подразделение, блок), что и последовательная."""
+    serial, serial_users = generate(dict(users_config), org_data, tmp_path)
+    sharded, sharded_users = generate(dict(users_config), org_data, tmp_path, parallel)
+
+    assert np.array_equal(serial.unit_counts, sharded.unit_counts)
+    assert np.array_equal(regular_counts(serial, serial_users), serial.unit_counts)
+    assert np.array_equal(regular_counts(sharded, sharded_users), sharded.unit_counts)
+    for block_index, block_code in enumerate(serial.block_codes):
+        assert sharded.unit_counts[:, block_index].sum() == users_config['business_blocks'][block_code]['count']
+
+
+@pytest.mark.parametrize('parallel', [None, {'workers': 2}])
+def test_identifiers_unique(users_config, org_data, tmp_path, parallel):
+    """Табельные номера и ФИО обычных пользователей уникальны, в том числе между шардами."""
+    _, users = generate(users_config, org_data, tmp_path, parallel)
+    frame = users.to_frame()[users.gray_tab < 0]
+
+    assert frame['Табельный номер'].is_unique
+    assert frame['ФИО'].is_unique
+
+
+def test_parallel_fio_ranges_follow_gender_counts(users_config, org_data, tmp_path):
+    """Диапазоны ФИО шардов резервируются по количеству мужчин и женщин, без пропусков пространства."""
+    generator, users = generate(users_config, org_data, tmp_path, {'workers': 2})
+    regular = users.gray_tab < 0
+
+    for gender_code, gender in enumerate(USER_GENDERS):
+        assert generator.fio_allocators[gender].position == int((users.gender[regular] == gender_code).sum())
+
+
+@pytest.mark.parametrize('parallel', [None, {'workers': 2}])
+def test_min_per_unit(users_config, org_data, tmp_path, parallel):
+    """В каждом подразделении не меньше min_per_unit пользователей каждого блока."""
+    users_config['min_per_unit'] = {'KMKKSB': 3, 'MNS': 1}
+    generator, users = generate(users_config, org_data, tmp_path, parallel)
+    counts = regular_counts(generator, users)
+
+    for block_index, block_code in enumerate(generator.block_codes):
+        assert counts[:, block_index].min() >= users_config['min_per_unit'][block_code]
+
+
+def test_fixed_distribution_is_exact(users_config, org_data, tmp_path):
+    """Подразделения fixed_distribution получают ровно заданные количества."""
+    unit_code = org_data['Код подразделения'].iloc[7]
+    users_config['fixed_distribution'] = {unit_code: {'KMKKSB': 11, 'MNS': 0}}
+    generator, users = generate(users_config, org_data, tmp_path, {'workers': 2})
+    row = generator.org_index.row_by_code[unit_code]
+
+    assert regular_counts(generator, users)[row].tolist() == [11, 0]
+
+
+def test_insufficient_block_count_raises(users_config, org_data, tmp_path):
+    """Количества блока меньше суммы минимумов по подразделениям - ошибка конфигурации."""
+    users_config['business_blocks']['MNS']['count'] = 10
+    with pytest.raises(ValueError):
+        generate(users_config, org_data, tmp_path)
+
+
+@pytest.mark.parametrize('mode', ['batch', 'single'])
+def test_generation_modes_follow_distribution_rules(users_config, org_data, tmp_path, mode):
+    """Режимы batch и single соблюдают одни правила: итоги блоков, фиксированное распределение, минимумы, "Серая зона"."""
+    unit_code = org_data['Код подразделения'].iloc[7]
+    users_config.update(
+        generation_mode=mode,
+        fixed_distribution={unit_code: {'KMKKSB': 11, 'MNS': 0}},
+        min_per_unit={'KMKKSB': 3, 'MNS': 1}
+    )
+    generator, users = generate(users_config, org_data, tmp_path)
+    frame = users_frame(users)
+    gray = frame['Табельный номер'].isin(users_config['gray_zone']['tab_numbers'])
+    regular = frame[~gray]
+    block_names = [users_config['business_blocks'][code]['name'] for code in generator.block_codes]
+    counts = pd.crosstab(regular['Код подразделения'], regular['Бизнес-блок']).reindex(
+        index=org_data['Код подразделения'], columns=block_names, fill_value=0
+    )
+
+    assert list(frame.columns) == USER_COLUMNS
+    assert np.array_equal(counts.to_numpy(), generator.unit_counts)
+    for block_code, block_name in zip(generator.block_codes, block_names):
+        assert counts[block_name].sum() == users_config['business_blocks'][block_code]['count']
+    assert counts.loc[unit_code].tolist() == [11, 0]
+    others = counts.drop(index=unit_code)
+    assert (others['Клиентские менеджеры'] >= 3).all() and (others['Менеджер нефинансовых сервисов'] >= 1).all()
+    assert set(frame.loc[gray, 'Код подразделения']) == set(org_data['Код подразделения'])
+    assert regular['Табельный номер'].is_unique and regular['Табельный номер'].str.fullmatch(r'\d{8}').all()
+    assert regular['ФИО'].is_unique
+
+
+def test_generation_modes_share_distribution_plan(users_config, org_data, tmp_path):
+    """С одним seed режимы batch и single распределяют одинаковые количества по подразделениям."""
+    batch, _ = generate(dict(users_config, generation_mode='batch'), org_data, tmp_path)
+    single, _ = generate(dict(users_config, generation_mode='single'), org_data, tmp_path)
+    assert np.array_equal(batch.unit_counts, single.unit_counts)
+
+
+@pytest.mark.parametrize('mode', ['batch', 'single'])
+def test_gender_share_follows_block_distribution(users_config, org_data, tmp_path, mode):
+    """Доля мужчин блока близка к gender_distribution; женские ФИО из женских списков."""
+    users_config['generation_mode'] = mode
+    generator, users = generate(users_config, org_data, tmp_path)
+    frame = users_frame(users)
+    female_names = set(users_config['female_data']['first_names'])
+    is_female = frame['ФИО'].str.split(' ').str[1].isin(female_names)
+
+    for block_code, block in users_config['business_blocks'].items():
+        in_block = (frame['Бизнес-блок'] == block['name']) & ~frame['ФИО'].isin(users_config['gray_zone']['fio_options'])
+        male_share = 1 - is_female[in_block].mean()
+        assert abs(male_share - block['gender_distribution']) < 0.1, block_code
+
+
+def plan(users_config, org_data, tmp_path, **overrides):
+    """План количеств (подразделения x блоки) нового генератора с измененными параметрами конфигурации."""
+    users_config.update(overrides)
+    generator = UserGenerator(users_config, org_data, 'test', output_dir=str(tmp_path))
+    return generator, generator._plan_unit_counts()
+
+
+def test_plan_honours_totals_minimums_and_fixed_units(users_config, org_data, tmp_path):
+    """План: итоги блоков из конфигурации, ровные фиксированные количества, минимум в остальных подразделениях."""
+    fixed_code, unknown_code = org_data['Код подразделения'].iloc[5], '99999'
+    generator, counts = plan(
+        users_config, org_data, tmp_path,
+        min_per_unit={'KMKKSB': 4, 'MNS': 2},
+        fixed_distribution={fixed_code: {'KMKKSB': 9}, unknown_code: {'KMKKSB': 100}}
+    )
+    fixed_row = generator.org_index.row_by_code[fixed_code]
+    free = np.delete(counts, fixed_row, axis=0)
+
+    assert counts.shape == (generator.org_index.num_units, len(generator.block_codes))
+    assert counts.sum(axis=0).tolist() == [users_config['business_blocks'][code]['count'] for code in generator.block_codes]
+    assert counts[fixed_row].tolist() == [9, 0]
+    assert (free >= [4, 2]).all()
+
+
+def test_plan_is_reproducible_per_seed(users_config, org_data, tmp_path):
+    """Один seed - один план; другой seed меняет розыгрыш остатка, но не итоги."""
+    _, first = plan(users_config.copy(), org_data, tmp_path)
+    _, second = plan(users_config.copy(), org_data, tmp_path)
+    _, other = plan(users_config.copy(), org_data, tmp_path, seed=users_config['seed'] + 1)
+
+    assert np.array_equal(first, second)
+    assert not np.array_equal(first, other)
+    assert np.array_equal(first.sum(axis=0), other.sum(axis=0))
+
+
+def test_plan_spreads_remainder_uniformly(users_config, org_data, tmp_path):
+    """Остаток распределяется равновероятно: средние по подразделениям близки к ожидаемым, разброс мультиномиальный."""
+    users_config['business_blocks']['KMKKSB']['count'] = 60000
+    generator, counts = plan(users_config, org_data, tmp_path, min_per_unit={'KMKKSB': 0, 'MNS': 0})
+    expected = 60000 / generator.org_index.num_units
+    kmkksb = counts[:, generator.block_codes.index('KMKKSB')]
+
+    assert np.abs(kmkksb - expected).max() < 5 * np.sqrt(expected)
+    assert 0.5 * expected < kmkksb.var() < 1.5 * expected
+
+
+def test_plan_shortage_names_block(users_config, org_data, tmp_path):
+    """Если после фиксированного распределения блоку не хватает пользователей на минимум - ошибка с кодом блока."""
+    fixed_code = org_data['Код подразделения'].iloc[0]
+    users_config['business_blocks']['MNS']['count'] = len(org_data)
+    with pytest.raises(ValueError, match='MNS'):
+        plan(users_config, org_data, tmp_path, fixed_distribution={fixed_code: {'MNS': 2}})
+
+
+@pytest.mark.parametrize('batch_size', [1, 97, 100000])
+def test_iter_batches_follow_plan(users_config, org_data, tmp_path, batch_size):
+    """Порции не больше batch_size (короче только последняя); вместе - план количеств, уникальные номера и ФИО, "Серая зона" в конце."""
+    generator = UserGenerator(users_config, org_data, 'test', output_dir=str(tmp_path))
+    batches = list(generator.iter_batches(batch_size, output='store'))
+    users = UserStore.concat(batches)
+    frame = users.to_frame()
+    regular = users.gray_tab < 0
+
+    assert all(len(batch) == batch_size for batch in batches[:-1]) and 0 < len(batches[-1]) <= batch_size
+    assert np.array_equal(regular_counts(generator, users), generator.unit_counts)
+    assert frame['Табельный номер'][regular].is_unique and frame['ФИО'][regular].is_unique
+    assert np.bincount(users.unit_row[~regular], minlength=generator.org_index.num_units).tolist() == [1] * len(org_data)
+    assert regular[:-len(org_data)].all() and not regular[-len(org_data):].any()
+
+
+@pytest.mark.parametrize('output', ['frame', 'arrow'])
+def test_iter_batches_output_formats(users_config, org_data, tmp_path, output):
+    """Порции DataFrame и pyarrow совпадают со сборкой порций хранилища при том же seed."""
+    if output == 'arrow':
+        pytest.importorskip('pyarrow')
+    expected = UserGenerator(users_config.copy(), org_data, 'test', output_dir=str(tmp_path)).iter_batches(500, output='store')
+    batches = UserGenerator(users_config.copy(), org_data, 'test', output_dir=str(tmp_path)).iter_batches(500, output=output)
+
+    for store, batch in zip(expected, batches, strict=True):
+        frame = batch.to_pandas() if output == 'arrow' else batch
+        pd.testing.assert_frame_equal(frame, store.to_frame())
+
+
+def test_iter_batches_unknown_output_raises(users_config, org_data, tmp_path):
+    """Неизвестный формат порций - ошибка."""
+    generator = UserGenerator(users_config, org_data, 'test', output_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        next(generator.iter_batches(10, output='json'))
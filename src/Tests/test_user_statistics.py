@@ -0,0 +1,105 @@
+"""
+Тесты статистики пользователей (src/main.py, UserStatistics).
+"""
+
+import json
+import logging
+
+import pandas as pd
+import pytest
+
+from src.main import USER_COLUMNS, UserGenerator, UserStatistics, UserStore
+
+
+def make_generator(users_config, org_data, tmp_path, mode='batch', **overrides):
+    """Генератор пользователей в заданном режиме со своим логгером."""
+    users_config.update(generation_mode=mode, **overrides)
+    return UserGenerator(users_config, org_data, 'test', output_dir=str(tmp_path), logger=logging.getLogger('test_statistics'))
+
+
+def users_with_gender(users):
+    """Пользователи колонками листа и кодом пола (-1 у "Серой зоны")."""
+    if isinstance(users, UserStore):
+        return users.to_frame().assign(Пол=users.gender)
+    return pd.DataFrame(users)[USER_COLUMNS + ['Пол']]
+
+
+def expected_counters(frame, keys):
+    """Наивный расчет разреза groupby: всего, мужчин и женщин по группам."""
+    grouped = frame.assign(male=frame['Пол'] == 0, female=frame['Пол'] == 1).groupby(keys, sort=True)
+    counters = grouped.agg(total=('Пол', 'size'), male=('male', 'sum'), female=('female', 'sum')).reset_index()
+    return counters.astype({'total': int, 'male': int, 'female': int}).to_dict('records')
+
+
+@pytest.mark.parametrize('mode', ['batch', 'single'])
+def test_report_matches_pandas_groupby(users_config, org_data, tmp_path, mode):
+    """Сводные показатели и разрезы совпадают с группировкой DataFrame пользователей в обоих режимах."""
+    generator = make_generator(users_config, org_data, tmp_path, mode)
+    users = generator._distribute_users_to_org_units()
+    statistics = UserStatistics(generator.org_index, generator.vocabulary.block_names)
+    if isinstance(users, UserStore):
+        statistics.add_store(users)
+    else:
+        statistics.add(*generator._user_codes(users))
+    report = statistics.report()
+    frame = users_with_gender(users)
+
+    assert report['total'] == len(frame)
+    assert report['blocks'] == frame['Бизнес-блок'].nunique()
+    assert report['tb'] == frame['Код ТБ'].nunique()
+    assert report['gosb'] == len(frame[['Код ТБ', 'Код ГОСБ']].drop_duplicates())
+    assert report['by_block'] == [
+        {'block': item['Бизнес-блок'], 'total': item['total'], 'male': item['male'], 'female': item['female']}
+        for item in expected_counters(frame, ['Бизнес-блок'])
+    ]
+    assert report['by_block_tb'] == [
+        {'block': item['Бизнес-блок'], 'tb_name': item['Полное ТБ'], 'tb_code': item['Код ТБ'],
+         'total': item['total'], 'male': item['male'], 'female': item['female']}
+        for item in expected_counters(frame, ['Бизнес-блок', 'Полное ТБ', 'Код ТБ'])
+    ]
+    assert report['by_block_tb_gosb'] == [
+        {'block': item['Бизнес-блок'], 'tb_name': item['Полное ТБ'], 'tb_code': item['Код ТБ'],
+         'gosb_name': item['Полное ГОСБ'], 'gosb_code': item['Код ГОСБ'],
+         'total': item['total'], 'male': item['male'], 'female': item['female']}
+        for item in expected_counters(frame, ['Бизнес-блок', 'Полное ТБ', 'Код ТБ', 'Полное ГОСБ', 'Код ГОСБ'])
+    ]
+    gosb_totals = frame.groupby(['Код ТБ', 'Код ГОСБ']).size()
+    assert sorted(item['total'] for item in report['by_gosb']) == sorted(gosb_totals.tolist())
+
+
+def test_portions_accumulate(users_config, org_data, tmp_path):
+    """Статистика по порциям совпадает со статистикой по всему хранилищу."""
+    generator = make_generator(users_config, org_data, tmp_path)
+    users = generator._distribute_users_to_org_units()
+    whole = UserStatistics(generator.org_index, generator.vocabulary.block_names)
+    whole.add_store(users)
+    portions = UserStatistics(generator.org_index, generator.vocabulary.block_names)
+    for start in range(0, len(users), 300):
+        portions.add_store(users.take(slice(start, start + 300)))
+
+    assert portions.report() == whole.report()
+
+
+def test_statistics_skipped_without_debug_or_report(users_config, org_data, tmp_path, monkeypatch, caplog):
+    """Без уровня DEBUG и JSON отчета статистика не собирается."""
+    def fail(*args, **kwargs):
+        raise AssertionError("Статистика собирается без вывода")
+
+    monkeypatch.setattr(UserStatistics, 'add', fail)
+    caplog.set_level(logging.INFO, logger='test_statistics')
+    generator = make_generator(users_config, org_data, tmp_path)
+    generator._log_statistics(generator._distribute_users_to_org_units())
+    list(make_generator(users_config, org_data, tmp_path).iter_batches(500))
+
+
+def test_json_report_written(users_config, org_data, tmp_path, caplog):
+    """При statistics_report отчет записывается в JSON файл без уровня DEBUG."""
+    caplog.set_level(logging.INFO, logger='test_statistics')
+    generator = make_generator(users_config, org_data, tmp_path, statistics_report=True)
+    users = generator._distribute_users_to_org_units()
+    generator._log_statistics(users)
+
+    (report_path,) = tmp_path.glob('test_*_statistics.json')
+    statistics = UserStatistics(generator.org_index, generator.vocabulary.block_names)
+    statistics.add_store(users)
+    assert json.loads(report_path.read_text(encoding='utf-8')) == statistics.report()
@@ -0,0 +1,77 @@
+"""
+Тесты колоночного хранилища пользователей (src/main.py, UserStore).
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.main import USER_COLUMNS, UserGenerator, UserStore
+
+
+@pytest.fixture
+def store(users_config, org_data, tmp_path):
+    """Хранилище пользователей генератора в режиме batch."""
+    users_config['generation_mode'] = 'batch'
+    users = UserGenerator(users_config, org_data, 'test', output_dir=str(tmp_path))._distribute_users_to_org_units()
+    assert isinstance(users, UserStore)
+    return users
+
+
+def test_fields_have_fixed_width_types(store):
+    """Колонки хранилища имеют типы FIELDS; пользователь занимает 22 байта."""
+    for name, dtype in UserStore.FIELDS.items():
+        assert getattr(store, name).dtype == dtype
+        assert len(getattr(store, name)) == len(store)
+    assert store.nbytes == 22 * len(store)
+
+
+def test_take_and_concat_round_trip(store):
+    """Выборка и объединение частей дают те же строки, что и выборка строк собранного DataFrame."""
+    frame = store.to_frame()
+    rows = np.random.default_rng(0).permutation(len(store))
+    first, second = rows[:100], rows[100:]
+    joined = UserStore.concat([store.take(first), store.take(second)])
+
+    assert joined.vocabulary is store.vocabulary
+    pd.testing.assert_frame_equal(joined.to_frame(), frame.iloc[rows].reset_index(drop=True))
+    pd.testing.assert_frame_equal(store.take(slice(10, 20)).to_frame(), frame.iloc[10:20].reset_index(drop=True))
+
+
+def test_to_frame_columns_follow_request(store):
+    """Запрошенные колонки собираются в указанном порядке и совпадают с полным выводом."""
+    columns = ['Код подразделения', 'ФИО', USER_COLUMNS[-1]]
+    pd.testing.assert_frame_equal(store.to_frame(columns), store.to_frame()[columns])
+
+    frame = store.to_frame()
+    gray = store.gray_tab >= 0
+    assert frame['Табельный номер'][~gray].str.len().eq(store.vocabulary.total_length).all()
+    assert set(frame.loc[gray, 'ФИО']) <= set(store.vocabulary.gray_fio_options)
+
+
+def test_pickle_drops_vocabulary(store):
+    """Между процессами передаются только колонки, без справочников."""
+    restored = pickle.loads(pickle.dumps(store))
+
+    assert restored.vocabulary is None
+    assert store.vocabulary is not None
+    for name, values in store.columns.items():
+        assert np.array_equal(restored.columns[name], values)
+
+
+def test_empty_concat_keeps_types():
+    """Объединение пустого списка - пустое хранилище с типами FIELDS."""
+    empty = UserStore.concat([])
+    assert len(empty) == 0 and empty.nbytes == 0
+    assert all(values.dtype == UserStore.FIELDS[name] for name, values in empty.columns.items())
+
+
+def test_invalid_columns_raise(store):
+    """Неполный набор колонок или колонки разной длины - ошибка."""
+    columns = store.columns
+    with pytest.raises(ValueError):
+        UserStore(**{name: values for name, values in columns.items() if name != 'gray_fio'})
+    with pytest.raises(ValueError):
+        UserStore(**{**columns, 'gender': columns['gender'][:-1]})
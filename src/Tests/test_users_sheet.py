@@ -0,0 +1,158 @@
+"""
+Тесты листа пользователей (src/main.py, UserGenerator.save_to_excel).
+"""
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+from openpyxl.utils import column_index_from_string
+
+from src.main import ORG_ATTRIBUTE_COLUMNS, USER_COLUMNS, UserGenerator, WorkbookSession
+
+# Ключ порядка строк листа: блок, ТБ, "Серая зона" после обычных, ГОСБ, ФИО
+SORT_KEYS = ['Бизнес-блок', 'Полное ТБ', 'Специальный', 'Полное ГОСБ', 'ФИО']
+
+
+def make_generator(users_config, org_data, tmp_path, mode='single', **overrides):
+    """Генератор пользователей в заданном режиме с измененными параметрами конфигурации."""
+    users_config.update(generation_mode=mode, **overrides)
+    return UserGenerator(users_config, org_data, 'test', output_dir=str(tmp_path))
+
+
+def read_sheet_cells(worksheet) -> pd.DataFrame:
+    """Лист в DataFrame (значения как записаны в ячейках, формулы - текстом '=...')."""
+    rows = list(worksheet.iter_rows(values_only=True))
+    return pd.DataFrame(rows[1:], columns=rows[0])
+
+
+def read_sheet(path, sheet_name='USERS') -> pd.DataFrame:
+    """Лист книги в DataFrame."""
+    return read_sheet_cells(load_workbook(path, read_only=True)[sheet_name])
+
+
+def with_special(frame, users_config) -> pd.DataFrame:
+    """Пользователи с признаком "Серой зоны" по табельному номеру или ФИО."""
+    gray_zone = users_config['gray_zone']
+    return frame.assign(Специальный=frame['Табельный номер'].isin(gray_zone['tab_numbers']) | frame['ФИО'].isin(gray_zone['fio_options']))
+
+
+def assert_sheet_order(sheet, users_config):
+    """Строки листа не убывают по составному ключу; "Серая зона" - в конце каждой пары (блок, ТБ)."""
+    keys = with_special(sheet, users_config)[SORT_KEYS]
+    rows = list(keys.itertuples(index=False, name=None))
+    assert all(previous <= current for previous, current in zip(rows, rows[1:]))
+    for _, group in keys.groupby(['Бизнес-блок', 'Полное ТБ'], sort=False):
+        special = group['Специальный'].to_numpy()
+        assert special.tolist() == sorted(special.tolist())
+
+
+@pytest.mark.parametrize('mode', ['single', 'batch'])
+def test_sheet_rows_are_sorted_users(users_config, org_data, tmp_path, mode):
+    """Лист - те же пользователи, упорядоченные по (блок, ТБ, "Серая зона", ГОСБ, ФИО)."""
+    generator = make_generator(users_config, org_data, tmp_path, mode)
+    users = generator._distribute_users_to_org_units()
+    sheet = read_sheet(generator.save_to_excel(users))
+    expected = users.to_frame() if mode == 'batch' else pd.DataFrame(users)[USER_COLUMNS]
+
+    assert list(sheet.columns) == USER_COLUMNS
+    pd.testing.assert_frame_equal(
+        sheet.sort_values(USER_COLUMNS, ignore_index=True),
+        expected.sort_values(USER_COLUMNS, ignore_index=True)
+    )
+    assert_sheet_order(sheet, users_config)
+
+
+def test_gray_only_groups_are_kept(users_config, org_data, tmp_path):
+    """Пары (блок, ТБ) только с "Серой зоной" остаются на листе (после обычных пользователей блока)."""
+    generator = make_generator(users_config, org_data, tmp_path)
+    users = generator._distribute_users_to_org_units()
+    gray_only = [
+        user for user in users
+        if user['Пол'] < 0 or user['Код ТБ'] != '3' or user['Бизнес-блок'] != users[0]['Бизнес-блок']
+    ]
+    expected_gray = sum(1 for user in gray_only if user['Пол'] < 0 and user['Код ТБ'] == '3' and user['Бизнес-блок'] == users[0]['Бизнес-блок'])
+    assert expected_gray > 0
+
+    sheet = with_special(read_sheet(generator.save_to_excel(gray_only)), users_config)
+    group = sheet[(sheet['Бизнес-блок'] == users[0]['Бизнес-блок']) & (sheet['Код ТБ'] == '3')]
+
+    assert len(sheet) == len(gray_only)
+    assert len(group) == expected_gray and group['Специальный'].all()
+    assert_sheet_order(sheet, users_config)
+
+
+def test_store_sort_order_matches_pandas_sort(users_config, org_data, tmp_path):
+    """Порядок по кодам хранилища совпадает с устойчивой сортировкой собранных строк pandas."""
+    generator = make_generator(users_config, org_data, tmp_path, 'batch')
+    users = generator._distribute_users_to_org_units()
+    frame = with_special(users.to_frame(), users_config)
+
+    order = generator._store_sort_order(users, frame['ФИО'])
+    expected = frame.sort_values(SORT_KEYS, kind='stable').index.to_numpy()
+    assert order.tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize('mode', ['single', 'batch'])
+def test_normalized_schema_keeps_selected_attributes(users_config, org_data, tmp_path, mode):
+    """Схема 'normalized': колонки пользователя, код подразделения и keep_columns; строки - как у полной схемы."""
+    keep_columns = ['Короткое ТБ']
+    generator = make_generator(users_config.copy(), org_data, tmp_path, mode)
+    full = read_sheet(generator.save_to_excel(generator._distribute_users_to_org_units()))
+    generator = make_generator(users_config.copy(), org_data, tmp_path, mode, schema={'mode': 'normalized', 'keep_columns': keep_columns})
+    users = generator._distribute_users_to_org_units()
+
+    if mode == 'batch':
+        built = []
+        original = type(generator.org_index).attributes_frame
+
+        def recording(index, rows, columns=None):
+            built.append(columns)
+            return original(index, rows, columns)
+
+        with pytest.MonkeyPatch.context() as patched:
+            patched.setattr(type(generator.org_index), 'attributes_frame', recording)
+            sheet = read_sheet(generator.save_to_excel(users))
+        assert built and all(columns == keep_columns for columns in built)  # Атрибуты вне схемы не собираются
+    else:
+        sheet = read_sheet(generator.save_to_excel(users))
+
+    assert list(sheet.columns) == USER_COLUMNS[:4] + keep_columns
+    pd.testing.assert_frame_equal(sheet, full[USER_COLUMNS[:4] + keep_columns])
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'xml'])
+def test_formulas_schema_looks_up_org_sheet(users_config, org_data, tmp_path, engine):
+    """Схема 'formulas': атрибуты - формулы поиска по листу ORG, которые дают значения полной схемы."""
+    generator = make_generator(users_config.copy(), org_data, tmp_path, 'batch')
+    full = read_sheet(generator.save_to_excel(generator._distribute_users_to_org_units()))
+    generator = make_generator(users_config.copy(), org_data, tmp_path, 'batch', schema={'mode': 'formulas', 'keep_columns': ['Код ТБ'], 'org_sheet': 'ORG'})
+
+    session = WorkbookSession('formulas', str(tmp_path), engine=engine, workers=1)
+    session.add_sheet(org_data, 'ORG')
+    generator.save_to_excel(generator._distribute_users_to_org_units(), session)
+    workbook = load_workbook(session.save())
+
+    org_sheet = read_sheet_cells(workbook['ORG']).set_index('Код подразделения', drop=False)
+    sheet = read_sheet_cells(workbook['USERS'])
+    assert list(sheet.columns) == USER_COLUMNS
+    assert not sheet['Код ТБ'].str.startswith('=').any()
+
+    # Формула строки n: INDEX(колонка ORG, MATCH($Dn, код подразделения ORG, 0))
+    row_numbers = pd.Series(range(2, len(sheet) + 2)).astype(str)
+    for column_name in ORG_ATTRIBUTE_COLUMNS:
+        if column_name == 'Код ТБ':
+            continue
+        parts = sheet[column_name].str.extract(r"^=INDEX\('ORG'!\$([A-Z]+):\$\1,MATCH\(\$D(\d+),'ORG'!\$A:\$A,0\)\)$")
+        (letter,) = parts[0].unique()
+        assert parts[1].equals(row_numbers)
+        lookup_column = org_sheet.columns[column_index_from_string(letter) - 1]
+        sheet[column_name] = org_sheet.loc[sheet['Код подразделения'], lookup_column].to_numpy()
+    pd.testing.assert_frame_equal(sheet, full)
+
+
+def test_formulas_schema_requires_org_sheet(users_config, org_data, tmp_path):
+    """Без листа ORG в книге схема 'formulas' - ошибка."""
+    generator = make_generator(users_config, org_data, tmp_path, 'batch', schema={'mode': 'formulas', 'keep_columns': []})
+    session = WorkbookSession('formulas', str(tmp_path))
+    with pytest.raises(ValueError):
+        generator.save_to_excel(generator._distribute_users_to_org_units(), session)
@@ -0,0 +1,187 @@
+"""
+Тесты сессии выходной книги (src/main.py, WorkbookSession).
+"""
+
+import logging
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from src.main import WorkbookSession, _budget_pieces
+
+
+def frames(sizes):
+    """Последовательность DataFrame-частей с заданными количествами строк и сквозной нумерацией."""
+    start = 0
+    for size in sizes:
+        yield pd.DataFrame({'Номер': range(start, start + size), 'Код': [f"{value:05d}" for value in range(start, start + size)]})
+        start += size
+
+
+def sheet_values(path, sheet_name):
+    """Значения листа книги (первая строка - заголовки)."""
+    return [list(row) for row in load_workbook(path, read_only=True)[sheet_name].iter_rows(values_only=True)]
+
+
+@pytest.mark.parametrize('sizes, max_rows', [([10], 3), ([2, 2, 2, 2], 3), ([0, 7, 0, 5], 4), ([6], 6)])
+def test_budget_pieces_respect_row_budget(sizes, max_rows):
+    """Части листа не превышают max_rows, все строки сохраняются по порядку."""
+    pieces = list(_budget_pieces(frames(sizes), max_rows))
+    rows_by_part = {}
+    for part_index, frame in pieces:
+        rows_by_part.setdefault(part_index, []).extend(frame['Номер'].tolist())
+
+    assert list(rows_by_part) == list(range(len(rows_by_part)))
+    assert all(len(rows) <= max_rows for rows in rows_by_part.values())
+    assert all(len(rows) == max_rows for rows in list(rows_by_part.values())[:-1])
+    assert sum(rows_by_part.values(), []) == list(range(sum(sizes)))
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'xml'])
+@pytest.mark.parametrize('numbered', [True, False])
+def test_add_sheet_parts_splits_stream(tmp_path, engine, numbered):
+    """Потоковый источник делится на листы не более max_rows строк с правильными именами."""
+    session = WorkbookSession('test', str(tmp_path), engine=engine, workers=1)
+    parts = session.add_sheet_parts(frames([4, 4, 3]), 'DATA', 5, numbered=numbered, text_columns=['Код'])
+    path = session.save()
+
+    names = ['DATA_1', 'DATA_2', 'DATA_3'] if numbered else ['DATA', 'DATA_2', 'DATA_3']
+    assert [part['sheet'] for part in parts] == names
+    assert [part['rows'] for part in parts] == [5, 5, 1]
+    values = [sheet_values(path, name) for name in names]
+    assert all(rows[0] == ['Номер', 'Код'] for rows in values)
+    assert [row[0] for rows in values for row in rows[1:]] == list(range(11))
+    assert values[0][1][1] == '00000'  # Текстовая колонка сохраняет лидирующие нули
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'xml'])
+def test_add_sheet_parts_empty_input_writes_headers(tmp_path, engine):
+    """Пустой источник дает один лист только с заголовками (колонки пустой части или columns)."""
+    session = WorkbookSession('test', str(tmp_path), engine=engine, workers=1)
+    empty_frame = session.add_sheet_parts(iter([pd.DataFrame({'A': [], 'B': []})]), 'EMPTY', 10)
+    no_frames = session.add_sheet_parts(iter([]), 'NONE', 10, columns=['X', 'Y'])
+    path = session.save()
+
+    assert empty_frame == [{'sheet': 'EMPTY', 'file': Path(path).name, 'rows': 0}]
+    assert no_frames[0]['sheet'] == 'NONE' and no_frames[0]['rows'] == 0
+    assert sheet_values(path, 'EMPTY') == [['A', 'B']]
+    assert sheet_values(path, 'NONE') == [['X', 'Y']]
+
+
+def test_add_sheet_parts_empty_input_without_columns_raises(tmp_path):
+    """Источник без частей и без columns - ошибка."""
+    session = WorkbookSession('test', str(tmp_path))
+    with pytest.raises(ValueError):
+        session.add_sheet_parts(iter([]), 'NONE', 10)
+
+
+def test_add_sheet_parts_rejects_non_positive_budget(tmp_path):
+    """Количество строк части должно быть положительным."""
+    session = WorkbookSession('test', str(tmp_path))
+    with pytest.raises(ValueError):
+        session.add_sheet_parts(frames([1]), 'DATA', 0)
+
+
+def test_add_sheet_parts_csv_writes_one_file_per_part(tmp_path):
+    """Для формата csv каждая часть записывается отдельным файлом."""
+    session = WorkbookSession('test', str(tmp_path))
+    parts = session.add_sheet_parts(frames([7]), 'DATA', 3, output_format='csv')
+
+    assert [part['rows'] for part in parts] == [3, 3, 1]
+    assert [len(pd.read_csv(tmp_path / part['file'], sep=None, engine='python')) for part in parts] == [3, 3, 1]
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'xml'])
+def test_save_logs_created_file(tmp_path, caplog, engine):
+    """Оба движка записи сообщают о созданном файле одинаково."""
+    logger = logging.getLogger('test_workbook')
+    session = WorkbookSession('test', str(tmp_path), logger, engine=engine, workers=1)
+    session.add_sheet(pd.DataFrame({'A': [1]}), 'DATA')
+    with caplog.at_level(logging.INFO, logger='test_workbook'):
+        path = session.save()
+
+    assert f"Файл успешно создан: {path}" in caplog.messages
+
+
+def test_session_saves_once(tmp_path):
+    """Повторный save() не перезаписывает книгу и возвращает тот же путь."""
+    session = WorkbookSession('test', str(tmp_path))
+    session.add_sheet(pd.DataFrame({'A': [1]}), 'FIRST')
+    session.add_sheet(pd.DataFrame({'B': [2]}), 'SECOND')
+    path = session.save()
+    modified = Path(path).stat().st_mtime_ns
+
+    assert session.save() == path
+    assert Path(path).stat().st_mtime_ns == modified
+    assert load_workbook(path, read_only=True).sheetnames == ['FIRST', 'SECOND']
+
+
+def test_column_widths_follow_content():
+    """Ширина колонки - длина самого длинного значения или заголовка + 2, от 10 до max_column_width (пропуски не учитываются)."""
+    frame = pd.DataFrame({
+        'Код': ['1', '22'],
+        'Наименование': ['x' * 30, None],
+        'Длинное значение': ['y' * 200, 'z'],
+        'Очень длинный заголовок колонки': [1, 2]
+    })
+    assert WorkbookSession._column_widths(frame, 100) == [10, 32, 100, 33]
+
+
+@pytest.mark.parametrize('engine', ['openpyxl', 'xml'])
+def test_sheet_formatting(tmp_path, engine):
+    """Лист из потока частей: ширины по первой части, текстовый формат колонки, закрепленная строка, автофильтр, жирный заголовок."""
+    first = pd.DataFrame({'Код': ['00001', '00002'], 'ФИО': ['x' * 20, 'y' * 70]})
+    second = pd.DataFrame({'Код': ['00003'], 'ФИО': ['z' * 200]})
+    session = WorkbookSession('test', str(tmp_path), engine=engine, workers=1)
+    session.add_sheet(iter([first, second]), 'DATA', max_column_width=50, text_columns=['Код'])
+    path = session.save()
+
+    sheet = load_workbook(path)['DATA']
+    assert list(sheet.iter_rows(values_only=True)) == [('Код', 'ФИО')] + list(pd.concat([first, second]).itertuples(index=False, name=None))
+    assert [sheet.column_dimensions[letter].width for letter in 'AB'] == WorkbookSession._column_widths(first, 50) == [10, 50]
+    assert sheet.column_dimensions['A'].number_format == '@'
+    assert sheet.column_dimensions['B'].number_format == 'General'
+    assert sheet.freeze_panes == 'A2'
+    assert sheet.auto_filter.ref == 'A1:B4'
+    assert sheet['A1'].font.bold and not sheet['A2'].font.bold
+
+
+def mixed_frame(start, size):
+    """Часть листа со значениями разных типов: числа, пропуски, логические, спецсимволы XML, текст с нулями."""
+    return pd.DataFrame({
+        'Код': [f"{value:06d}" for value in range(start, start + size)],
+        'Целое': list(range(start, start + size)),
+        'Дробное': [value / 7 if value % 5 else float('nan') for value in range(start, start + size)],
+        'Флаг': [value % 2 == 0 for value in range(start, start + size)],
+        'Текст': [f'<a href="{value}">&{value}</a> ' if value % 3 else None for value in range(start, start + size)]
+    })
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_xml_engine_matches_openpyxl(tmp_path, workers):
+    """Книга движка 'xml' (в том числе из пула процессов) - корректный пакет с теми же листами и значениями, что у openpyxl."""
+    paths = {}
+    for engine in ('openpyxl', 'xml'):
+        session = WorkbookSession(engine, str(tmp_path), engine=engine, workers=workers if engine == 'xml' else None)
+        session.add_sheet((mixed_frame(start, 40) for start in range(0, 200, 40)), 'MIXED', text_columns=['Код'])
+        session.add_sheet(pd.DataFrame({'Колонка': ['значение']}), 'ВТОРОЙ & <лист>'[:31])
+        paths[engine] = session.save()
+
+    with zipfile.ZipFile(paths['xml']) as package:
+        assert package.testzip() is None
+        assert '[Content_Types].xml' in package.namelist()
+
+    # openpyxl записывает дробные числа с меньшим количеством знаков, чем repr
+    def rows(workbook, sheet_name):
+        return [
+            tuple(round(value, 12) if isinstance(value, float) else value for value in row)
+            for row in workbook[sheet_name].iter_rows(values_only=True)
+        ]
+
+    expected, actual = load_workbook(paths['openpyxl']), load_workbook(paths['xml'])
+    assert actual.sheetnames == expected.sheetnames
+    for sheet_name in expected.sheetnames:
+        assert rows(actual, sheet_name) == rows(expected, sheet_name)
@@ -22,6 +22,16 @@ LOG_LEVEL = "DEBUG"  # Уровень логирования: INFO или DEBUG
 OUTPUT_DIR = "OUT"  # Директория для выходных Excel файлов
 OUTPUT_FILE_BASE = "result_base"  # Базовое имя выходного Excel файла
 
+# Кэш результатов: при заданном seed генератора пользователей повторный запуск с тем же
+# входным файлом, LOADER_CONFIG, движком записи и тем же кодом main.py возвращает ранее
+# созданные файлы без генерации (None - отключен)
+RESULT_CACHE_DIR = "cache"
+
+# Движок записи листов xlsx: 'openpyxl' - потоковая запись openpyxl в одном процессе,
+# 'xml' - XML листов формируется в пуле процессов и собирается в пакет xlsx при сохранении
+EXCEL_ENGINE = "openpyxl"
+EXCEL_WORKERS = None  # Количество процессов движка 'xml' (None - по числу CPU, 1 - без пула)
+
 # ============================================================================
 # КОНФИГУРАЦИЯ ЗАГРУЗЧИКОВ ДАННЫХ
 # ============================================================================
@@ -36,6 +46,15 @@ LOADER_CONFIG = {
         # Настройки выходного листа
         'sheet_name': 'ORG',  # Имя листа в Excel
         'max_column_width': 100,  # Максимальная ширина колонки
+        'format': 'xlsx',  # Формат вывода листа: 'xlsx', 'csv', 'parquet' или 'feather'
+        
+        # Потоковое чтение CSV: количество строк в одной порции (None - чтение файла целиком).
+        # Читаются только колонки из column_mapping и колонки фильтров, фильтры применяются к каждой порции
+        'chunk_size': 200000,
+        
+        # Каталог кэша подготовленных данных ORG (None - кэш отключен).
+        # Ключ кэша: хэш содержимого входного файла + фильтры + маппинг колонок
+        'cache_dir': 'cache',
         
         # Фильтры для исключения строк
         'filters': {
@@ -59,6 +78,55 @@ LOADER_CONFIG = {
         # Настройки выходного листа
         'sheet_name': 'USERS',  # Имя листа в Excel
         'max_column_width': 100,  # Максимальная ширина колонки
+        'format': 'xlsx',  # Формат вывода листа: 'xlsx', 'csv', 'parquet' или 'feather' (для больших объемов)
+        
+        # Режим генерации пользователей:
+        # 'batch' - векторная генерация целого блока за один проход (NumPy)
+        # 'single' - последовательное создание пользователей по одному
+        'generation_mode': 'batch',
+        
+        # Начальное значение генератора случайных чисел (None - новые данные при каждом запуске).
+        # При заданном значении результат воспроизводится байт в байт
+        'seed': None,
+        
+        # Потоковая генерация и запись порциями по указанному количеству пользователей
+        # (None - все пользователи создаются в памяти, затем сортируются и записываются).
+        # В потоковом режиме строки записываются в порядке генерации (без сортировки)
+        'stream_batch_size': None,
+        
+        # Запись статистики пользователей в JSON файл {base}_{timestamp}_{лист}_statistics.json
+        # (статистика в DEBUG лог выводится только при уровне DEBUG)
+        'statistics_report': False,
+        
+        # Параллельная генерация (только режим 'batch'): подразделения делятся на шарды
+        # по значению колонки shard_by, шарды обрабатываются пулом процессов.
+        # Распределение по подразделениям (общие количества, fixed_distribution, минимумы)
+        # выполняется заранее для всех подразделений, поэтому шарды его не нарушают
+        'parallel': {
+            'enabled': False,  # Включить параллельную генерацию
+            'workers': None,  # Количество процессов (None - по числу ядер)
+            'shard_by': 'Код ТБ'  # Колонка ORG для разбиения подразделений на шарды
+        },
+        
+        # Разбиение листа пользователей на части (с JSON манифестом {base}_{timestamp}_{лист}_manifest.json):
+        # None - один лист; если строк больше предела Excel, продолжение в листах USERS_2, USERS_3, ...
+        # 'rows' - листы USERS_1..N не более max_rows строк
+        # имя колонки (например, 'Код ТБ') - отдельные файлы {base}_{timestamp}_USERS_{значение},
+        # записываемые пулом процессов (не поддерживается в потоковом режиме)
+        'split': {
+            'by': None,
+            'max_rows': 1000000,  # Максимальное количество строк в листе (для xlsx не более 1048575)
+            'workers': None  # Количество процессов записи файлов (None - по числу ядер)
+        },
+        
+        # Схема листа пользователей: 'denormalized' - атрибуты подразделения в каждой строке,
+        # 'normalized' - только 'Код подразделения' (и атрибуты из keep_columns),
+        # 'formulas' - атрибуты формулами INDEX/MATCH по листу org_sheet той же книги (только xlsx)
+        'schema': {
+            'mode': 'denormalized',
+            'keep_columns': [],  # Атрибуты подразделений, записываемые значениями
+            'org_sheet': 'ORG'  # Лист ORG для формул
+        },
         
         # Параметры генерации пользователей по блокам
         'business_blocks': {
@@ -88,6 +156,10 @@ LOADER_CONFIG = {
             'fio_options': ["Серая зона", "-"]  # Варианты ФИО
         },
         
+        # Минимальное количество пользователей каждого блока в подразделении
+        # (кроме подразделений из fixed_distribution)
+        'min_per_unit': {'KMKKSB': 1, 'MNS': 1},
+        
         # Фиксированное распределение пользователей по подразделениям
         # Формат: {'код_подразделения': {'KMKKSB': количество, 'MNS': количество}}
         # Пример: {'12345': {'KMKKSB': 5, 'MNS': 1}, '67890': {'KMKKSB': 50}}
@@ -203,16 +275,181 @@ LOADER_CONFIG = {
                 'Владиславовна', 'Игоревна', 'Владимировна', 'Павловна', 'Руслановна'
             ]
         }
-    }
+    },
+    
+    'USER_CNG': {
+        # Настройки выходного листа
+        'sheet_name': 'USER_CNG',  # Имя листа в Excel
+        'max_column_width': 100,  # Максимальная ширина колонки
+        'format': 'xlsx',  # Формат вывода листа: 'xlsx', 'csv', 'parquet' или 'feather'
+        
+        # Количество месяцев движения
+        'months': 12,
+        
+        # Начальное значение генератора случайных чисел
+        # (None - производное от seed листа USERS, если он задан)
+        'seed': None,
+        
+        # Доли категорий движения пользователей (сумма 1.0):
+        # stay - не меняют подразделение, gosb - меняют ГОСБ внутри ТБ, tb - меняют ГОСБ и ТБ,
+        # dismissed - увольняются в случайный месяц, hired - принимаются в случайный месяц (в 1 месяце без подразделения)
+        'categories': {
+            'stay': 0.6,
+            'gosb': 0.2,
+            'tb': 0.1,
+            'dismissed': 0.05,
+            'hired': 0.05
+        },
+        
+        # Вероятность перехода пользователя категорий gosb и tb в каждом месяце
+        'move_probability': 0.2
+    },
+    
+    'CLIENTS': {
+        # Настройки выходного листа
+        'sheet_name': 'CLIENTS',  # Имя листа в Excel
+        'max_column_width': 100,  # Максимальная ширина колонки
+        'format': 'xlsx',  # Формат вывода листа: 'xlsx', 'csv', 'parquet' или 'feather' (для больших объемов)
+        
+        # Количество клиентов и доля ИП (остальные - организации)
+        'count': 20000,
+        'ip_share': 0.2,
+        
+        # Начальное значение генератора случайных чисел
+        # (None - производное от seed листа USERS, если он задан)
+        'seed': None,
+        
+        # Количество клиентов в порции сборки строк при записи листа
+        'batch_size': 200000,
+        
+        # Наименования организаций: ОПФ "[приставка] Название [суффикс]".
+        # Приставка и суффикс необязательны; наименования ИП "ИП Фамилия И.О." собираются
+        # из мужских фамилий, имен и отчеств LOADER_CONFIG['USERS']['male_data']
+        'legal_forms': ['ООО', 'ЗАО', 'АО', 'ПАО'],
+        'prefixes': [
+            'Центральный', 'Пригородный', 'Городской', 'Областной', 'Региональный', 'Северный',
+            'Южный', 'Западный', 'Восточный', 'Новый', 'Первый', 'Объединенный',
+            'Сибирский', 'Уральский', 'Волжский', 'Дальневосточный', 'Байкальский', 'Приморский',
+            'Донской', 'Балтийский'
+        ],
+        'names': [
+            'Торговый дом', 'Стройкомплекс', 'Промышленный комплекс', 'Агрохолдинг', 'Транспортная компания',
+            'Логистический центр', 'Энергосервис', 'Металлоторг', 'Техснаб', 'Продторг',
+            'Мебельная фабрика', 'Хлебозавод', 'Молочный комбинат', 'Автоцентр', 'Фармацевтическая компания',
+            'Строительный трест', 'Инженерный центр', 'Проектный институт', 'Машиностроительный завод', 'Деревообработка',
+            'Текстильная фабрика', 'Нефтесервис', 'Газстрой', 'Электромонтаж', 'Сантехмонтаж',
+            'Кабельный завод', 'Лакокрасочный завод', 'Полимерпласт', 'Стекольный завод', 'Кондитерская фабрика',
+            'Рыбокомбинат', 'Птицефабрика', 'Мясокомбинат', 'Ресурс', 'Информационные технологии',
+            'Связьинвест', 'Медицинский центр', 'Туристическое агентство', 'Управляющая компания', 'Сервисная компания'
+        ],
+        'suffixes': [
+            'филиал в г. Москва', 'филиал в г. Санкт-Петербург', 'филиал в г. Новосибирск', 'филиал в г. Екатеринбург',
+            'филиал в г. Казань', 'филиал в г. Нижний Новгород', 'филиал в г. Челябинск', 'филиал в г. Самара',
+            'филиал в г. Омск', 'филиал в г. Ростов-на-Дону', 'филиал в г. Уфа', 'филиал в г. Красноярск',
+            'филиал в г. Воронеж', 'филиал в г. Пермь', 'филиал в г. Волгоград', 'филиал в г. Краснодар',
+            'филиал в г. Саратов', 'филиал в г. Тюмень', 'филиал в г. Иркутск', 'филиал в г. Хабаровск'
+        ]
+    },
+    
+    'CLIENT_CNG': {
+        # Генерация листа (по умолчанию выключена: лист из 62 колонок дольше всех записывается в xlsx)
+        'enabled': False,
+        
+        # Настройки выходного листа
+        'sheet_name': 'CLIENT_CNG',  # Имя листа в Excel
+        'max_column_width': 100,  # Максимальная ширина колонки
+        'format': 'xlsx',  # Формат вывода листа: 'xlsx', 'csv', 'parquet' или 'feather' (для больших объемов)
+        
+        # Начальное значение генератора случайных чисел
+        # (None - производное от seed листа USERS, если он задан)
+        'seed': None,
+        
+        # Количество строк в порции сборки листа при записи
+        'batch_size': 100000,
+        
+        # Блок менеджеров клиентов (код из LOADER_CONFIG['USERS']['business_blocks'])
+        'manager_block': 'KMKKSB',
+        
+        # Доля клиентов с менеджером в первом месяце
+        'initial_share': 0.85,
+        
+        # Доли категорий движения клиентов (сумма 1.0):
+        # stay - не меняют менеджера с момента появления, gosb - меняют менеджера внутри ГОСБ,
+        # tb - внутри ТБ, any - у любого менеджера, remove - менеджер снимается в случайный месяц
+        'categories': {
+            'stay': 0.55,
+            'gosb': 0.10,
+            'tb': 0.15,
+            'any': 0.10,
+            'remove': 0.10
+        },
+        
+        # Вероятности в каждом месяце: появление менеджера у клиента без менеджера, смена менеджера
+        'appear_probability': 0.1,
+        'change_probability': 0.1,
+        
+        # Доля клиентов, пропадающих в случайный месяц (без менеджера до конца периода)
+        'disappear_share': 0.05,
+        
+        # Доля клиентов с несколькими строками (один ИНН у менеджеров других ТБ) и максимум дополнительных строк
+        'multi_row_share': 0.05,
+        'max_extra_rows': 10
+    },
     
-    # Здесь в будущем можно добавить конфигурации для других листов:
-    # 'METRICS': {
-    #     'input_file': "IN/metrics.csv",
-    #     'sheet_name': 'METRICS',
-    #     'max_column_width': 100,
-    #     'filters': {...},
-    #     'column_mapping': {...}
-    # }
+    'METRICS': {
+        # Настройки выходного листа
+        'sheet_name': 'METRICS',  # Имя листа в Excel
+        'max_column_width': 100,  # Максимальная ширина колонки
+        'format': 'xlsx',  # Формат вывода листа: 'xlsx', 'csv', 'parquet' или 'feather' (для больших объемов)
+        
+        # Начальное значение генератора случайных чисел
+        # (None - производное от seed листа USERS, если он задан)
+        'seed': None,
+        
+        # Количество месяцев (кратно 3: кварталы по 3 месяца); при сгенерированном листе USER_CNG
+        # берется из него, а месяцы без подразделения пользователя остаются пустыми
+        'months': 12,
+        
+        # Количество пользователей в порции сборки листа при записи
+        'batch_size': 100000,
+        
+        # Показатели: агрегирование в квартал и год ('sum' или 'mean'), корреляция соседних месяцев
+        # (AR(1), от -1 до 1), количество знаков после запятой, границы значений (min / max, необязательны)
+        # и распределение месячного значения по бизнес-блокам:
+        # 'normal' (mean, std) или 'lognormal' (mean > 0, std - среднее и отклонение самого значения)
+        'indicators': {
+            'Выручка': {
+                'aggregation': 'sum',
+                'correlation': 0.7,
+                'decimals': 2,
+                'blocks': {
+                    'KMKKSB': {'distribution': 'lognormal', 'mean': 1500000.0, 'std': 600000.0},
+                    'MNS': {'distribution': 'lognormal', 'mean': 300000.0, 'std': 150000.0}
+                }
+            },
+            'Количество сделок': {
+                'aggregation': 'sum',
+                'correlation': 0.5,
+                'decimals': 0,
+                'min': 0,
+                'blocks': {
+                    'KMKKSB': {'distribution': 'normal', 'mean': 20.0, 'std': 6.0},
+                    'MNS': {'distribution': 'normal', 'mean': 8.0, 'std': 3.0}
+                }
+            },
+            'Удовлетворенность клиентов': {
+                'aggregation': 'mean',
+                'correlation': 0.8,
+                'decimals': 1,
+                'min': 0,
+                'max': 100,
+                'blocks': {
+                    'KMKKSB': {'distribution': 'normal', 'mean': 75.0, 'std': 10.0},
+                    'MNS': {'distribution': 'normal', 'mean': 80.0, 'std': 8.0}
+                }
+            }
+        }
+    }
 }
 
 
@@ -223,7 +460,7 @@ LOADER_CONFIG = {
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Union, Iterable
 
 
 class ProjectLogger:
@@ -339,955 +576,5565 @@ def get_logger(log_dir: Optional[str] = None, log_level: Optional[str] = None) -
 
 
 # ============================================================================
-# МОДУЛЬ ЗАГРУЗКИ ОРГАНИЗАЦИОННЫХ ЕДИНИЦ
+# МОДУЛЬ ЗАПИСИ ВЫХОДНЫХ ФАЙЛОВ
 # ============================================================================
 
+import itertools
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape, quoteattr
 import pandas as pd
-import random
+from openpyxl import Workbook
+from openpyxl.packaging.core import DocumentProperties
+from openpyxl.xml.constants import ARC_CORE
+from openpyxl.xml.functions import tostring
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font
 from openpyxl.utils import get_column_letter
 
 
-class OrgUnitsLoader:
+# Необязательная зависимость для форматов Parquet и Feather
+try:
+    import pyarrow as pa
+    import pyarrow.feather as pa_feather
+    import pyarrow.parquet as pa_parquet
+except ImportError:  # pyarrow отсутствует в окружении
+    pa = None
+
+# Поддерживаемые форматы вывода листов и расширения файлов
+OUTPUT_FORMATS = {
+    'xlsx': '.xlsx',
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather'
+}
+
+
+def _text_typed(df: pd.DataFrame, text_columns: List[str]) -> pd.DataFrame:
     """
-    Класс для загрузки и обработки организационных единиц.
+    Приведение текстовых колонок к строковому типу (пустые значения сохраняются).
     
-    Загружает данные из CSV, применяет фильтры и сохраняет в Excel.
-    Использует библиотеки из стандартной установки Anaconda (pandas, openpyxl).
+    Args:
+        df: DataFrame с данными
+        text_columns: Колонки, которые должны сохраняться как текст
+        
+    Returns:
+        DataFrame с текстовыми колонками в виде строк
+    """
+    if not text_columns:
+        return df
+    return df.assign(**{
+        column_name: df[column_name].where(df[column_name].isna(), df[column_name].astype(str)).astype(object)
+        for column_name in text_columns
+    })
+
+
+class FileSink:
     """
+    Базовый класс приемника данных, записывающего лист в отдельный файл.
     
-    def __init__(
-        self,
-        config: Dict,
-        output_file_base: str,
-        output_dir: str = "OUT",
-        logger: Optional[logging.Logger] = None
-    ) -> None:
+    Лист передается последовательностью DataFrame-частей с одинаковыми колонками.
+    """
+    
+    # Имя формата (ключ OUTPUT_FORMATS)
+    format_name = ''
+    
+    def __init__(self, logger: Optional[logging.Logger] = None) -> None:
         """
-        Инициализация загрузчика организационных единиц.
+        Инициализация приемника.
         
         Args:
-            config: Словарь конфигурации из LOADER_CONFIG для данного загрузчика
-            output_file_base: Базовое имя выходного Excel файла (без расширения)
-            output_dir: Директория для выходных файлов
             logger: Логгер для записи событий
         """
-        self.config = config
-        self.input_file = Path(config['input_file'])
-        self.output_file_base = output_file_base
-        self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(exist_ok=True)  # Создаем папку, если её нет
         self.logger = logger or logging.getLogger(__name__)
-        
-        # Маппинг колонок: исходное_имя -> результирующее_имя
-        self.column_mapping = config['column_mapping']
-        
-        # Фильтры для исключения строк
-        filters = config.get('filters', {})
-        self.tb_code_exclude = filters.get('tb_code_exclude', set())
-        self.gosb_code_exclude = filters.get('gosb_code_exclude', set())
-        
-        # Настройки Excel
-        self.sheet_name = config['sheet_name']
-        self.max_column_width = config.get('max_column_width', 100)
     
-    def load_csv(self) -> pd.DataFrame:
+    def write(self, chunks: Iterable[pd.DataFrame], path: Path, text_columns: List[str]) -> int:
         """
-        Загрузка данных из CSV файла.
+        Запись листа в файл.
         
-        Returns:
-            DataFrame с загруженными данными
+        Args:
+            chunks: Последовательность DataFrame-частей
+            path: Путь к выходному файлу
+            text_columns: Колонки, сохраняемые как текст
             
-        Raises:
-            FileNotFoundError: Если файл не найден
-            ValueError: Если файл пустой или неверный формат
+        Returns:
+            Количество записанных строк
         """
-        if not self.input_file.exists():
-            error_msg = f"Файл не найден: {self.input_file}"
-            self.logger.error(error_msg)
-            raise FileNotFoundError(error_msg)
-        
-        self.logger.info(f"Начало загрузки CSV файла: {self.input_file}")
-        self.logger.debug(f"Загрузка данных из файла [class: OrgUnitsLoader | def: load_csv]")
-        
-        try:
-            # Загрузка CSV с разделителем ';'
-            df = pd.read_csv(
-                self.input_file,
+        raise NotImplementedError
+
+
+class CsvSink(FileSink):
+    """
+    Приемник CSV: разделитель ';', кодировка UTF-8 (как у входных файлов).
+    
+    Части дописываются в файл по мере поступления.
+    """
+    
+    format_name = 'csv'
+    
+    def write(self, chunks: Iterable[pd.DataFrame], path: Path, text_columns: List[str]) -> int:
+        """Запись частей в CSV файл (первая часть с заголовком, остальные дописываются)."""
+        rows_written = 0
+        for chunk_idx, chunk in enumerate(chunks):
+            _text_typed(chunk, text_columns).to_csv(
+                path,
                 sep=';',
                 encoding='utf-8',
-                dtype=str  # Загружаем все как строки для корректной фильтрации
+                index=False,
+                mode='w' if chunk_idx == 0 else 'a',
+                header=chunk_idx == 0
             )
+            rows_written += len(chunk)
+        return rows_written
+
+
+class ArrowSink(FileSink):
+    """
+    Базовый класс приемников на основе pyarrow (Parquet, Feather).
+    
+    Текстовые колонки записываются с типом string, поэтому лидирующие нули сохраняются.
+    """
+    
+    def __init__(self, logger: Optional[logging.Logger] = None) -> None:
+        """
+        Инициализация приемника.
+        
+        Args:
+            logger: Логгер для записи событий
             
-            self.logger.info(f"Загружено строк: {len(df)}")
-            self.logger.debug(f"Загружено {len(df)} строк, колонок: {len(df.columns)} [class: OrgUnitsLoader | def: load_csv]")
-            
-            if df.empty:
-                raise ValueError("CSV файл пуст")
-            
-            return df
-            
-        except Exception as e:
-            error_msg = f"Ошибка при загрузке CSV: {str(e)}"
+        Raises:
+            ImportError: Если библиотека pyarrow не установлена
+        """
+        super().__init__(logger)
+        if pa is None:
+            error_msg = f"Для формата '{self.format_name}' требуется библиотека pyarrow"
             self.logger.error(error_msg)
-            raise
+            raise ImportError(error_msg)
     
-    def filter_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _tables(self, chunks: Iterable[pd.DataFrame], text_columns: List[str]) -> Iterable:
         """
-        Фильтрация данных по заданным критериям.
-        
-        Исключает строки где:
-        - TB_CODE в списке исключений (99, 100, 101, 102)
-        - GOSB_CODE в списке исключений (0, 9038, 9040)
+        Преобразование частей в таблицы pyarrow с единой схемой (по первой части).
         
         Args:
-            df: Исходный DataFrame
+            chunks: Последовательность DataFrame-частей
+            text_columns: Колонки, сохраняемые как текст
             
         Returns:
-            Отфильтрованный DataFrame
+            Генератор таблиц pyarrow
         """
-        initial_count = len(df)
-        self.logger.debug(f"Начало фильтрации данных. Исходное количество строк: {initial_count} [class: OrgUnitsLoader | def: filter_data]")
-        
-        # Проверяем наличие необходимых колонок
-        required_columns = ['TB_CODE', 'GOSB_CODE']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            error_msg = f"Отсутствуют необходимые колонки: {missing_columns}"
-            self.logger.error(error_msg)
-            raise ValueError(error_msg)
-        
-        # Фильтрация по TB_CODE
-        df_filtered = df.copy()
-        excluded_tb = 0
-        if 'TB_CODE' in df.columns:
-            count_before = len(df_filtered)
-            df_filtered = df_filtered[~df_filtered['TB_CODE'].isin(self.tb_code_exclude)]
-            excluded_tb = count_before - len(df_filtered)
-            if excluded_tb > 0:
-                self.logger.debug(f"Исключено строк по TB_CODE: {excluded_tb} [class: OrgUnitsLoader | def: filter_data]")
-        
-        # Фильтрация по GOSB_CODE
-        excluded_gosb = 0
-        if 'GOSB_CODE' in df_filtered.columns:
-            count_before = len(df_filtered)
-            df_filtered = df_filtered[~df_filtered['GOSB_CODE'].isin(self.gosb_code_exclude)]
-            excluded_gosb = count_before - len(df_filtered)
-            if excluded_gosb > 0:
-                self.logger.debug(f"Исключено строк по GOSB_CODE: {excluded_gosb} [class: OrgUnitsLoader | def: filter_data]")
+        schema = None
+        for chunk in chunks:
+            table = pa.Table.from_pandas(_text_typed(chunk, text_columns), preserve_index=False)
+            if schema is None:
+                fields = [
+                    pa.field(field.name, pa.string()) if field.name in text_columns else field
+                    for field in table.schema
+                ]
+                schema = pa.schema(fields)
+            yield table.cast(schema)
+
+
+class ParquetSink(ArrowSink):
+    """
+    Приемник Parquet: части записываются отдельными группами строк по мере поступления.
+    """
+    
+    format_name = 'parquet'
+    
+    def write(self, chunks: Iterable[pd.DataFrame], path: Path, text_columns: List[str]) -> int:
+        """Запись частей в Parquet файл (одна группа строк на часть)."""
+        rows_written = 0
+        writer = None
+        try:
+            for table in self._tables(chunks, text_columns):
+                if writer is None:
+                    writer = pa_parquet.ParquetWriter(str(path), table.schema)
+                writer.write_table(table)
+                rows_written += table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows_written
+
+
+class FeatherSink(ArrowSink):
+    """
+    Приемник Feather: формат не поддерживает дозапись, части объединяются перед записью.
+    """
+    
+    format_name = 'feather'
+    
+    def write(self, chunks: Iterable[pd.DataFrame], path: Path, text_columns: List[str]) -> int:
+        """Запись объединенных частей в Feather файл."""
+        table = pa.concat_tables(list(self._tables(chunks, text_columns)))
+        pa_feather.write_feather(table, str(path))
+        return table.num_rows
+
+
+# Приемники для форматов, отличных от xlsx
+FILE_SINKS = {sink.format_name: sink for sink in (CsvSink, ParquetSink, FeatherSink)}
+
+
+# ----------------------------------------------------------------------------
+# Движок 'xml': XML листов формируется в пуле процессов и упаковывается в xlsx
+# ----------------------------------------------------------------------------
+
+# Символы, недопустимые в XML 1.0 (удаляются из значений ячеек)
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Стили ячеек движка 'xml' (индексы в cellXfs файла styles.xml)
+XML_STYLE_DEFAULT = 0
+XML_STYLE_BOLD = 1
+XML_STYLE_TEXT = 2
+
+_XLSX_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_XLSX_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# Фиксированная таблица стилей: 0 - обычный, 1 - жирный (заголовки), 2 - текстовый формат '@'
+_XLSX_STYLES = (
+    _XML_HEADER
+    + f'<styleSheet xmlns="{_XLSX_MAIN_NS}">'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '</fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="49" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_XLSX_ROOT_RELS = (
+    _XML_HEADER
+    + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_XLSX_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" Target="docProps/core.xml"/>'
+    f'<Relationship Id="rId3" Type="{_XLSX_REL_NS}/extended-properties" Target="docProps/app.xml"/>'
+    '</Relationships>'
+)
+
+_XLSX_APP = (
+    _XML_HEADER
+    + '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+    '<Application>Microsoft Excel</Application>'
+    '</Properties>'
+)
+
+
+def _xml_text(value) -> str:
+    """
+    Подготовка строки для записи в XML (экранирование и удаление недопустимых символов).
+    
+    Args:
+        value: Значение
         
-        final_count = len(df_filtered)
-        excluded_total = initial_count - final_count
+    Returns:
+        Экранированная строка
+    """
+    return escape(_ILLEGAL_XML_CHARS.sub('', str(value)))
+
+
+def _inline_string_cell(ref: str, value, style: Optional[int] = None) -> str:
+    """
+    Формирование XML ячейки со строковым значением (inline string).
+    
+    Args:
+        ref: Адрес ячейки (например, A1)
+        value: Значение
+        style: Индекс стиля ячейки (None - стиль по умолчанию)
         
-        self.logger.info(f"Отфильтровано строк: {excluded_total}, осталось: {final_count}")
-        self.logger.debug(f"Фильтрация завершена. Исключено: {excluded_total}, осталось: {final_count} [class: OrgUnitsLoader | def: filter_data]")
+    Returns:
+        Элемент <c> ячейки
+    """
+    style_attr = f' s="{style}"' if style is not None else ''
+    return f'<c r="{ref}"{style_attr} t="inlineStr"><is><t xml:space="preserve">{_xml_text(value)}</t></is></c>'
+
+
+def _render_sheet_rows(
+    rows: List[list],
+    first_row: int,
+    column_letters: List[str],
+    text_flags: List[bool],
+    formula_flags: Optional[List[bool]] = None,
+    shared_base: int = 0
+) -> bytes:
+    """
+    Формирование XML строк листа (элементы <row> для sheetData).
+    
+    Выполняется в процессах пула: строки передаются значениями, результат -
+    готовый фрагмент XML. Строки записываются как inline strings (без общей
+    таблицы строк), поэтому фрагменты независимы друг от друга.
+    
+    Формулы колонки записываются одной общей формулой фрагмента (t="shared"):
+    текст формулы хранится только в первой строке, остальные строки ссылаются
+    на нее по индексу si = shared_base + номер колонки.
+    
+    Args:
+        rows: Значения строк (None - пустая ячейка)
+        first_row: Номер первой строки фрагмента на листе (с 1)
+        column_letters: Буквы колонок
+        text_flags: Признаки текстовых колонок (стиль XML_STYLE_TEXT)
+        formula_flags: Признаки колонок формул (значение '=...' записывается как формула)
+        shared_base: Начальный индекс общих формул фрагмента (уникален в пределах листа)
         
-        return df_filtered
+    Returns:
+        Фрагмент XML в кодировке UTF-8
+    """
+    formula_flags = formula_flags or [False] * len(column_letters)
+    last_row = first_row + len(rows) - 1
+    parts = []
+    for row_number, row in enumerate(rows, first_row):
+        cells = []
+        for col_idx, (letter, is_text, is_formula, value) in enumerate(zip(column_letters, text_flags, formula_flags, row)):
+            if value is None:
+                continue
+            ref = f'{letter}{row_number}'
+            if is_formula and row_number == first_row:
+                cells.append(
+                    f'<c r="{ref}"><f t="shared" ref="{letter}{first_row}:{letter}{last_row}" si="{shared_base + col_idx}">'
+                    f'{_xml_text(value[1:])}</f></c>'
+                )
+            elif is_formula:
+                cells.append(f'<c r="{ref}"><f t="shared" si="{shared_base + col_idx}"/></c>')
+            elif is_text:
+                cells.append(_inline_string_cell(ref, value, XML_STYLE_TEXT))
+            elif isinstance(value, bool):
+                cells.append(f'<c r="{ref}" t="b"><v>{int(value)}</v></c>')
+            elif isinstance(value, (int, float)) and math.isfinite(value):
+                cells.append(f'<c r="{ref}"><v>{value!r}</v></c>')
+            else:
+                cells.append(_inline_string_cell(ref, value))
+        parts.append(f'<row r="{row_number}">{"".join(cells)}</row>')
+    return ''.join(parts).encode('utf-8')
+
+
+class WorkbookSession:
+    """
+    Сессия выходного Excel файла.
     
-    def select_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+    Одна книга на весь конвейер: все этапы добавляют в нее свои листы,
+    а файл записывается на диск один раз при вызове save(). Повторное
+    открытие и пересохранение книги при добавлении каждого листа не требуется.
+    
+    Листы записываются в потоковом режиме (openpyxl write-only): строки
+    передаются в файл по мере добавления и не хранятся как объекты ячеек,
+    поэтому расход памяти не зависит от количества строк.
+    
+    Листы с форматом, отличным от xlsx (csv, parquet, feather), записываются
+    приемниками FILE_SINKS в отдельные файлы {base}_{timestamp}_{лист}.{расширение}.
+    
+    Движок 'xml' формирует XML строк листов частями в пуле процессов
+    (_render_sheet_rows) и собирает пакет xlsx при сохранении. Строки
+    записываются как inline strings, стили фиксированы (_XLSX_STYLES),
+    поэтому части независимы и не требуют общей таблицы строк.
+    """
+    
+    # Количество строк DataFrame, преобразуемых в значения ячеек за один шаг
+    ROWS_PER_CHUNK = 50000
+    
+    # Поддерживаемые движки записи листов xlsx
+    ENGINES = ('openpyxl', 'xml')
+    
+    # Предельное количество строк листа Excel (включая строку заголовков)
+    EXCEL_MAX_ROWS = 1048576
+    
+    # Фиксированная дата свойств документа и элементов архива в режиме reproducible
+    REPRODUCIBLE_TIMESTAMP = datetime(2000, 1, 1)
+    
+    def __init__(
+        self,
+        output_file_base: str,
+        output_dir: str = "OUT",
+        logger: Optional[logging.Logger] = None,
+        reproducible: bool = False,
+        engine: str = 'openpyxl',
+        workers: Optional[int] = None,
+        timestamp: Optional[str] = None,
+        file_suffix: Optional[str] = None
+    ) -> None:
         """
-        Выбор и переименование необходимых колонок.
+        Инициализация сессии.
         
         Args:
-            df: Исходный DataFrame
+            output_file_base: Базовое имя выходного Excel файла (без расширения)
+            output_dir: Директория для выходных файлов
+            logger: Логгер для записи событий
+            reproducible: Записывать книгу без зависимости от времени запуска
+                (фиксированные даты свойств документа и элементов архива)
+            engine: Движок записи листов xlsx ('openpyxl' или 'xml')
+            workers: Количество процессов движка 'xml' (None - по числу CPU, 1 - без пула)
+            timestamp: Таймштамп имен файлов (None - текущее время); задается, чтобы
+                файлы частей листа имели таймштамп основной книги
+            file_suffix: Суффикс имени файла книги: {base}_{timestamp}_{file_suffix}.xlsx
             
-        Returns:
-            DataFrame с выбранными и переименованными колонками
+        Raises:
+            ValueError: Если движок не поддерживается
         """
-        self.logger.debug(f"Выбор колонок для экспорта [class: OrgUnitsLoader | def: select_columns]")
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(exist_ok=True)
+        self.logger = logger or logging.getLogger(__name__)
         
-        # Проверяем наличие всех необходимых колонок
-        missing_columns = [col for col in self.column_mapping.keys() if col not in df.columns]
-        if missing_columns:
-            error_msg = f"Отсутствуют необходимые колонки в исходных данных: {missing_columns}"
+        if engine not in self.ENGINES:
+            error_msg = f"Неподдерживаемый движок записи xlsx: {engine}. Допустимые: {list(self.ENGINES)}"
             self.logger.error(error_msg)
             raise ValueError(error_msg)
+        self.engine = engine
+        self.workers = max(1, workers or os.cpu_count() or 1)
         
-        # Выбираем только нужные колонки
-        selected_df = df[list(self.column_mapping.keys())].copy()
-        
-        # Переименовываем колонки
-        selected_df = selected_df.rename(columns=self.column_mapping)
-        
-        self.logger.debug(f"Выбрано и переименовано колонок: {len(selected_df.columns)} [class: OrgUnitsLoader | def: select_columns]")
-        
-        return selected_df
+        # Формируем имя файла с таймштампом
+        self.output_file_base = output_file_base
+        self.timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M")
+        file_name = f"{output_file_base}_{self.timestamp}" + (f"_{file_suffix}" if file_suffix else "")
+        self.output_path = self.output_dir / f"{file_name}.xlsx"
+        
+        self.workbook = Workbook(write_only=True) if engine == 'openpyxl' else None
+        self.sheet_names: List[str] = []  # Листы, добавленные в книгу xlsx
+        self.output_files: Dict[str, str] = {}  # Имя листа -> путь к файлу
+        self.saved = False
+        self.reproducible = reproducible
+        
+        # Движок 'xml': сформированные листы (имя, размеры, временный файл со строками) и пул процессов
+        self.xml_sheets: List[Dict] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
     
-    def save_to_excel(self, df: pd.DataFrame) -> str:
+    @staticmethod
+    def _column_widths(df: pd.DataFrame, max_column_width: int) -> List[int]:
         """
-        Сохранение данных в Excel файл с настройками форматирования.
+        Вычисление ширины колонок по содержимому (векторно, через str.len()).
         
-        Настройки:
-        - Первая строка закреплена
-        - Автофильтр включен
-        - Ширина колонок по содержимому (максимум max_column_width)
+        Args:
+            df: DataFrame с данными
+            max_column_width: Максимальная ширина колонки
+            
+        Returns:
+            Список ширин колонок (минимум 10, максимум max_column_width)
+        """
+        widths = []
+        for column_name in df.columns:
+            lengths = df[column_name].dropna().astype(str).str.len()
+            max_length = max(len(str(column_name)), int(lengths.max()) if len(lengths) else 0)
+            widths.append(min(max(max_length + 2, 10), max_column_width))
+        return widths
+    
+    def add_sheet(
+        self,
+        data: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+        sheet_name: str,
+        max_column_width: int = 100,
+        text_columns: Optional[List[str]] = None,
+        output_format: str = 'xlsx',
+        formula_columns: Optional[Dict[str, str]] = None
+    ) -> str:
+        """
+        Потоковое добавление листа в книгу с настройками форматирования.
+        
+        Листы с форматом, отличным от xlsx, записываются в отдельный файл
+        соответствующим приемником (текстовые колонки сохраняются как строки).
+        
+        Настройки:
+        - Первая строка закреплена и выделена жирным
+        - Автофильтр включен
+        - Ширина колонок по содержимому (максимум max_column_width)
+        - Колонки из text_columns сохраняются в текстовом формате (формат всей колонки)
+        - Колонки из formula_columns записываются формулами Excel (только xlsx)
         
         Args:
-            df: DataFrame для сохранения
+            data: DataFrame или последовательность DataFrame-частей с одинаковыми колонками
+                (ширина колонок вычисляется по первой части)
+            sheet_name: Имя листа
+            max_column_width: Максимальная ширина колонки
+            text_columns: Колонки, сохраняемые как текст (например, с лидирующими нулями)
+            output_format: Формат вывода листа ('xlsx', 'csv', 'parquet' или 'feather')
+            formula_columns: Колонка -> шаблон формулы без '=' с подстановкой {row}
+                (номер строки листа); значения колонки в данных не используются
             
         Returns:
-            Путь к созданному файлу
+            Путь к файлу, в который записан лист
+            
+        Raises:
+            ValueError: Если сессия уже сохранена, данные не переданы, формат не поддерживается
+                или формулы заданы для формата, отличного от xlsx
         """
-        # Формируем имя файла с таймштампом
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-        output_file = f"{self.output_file_base}_{timestamp}.xlsx"
-        output_path = self.output_dir / output_file
+        if self.saved:
+            error_msg = f"Сессия уже сохранена, добавление листа {sheet_name} невозможно: {self.output_path}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        chunks = iter([data]) if isinstance(data, pd.DataFrame) else iter(data)
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            error_msg = f"Нет данных для листа {sheet_name}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        columns = list(first_chunk.columns)
+        text_columns = [column_name for column_name in (text_columns or []) if column_name in columns]
+        
+        if output_format not in OUTPUT_FORMATS:
+            error_msg = f"Неподдерживаемый формат вывода листа {sheet_name}: {output_format}. Допустимые: {list(OUTPUT_FORMATS)}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        formula_columns = {
+            column_name: template for column_name, template in (formula_columns or {}).items() if column_name in columns
+        }
+        if formula_columns and output_format != 'xlsx':
+            error_msg = f"Формулы поддерживаются только в формате xlsx: лист {sheet_name}, формат {output_format}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        if output_format != 'xlsx':
+            # Отдельный файл для листа через приемник соответствующего формата
+            path = self.output_dir / f"{self.output_file_base}_{self.timestamp}_{sheet_name}{OUTPUT_FORMATS[output_format]}"
+            sink = FILE_SINKS[output_format](self.logger)
+            rows_written = sink.write(itertools.chain([first_chunk], chunks), path, text_columns)
+            self.logger.info(f"Лист {sheet_name} записан в файл {output_format}: {path.absolute()}")
+            self.logger.debug(f"Записан лист {sheet_name}: {rows_written} строк, файл {path.name} [class: WorkbookSession | def: add_sheet]")
+            self.output_files[sheet_name] = str(path.absolute())
+            return self.output_files[sheet_name]
+        
+        widths = self._column_widths(first_chunk, max_column_width)
+        parts = self._row_parts(itertools.chain([first_chunk], chunks), text_columns, formula_columns)
+        if self.engine == 'xml':
+            rows_written = self._add_sheet_xml(parts, sheet_name, columns, widths, text_columns, list(formula_columns))
+        else:
+            rows_written = self._add_sheet_openpyxl(parts, sheet_name, columns, widths, text_columns)
+        
+        self.logger.debug(f"Добавлен лист {sheet_name}: {rows_written} строк [class: WorkbookSession | def: add_sheet]")
         
-        self.logger.info(f"Сохранение данных в Excel: {output_file}")
-        self.logger.debug(f"Сохранение {len(df)} строк в файл {output_file} [class: OrgUnitsLoader | def: save_to_excel]")
+        self.sheet_names.append(sheet_name)
+        self.output_files[sheet_name] = str(self.output_path.absolute())
+        return self.output_files[sheet_name]
+    
+    def add_sheet_parts(
+        self,
+        data: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+        sheet_name: str,
+        max_rows: int,
+        numbered: bool = True,
+        max_column_width: int = 100,
+        text_columns: Optional[List[str]] = None,
+        output_format: str = 'xlsx',
+        formula_columns: Optional[Dict[str, str]] = None,
+        columns: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Запись листа частями не более max_rows строк данных в каждой.
+        
+        Части записываются листами {лист}_1..N (numbered=True) или {лист}, {лист}_2..N
+        (numbered=False: первая часть сохраняет исходное имя). Данные читаются
+        последовательно, поэтому количество частей заранее не требуется и
+        потоковые источники не накапливаются в памяти. Для xlsx max_rows
+        ограничивается пределом Excel (EXCEL_MAX_ROWS без строки заголовков).
         
-        # Сохраняем в Excel
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name=self.sheet_name, index=False)
+        Если строк нет, записывается один лист {лист} только с заголовками: колонки
+        берутся из первой (пустой) DataFrame-части, а если источник не вернул ни
+        одной части - из columns.
+        
+        Args:
+            data: DataFrame или последовательность DataFrame-частей с одинаковыми колонками
+            sheet_name: Базовое имя листа
+            max_rows: Максимальное количество строк данных в части
+            numbered: Нумеровать все части, начиная с первой
+            max_column_width: Максимальная ширина колонки
+            text_columns: Колонки, сохраняемые как текст
+            output_format: Формат вывода листа ('xlsx', 'csv', 'parquet' или 'feather')
+            formula_columns: Колонка -> шаблон формулы с подстановкой {row} (add_sheet)
+            columns: Колонки листа для пустого источника без DataFrame-частей
             
-            # Получаем объект листа для форматирования
-            worksheet = writer.sheets[self.sheet_name]
+        Returns:
+            Список частей: {'sheet': имя листа, 'file': имя файла, 'rows': количество строк}
             
-            # Закрепляем первую строку
-            worksheet.freeze_panes = 'A2'
+        Raises:
+            ValueError: Если max_rows не положительный или источник пуст, а columns не заданы
+        """
+        if max_rows <= 0:
+            error_msg = f"Количество строк части листа {sheet_name} должно быть положительным: {max_rows}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        if output_format == 'xlsx':
+            max_rows = min(max_rows, self.EXCEL_MAX_ROWS - 1)
+        
+        # Схема колонок первой части сохраняется для листа только с заголовками
+        # (потоковый источник к этому моменту уже прочитан)
+        header = {'frame': None if columns is None else pd.DataFrame(columns=columns)}
+        
+        def chunks() -> Iterable[pd.DataFrame]:
+            for index, chunk in enumerate([data] if isinstance(data, pd.DataFrame) else data):
+                if index == 0:
+                    header['frame'] = chunk.iloc[:0]
+                yield chunk
+        
+        parts = []
+        for part_index, pieces in itertools.groupby(_budget_pieces(chunks(), max_rows), key=lambda piece: piece[0]):
+            part_name = f"{sheet_name}_{part_index + 1}" if numbered or part_index else sheet_name
+            part = {'sheet': part_name, 'file': None, 'rows': 0}
             
-            # Включаем автофильтр
-            worksheet.auto_filter.ref = worksheet.dimensions
+            def frames(pieces=pieces, part=part) -> Iterable[pd.DataFrame]:
+                for _, frame in pieces:
+                    part['rows'] += len(frame)
+                    yield frame
             
-            # Настраиваем ширину колонок
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                
-                # Находим максимальную длину содержимого в колонке
-                for cell in column:
-                    try:
-                        if cell.value:
-                            max_length = max(max_length, len(str(cell.value)))
-                    except:
-                        pass
-                
-                # Устанавливаем ширину (минимум 10, максимум max_column_width)
-                adjusted_width = min(max(max_length + 2, 10), self.max_column_width)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
+            path = self.add_sheet(frames(), part_name, max_column_width, text_columns, output_format, formula_columns)
+            part['file'] = Path(path).name
+            parts.append(part)
+            self.logger.debug(f"Часть листа {sheet_name}: {part_name}, {part['rows']} строк [class: WorkbookSession | def: add_sheet_parts]")
+        
+        if not parts:
+            # Пустые данные: лист только с заголовками
+            if header['frame'] is None:
+                error_msg = f"Нет данных для листа {sheet_name}: источник не вернул ни одной части, колонки не заданы"
+                self.logger.error(error_msg)
+                raise ValueError(error_msg)
+            path = self.add_sheet(header['frame'], sheet_name, max_column_width, text_columns, output_format, formula_columns)
+            parts.append({'sheet': sheet_name, 'file': Path(path).name, 'rows': 0})
+        return parts
+    
+    def add_sheet_files(
+        self,
+        groups: Dict[str, pd.DataFrame],
+        sheet_name: str,
+        max_rows: int,
+        workers: Optional[int] = None,
+        max_column_width: int = 100,
+        text_columns: Optional[List[str]] = None,
+        output_format: str = 'xlsx'
+    ) -> List[Dict]:
+        """
+        Запись групп строк листа в отдельные файлы в пуле процессов.
+        
+        Группа с ключом k записывается в файл {base}_{timestamp}_{лист}_{k} с листом
+        {лист}_{k}; группа больше max_rows строк делится на листы {лист}_{k}, {лист}_{k}_2, ...
+        Каждый процесс записывает свой файл целиком (_write_sheet_file), движок
+        'xml' в процессах работает без вложенного пула.
+        
+        Args:
+            groups: Словарь ключ группы -> DataFrame строк группы
+            sheet_name: Базовое имя листа
+            max_rows: Максимальное количество строк данных в листе
+            workers: Количество процессов (None - по числу CPU, 1 - без пула)
+            max_column_width: Максимальная ширина колонки
+            text_columns: Колонки, сохраняемые как текст
+            output_format: Формат вывода листа ('xlsx', 'csv', 'parquet' или 'feather')
             
-            # Делаем первую строку жирной (заголовки)
-            header_font = Font(bold=True)
-            for cell in worksheet[1]:
-                cell.font = header_font
+        Returns:
+            Список частей: {'key': ключ группы, 'sheet': имя листа, 'file': имя файла, 'rows': количество строк}
+        """
+        if self.saved:
+            error_msg = f"Сессия уже сохранена, добавление листа {sheet_name} невозможно: {self.output_path}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
         
-        self.logger.info(f"Файл успешно создан: {output_path.absolute()}")
-        self.logger.debug(f"Excel файл создан: {output_path.absolute()}, строк: {len(df)} [class: OrgUnitsLoader | def: save_to_excel]")
+        tasks = []
+        for key, frame in groups.items():
+            part_name = f"{sheet_name}_{_part_name_key(key)}"
+            tasks.append({
+                'key': key,
+                'data': frame,
+                'sheet_name': part_name,
+                'max_rows': max_rows,
+                'sheet_options': {
+                    'max_column_width': max_column_width,
+                    'text_columns': text_columns,
+                    'output_format': output_format
+                },
+                'session_options': {
+                    'output_file_base': self.output_file_base,
+                    'output_dir': str(self.output_dir),
+                    'reproducible': self.reproducible,
+                    'engine': self.engine,
+                    'workers': 1,
+                    'timestamp': self.timestamp,
+                    'file_suffix': part_name
+                }
+            })
         
-        return str(output_path.absolute())
+        workers = min(max(1, workers or os.cpu_count() or 1), max(len(tasks), 1))
+        self.logger.info(f"Запись листа {sheet_name} в {len(tasks)} файлов, процессов: {workers}")
+        if workers == 1:
+            results = [_write_sheet_file(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_write_sheet_file, tasks))
+        
+        parts = []
+        for task, task_parts in zip(tasks, results):
+            for part in task_parts:
+                parts.append({'key': task['key'], **part})
+                self.output_files[part['sheet']] = str((self.output_dir / part['file']).absolute())
+        self.logger.debug(f"Лист {sheet_name} записан в файлы: {[part['file'] for part in parts]} [class: WorkbookSession | def: add_sheet_files]")
+        return parts
     
-    def process(self) -> str:
+    def add_sheet_continued(self, data: Union[pd.DataFrame, Iterable[pd.DataFrame]], sheet_name: str, **sheet_options) -> str:
         """
-        Полный цикл обработки: загрузка, фильтрация, выбор колонок, сохранение.
+        Добавление листа, продолжаемого при переполнении: для xlsx строки сверх
+        предела Excel переносятся в листы {лист}_2, {лист}_3, ... (с предупреждением
+        и JSON манифестом частей), остальные форматы записываются одним файлом.
         
+        Args:
+            data: DataFrame или последовательность DataFrame-частей с одинаковыми колонками
+            sheet_name: Имя листа
+            **sheet_options: Параметры add_sheet (max_column_width, text_columns, output_format)
+            
         Returns:
-            Путь к созданному Excel файлу
+            Путь к файлу листа или к манифесту частей (если лист продолжен)
         """
-        self.logger.info("Начало обработки организационных единиц")
-        self.logger.debug("Запуск полного цикла обработки данных [class: OrgUnitsLoader | def: process]")
+        if sheet_options.get('output_format', 'xlsx') != 'xlsx':
+            return self.add_sheet(data, sheet_name, **sheet_options)
+        
+        max_rows = self.EXCEL_MAX_ROWS - 1
+        parts = self.add_sheet_parts(data, sheet_name, max_rows, numbered=False, **sheet_options)
+        if len(parts) == 1:
+            return self.output_files[sheet_name]
+        self.logger.warning(f"Количество строк превышает предел листа Excel, лист {sheet_name} продолжен в листах: {[part['sheet'] for part in parts[1:]]}")
+        return self.write_manifest(sheet_name, parts, split_by='rows', max_rows=max_rows, format='xlsx')
+    
+    def write_manifest(self, sheet_name: str, parts: List[Dict], **details) -> str:
+        """
+        Запись JSON манифеста частей листа {base}_{timestamp}_{лист}_manifest.json.
         
-        # Загрузка
-        df = self.load_csv()
+        Манифест лежит рядом с файлами частей; имена файлов указываются
+        относительно его каталога.
         
-        # Фильтрация
-        df_filtered = self.filter_data(df)
+        Args:
+            sheet_name: Базовое имя листа
+            parts: Части листа (add_sheet_parts / add_sheet_files)
+            **details: Дополнительные поля манифеста (например, политика разбиения)
+            
+        Returns:
+            Путь к файлу манифеста
+        """
+        manifest = {
+            'sheet': sheet_name,
+            **details,
+            'total_rows': sum(part['rows'] for part in parts),
+            'parts': parts
+        }
+        manifest_path = self.output_dir / f"{self.output_file_base}_{self.timestamp}_{sheet_name}_manifest.json"
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        self.logger.info(f"Манифест частей листа {sheet_name}: {manifest_path.absolute()}")
+        return str(manifest_path.absolute())
+    
+    def _row_parts(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        text_columns: List[str],
+        formula_columns: Optional[Dict[str, str]] = None
+    ) -> Iterable[List[list]]:
+        """
+        Преобразование частей DataFrame в списки значений строк.
         
-        # Выбор колонок
-        df_final = self.select_columns(df_filtered)
+        Части разбиваются по ROWS_PER_CHUNK строк, пропуски заменяются на None,
+        значения текстовых колонок приводятся к строкам, колонки формул
+        заполняются строками '=...' по шаблону с номером строки листа.
         
-        # Сохранение
-        output_file = self.save_to_excel(df_final)
+        Args:
+            chunks: Части DataFrame
+            text_columns: Колонки, сохраняемые как текст
+            formula_columns: Колонка -> шаблон формулы с подстановкой {row}
+            
+        Yields:
+            Список строк (каждая строка - список значений ячеек)
+        """
+        first_row = 2  # Первая строка данных (после заголовков)
+        for chunk in chunks:
+            for start in range(0, len(chunk), self.ROWS_PER_CHUNK):
+                part = chunk.iloc[start:start + self.ROWS_PER_CHUNK]
+                if text_columns:
+                    part = part.assign(**{
+                        column_name: part[column_name].where(part[column_name].isna(), part[column_name].astype(str))
+                        for column_name in text_columns
+                    })
+                if formula_columns:
+                    row_numbers = range(first_row, first_row + len(part))
+                    part = part.assign(**{
+                        column_name: ['=' + template.format(row=row_number) for row_number in row_numbers]
+                        for column_name, template in formula_columns.items()
+                    })
+                first_row += len(part)
+                yield part.astype(object).where(part.notna(), None).to_numpy().tolist()
+    
+    def _add_sheet_openpyxl(
+        self,
+        parts: Iterable[List[list]],
+        sheet_name: str,
+        columns: List[str],
+        widths: List[int],
+        text_columns: List[str]
+    ) -> int:
+        """
+        Запись листа движком openpyxl (write-only).
         
-        self.logger.info(f"Обработка завершена успешно. Файл: {output_file}")
-        self.logger.debug(f"Обработка завершена. Создан файл: {output_file} [class: OrgUnitsLoader | def: process]")
+        Args:
+            parts: Части строк листа (_row_parts)
+            sheet_name: Имя листа
+            columns: Колонки листа
+            widths: Ширины колонок
+            text_columns: Колонки в текстовом формате
+            
+        Returns:
+            Количество записанных строк данных
+        """
+        worksheet = self.workbook.create_sheet(sheet_name)
+        
+        # Ширина и формат колонок задаются до записи строк (требование потокового режима)
+        for col_idx, width in enumerate(widths, 1):
+            dimension = worksheet.column_dimensions[get_column_letter(col_idx)]
+            dimension.width = width
+            if columns[col_idx - 1] in text_columns:
+                dimension.number_format = '@'  # Текстовый формат для всей колонки
+        
+        # Закрепляем первую строку
+        worksheet.freeze_panes = 'A2'
+        
+        # Заголовки жирным шрифтом
+        header_font = Font(bold=True)
+        header = []
+        for column_name in columns:
+            cell = WriteOnlyCell(worksheet, value=str(column_name))
+            cell.font = header_font
+            header.append(cell)
+        worksheet.append(header)
+        
+        # Строки пишутся частями по мере формирования
+        rows_written = 0
+        for rows in parts:
+            for row in rows:
+                worksheet.append(row)
+            rows_written += len(rows)
+        
+        # Включаем автофильтр по всему диапазону данных
+        worksheet.auto_filter.ref = f"A1:{get_column_letter(len(columns))}{rows_written + 1}"
+        return rows_written
+    
+    def _add_sheet_xml(
+        self,
+        parts: Iterable[List[list]],
+        sheet_name: str,
+        columns: List[str],
+        widths: List[int],
+        text_columns: List[str],
+        formula_columns: Optional[List[str]] = None
+    ) -> int:
+        """
+        Формирование XML строк листа в пуле процессов (движок 'xml').
         
-        return output_file
+        Части строк отправляются в пул по мере чтения; одновременно в работе
+        не более 2 * workers частей, готовые фрагменты записываются во
+        временный файл в исходном порядке. Заголовок и оформление листа
+        добавляются при сборке пакета (_save_xml).
+        
+        Args:
+            parts: Части строк листа (_row_parts)
+            sheet_name: Имя листа
+            columns: Колонки листа
+            widths: Ширины колонок
+            text_columns: Колонки в текстовом формате
+            formula_columns: Колонки формул
+            
+        Returns:
+            Количество записанных строк данных
+        """
+        column_letters = [get_column_letter(col_idx) for col_idx in range(1, len(columns) + 1)]
+        text_flags = [column_name in text_columns for column_name in columns]
+        formula_flags = [column_name in (formula_columns or []) for column_name in columns]
+        body = tempfile.TemporaryFile(dir=self.output_dir)
+        
+        rows_written = 0
+        if self.workers == 1:
+            for part_index, rows in enumerate(parts):
+                body.write(_render_sheet_rows(
+                    rows, rows_written + 2, column_letters, text_flags, formula_flags, part_index * len(columns)
+                ))
+                rows_written += len(rows)
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            pending = deque()
+            for part_index, rows in enumerate(parts):
+                pending.append(self._executor.submit(
+                    _render_sheet_rows, rows, rows_written + 2, column_letters, text_flags, formula_flags,
+                    part_index * len(columns)
+                ))
+                rows_written += len(rows)
+                if len(pending) >= 2 * self.workers:
+                    body.write(pending.popleft().result())
+            while pending:
+                body.write(pending.popleft().result())
+        
+        self.xml_sheets.append({
+            'name': sheet_name,
+            'columns': [str(column_name) for column_name in columns],
+            'widths': widths,
+            'text_flags': text_flags,
+            'rows': rows_written,
+            'body': body
+        })
+        return rows_written
+    
+    def _normalize_archive(self) -> None:
+        """
+        Приведение записанного файла xlsx к виду, не зависящему от времени запуска.
+        
+        Даты создания и изменения в свойствах документа заменяются на
+        REPRODUCIBLE_TIMESTAMP, а элементы zip-архива перезаписываются с
+        фиксированной датой, поэтому одинаковые данные дают одинаковые байты файла.
+        """
+        properties = self.workbook.properties
+        properties.created = properties.modified = self.REPRODUCIBLE_TIMESTAMP
+        core_xml = tostring(properties.to_tree())
+        
+        with zipfile.ZipFile(self.output_path) as source:
+            entries = [(info.filename, source.read(info)) for info in source.infolist()]
+        
+        tmp_path = self.output_path.with_name(self.output_path.name + '.tmp')
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as target:
+            for name, data in entries:
+                info = zipfile.ZipInfo(name, date_time=self.REPRODUCIBLE_TIMESTAMP.timetuple()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o600 << 16
+                target.writestr(info, core_xml if name == ARC_CORE else data)
+        tmp_path.replace(self.output_path)
+    
+    def _sheet_xml_parts(self, sheet: Dict) -> tuple:
+        """
+        Начало и окончание XML листа вокруг строк данных (движок 'xml').
+        
+        Args:
+            sheet: Описание листа из xml_sheets
+            
+        Returns:
+            Кортеж (начало XML до строк данных, окончание XML) в кодировке UTF-8
+        """
+        last_letter = get_column_letter(len(sheet['columns']))
+        ref = f"A1:{last_letter}{sheet['rows'] + 1}"
+        cols = ''.join(
+            f'<col min="{col_idx}" max="{col_idx}" width="{width}" customWidth="1"'
+            + (f' style="{XML_STYLE_TEXT}"' if is_text else '') + '/>'
+            for col_idx, (width, is_text) in enumerate(zip(sheet['widths'], sheet['text_flags']), 1)
+        )
+        header = ''.join(
+            _inline_string_cell(f'{get_column_letter(col_idx)}1', column_name, XML_STYLE_BOLD)
+            for col_idx, column_name in enumerate(sheet['columns'], 1)
+        )
+        head = (
+            _XML_HEADER
+            + f'<worksheet xmlns="{_XLSX_MAIN_NS}" xmlns:r="{_XLSX_REL_NS}">'
+            f'<dimension ref="{ref}"/>'
+            '<sheetViews><sheetView workbookViewId="0">'
+            '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+            '<selection pane="bottomLeft" activeCell="A2" sqref="A2"/>'
+            '</sheetView></sheetViews>'
+            '<sheetFormatPr defaultRowHeight="15"/>'
+            f'<cols>{cols}</cols>'
+            f'<sheetData><row r="1">{header}</row>'
+        )
+        tail = (
+            '</sheetData>'
+            f'<autoFilter ref="{ref}"/>'
+            '<pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/>'
+            '</worksheet>'
+        )
+        return head.encode('utf-8'), tail.encode('utf-8')
+    
+    def _package_parts(self) -> Dict[str, str]:
+        """
+        Служебные части пакета xlsx (движок 'xml'): типы содержимого, связи, книга, стили, свойства.
+        
+        Returns:
+            Словарь имя части -> XML
+        """
+        sheets = ''.join(
+            f'<sheet name={quoteattr(sheet["name"])} sheetId="{index}" r:id="rId{index}"/>'
+            for index, sheet in enumerate(self.xml_sheets, 1)
+        )
+        # Скрытые имена _FilterDatabase, которые Excel создает для автофильтра каждого листа
+        defined_names = ''.join(
+            f'<definedName name="_xlnm._FilterDatabase" localSheetId="{index}" hidden="1">'
+            + escape("'{}'!$A$1:${}${}".format(
+                sheet['name'].replace("'", "''"), get_column_letter(len(sheet['columns'])), sheet['rows'] + 1
+            ))
+            + '</definedName>'
+            for index, sheet in enumerate(self.xml_sheets)
+        )
+        workbook_rels = ''.join(
+            f'<Relationship Id="rId{index}" Type="{_XLSX_REL_NS}/worksheet" Target="worksheets/sheet{index}.xml"/>'
+            for index in range(1, len(self.xml_sheets) + 1)
+        ) + f'<Relationship Id="rId{len(self.xml_sheets) + 1}" Type="{_XLSX_REL_NS}/styles" Target="styles.xml"/>'
+        sheet_overrides = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{index}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for index in range(1, len(self.xml_sheets) + 1)
+        )
+        
+        properties = DocumentProperties(creator='openpyxl')
+        if self.reproducible:
+            properties.created = properties.modified = self.REPRODUCIBLE_TIMESTAMP
+        
+        return {
+            '[Content_Types].xml': (
+                _XML_HEADER
+                + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                '<Default Extension="xml" ContentType="application/xml"/>'
+                '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                + sheet_overrides +
+                '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+                '<Override PartName="/docProps/core.xml" ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>'
+                '<Override PartName="/docProps/app.xml" ContentType="application/vnd.openxmlformats-officedocument.extended-properties+xml"/>'
+                '</Types>'
+            ),
+            '_rels/.rels': _XLSX_ROOT_RELS,
+            'docProps/app.xml': _XLSX_APP,
+            ARC_CORE: tostring(properties.to_tree()).decode('utf-8'),
+            'xl/workbook.xml': (
+                _XML_HEADER
+                + f'<workbook xmlns="{_XLSX_MAIN_NS}" xmlns:r="{_XLSX_REL_NS}">'
+                '<workbookPr/><bookViews><workbookView/></bookViews>'
+                f'<sheets>{sheets}</sheets>'
+                f'<definedNames>{defined_names}</definedNames>'
+                '<calcPr calcId="124519" fullCalcOnLoad="1"/>'
+                '</workbook>'
+            ),
+            'xl/_rels/workbook.xml.rels': (
+                _XML_HEADER
+                + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                + workbook_rels
+                + '</Relationships>'
+            ),
+            'xl/styles.xml': _XLSX_STYLES
+        }
+    
+    def _save_xml(self) -> None:
+        """
+        Сборка пакета xlsx из сформированных листов (движок 'xml').
+        
+        XML листов передается в архив потоково: начало, строки данных из
+        временного файла и окончание, без загрузки листа в память целиком.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        
+        date_time = (self.REPRODUCIBLE_TIMESTAMP if self.reproducible else datetime.now()).timetuple()[:6]
+        
+        def zip_info(name: str) -> zipfile.ZipInfo:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o600 << 16
+            return info
+        
+        with zipfile.ZipFile(self.output_path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as target:
+            for name, xml in self._package_parts().items():
+                target.writestr(zip_info(name), xml.encode('utf-8'))
+            for index, sheet in enumerate(self.xml_sheets, 1):
+                head, tail = self._sheet_xml_parts(sheet)
+                with target.open(zip_info(f'xl/worksheets/sheet{index}.xml'), 'w', force_zip64=True) as part:
+                    part.write(head)
+                    sheet['body'].seek(0)
+                    shutil.copyfileobj(sheet['body'], part)
+                    part.write(tail)
+                sheet['body'].close()
+    
+    def save(self) -> str:
+        """
+        Запись книги на диск (выполняется один раз за сессию).
+        
+        Книга записывается, только если в нее добавлен хотя бы один лист xlsx.
+        В режиме reproducible файл нормализуется (_normalize_archive); движок
+        'xml' сразу записывает фиксированные даты.
+        
+        Returns:
+            Путь к созданному Excel файлу (или к файлу первого листа, если листов xlsx нет)
+        """
+        if not self.saved:
+            self.saved = True
+            if self.sheet_names:
+                if self.engine == 'xml':
+                    self._save_xml()
+                else:
+                    self.workbook.save(self.output_path)
+                    if self.reproducible:
+                        self._normalize_archive()
+                self.logger.info(f"Файл успешно создан: {self.output_path.absolute()}")
+                self.logger.debug(f"Excel файл создан: {self.output_path.absolute()}, листы: {self.sheet_names} [class: WorkbookSession | def: save]")
+        if self.sheet_names or not self.output_files:
+            return str(self.output_path.absolute())
+        return next(iter(self.output_files.values()))
 
 
-def load_org_units(
-    config: Dict,
-    output_file_base: str = "result_base",
-    output_dir: str = "OUT",
-    logger: Optional[logging.Logger] = None
-) -> str:
+def _budget_pieces(chunks: Iterable[pd.DataFrame], max_rows: int) -> Iterable[tuple]:
     """
-    Функция для загрузки и обработки организационных единиц.
+    Разметка последовательности DataFrame-частей по частям листа не более max_rows строк.
     
     Args:
-        config: Словарь конфигурации из LOADER_CONFIG для загрузчика
-        output_file_base: Базовое имя выходного Excel файла (по умолчанию "result_base")
-        output_dir: Директория для выходных файлов (по умолчанию "OUT")
-        logger: Логгер для записи событий (опционально)
+        chunks: Части DataFrame
+        max_rows: Максимальное количество строк в части листа
+        
+    Yields:
+        Кортеж (номер части листа с 0, фрагмент DataFrame)
+    """
+    part_index, used = 0, 0
+    for chunk in chunks:
+        start = 0
+        while start < len(chunk):
+            if used == max_rows:
+                part_index, used = part_index + 1, 0
+            take = min(max_rows - used, len(chunk) - start)
+            yield part_index, chunk.iloc[start:start + take]
+            used += take
+            start += take
+
+
+def _part_name_key(key) -> str:
+    """
+    Ключ группы для имени листа и файла (символы, недопустимые в именах, заменяются на '_').
     
+    Args:
+        key: Значение ключа группы
+        
     Returns:
-        Путь к созданному Excel файлу
+        Строка ключа
+    """
+    return re.sub(r'[\\/:*?"<>|\[\]\s]', '_', str(key))
+
+
+def _write_sheet_file(task: Dict) -> List[Dict]:
+    """
+    Запись группы строк листа в отдельный файл (выполняется в процессах пула).
+    
+    Args:
+        task: Параметры записи: данные, имя листа, max_rows, параметры листа и сессии
         
-    Example:
-        >>> output = load_org_units(
-        ...     config=LOADER_CONFIG['ORG'],
-        ...     output_file_base="result_base",
-        ...     output_dir="OUT"
-        ... )
-        >>> print(f"Создан файл: {output}")
+    Returns:
+        Список частей листа (add_sheet_parts)
     """
-    loader = OrgUnitsLoader(
-        config=config,
-        output_file_base=output_file_base,
-        output_dir=output_dir,
-        logger=logger
-    )
-    return loader.process()
+    session = WorkbookSession(**task['session_options'])
+    parts = session.add_sheet_parts(task['data'], task['sheet_name'], task['max_rows'], numbered=False, **task['sheet_options'])
+    session.save()
+    return parts
 
 
 # ============================================================================
-# МОДУЛЬ ГЕНЕРАЦИИ ПОЛЬЗОВАТЕЛЕЙ
+# МОДУЛЬ ЗАГРУЗКИ ОРГАНИЗАЦИОННЫХ ЕДИНИЦ
 # ============================================================================
 
-# Функция для преобразования мужской фамилии в женскую
-def _convert_to_female_surname(male_surname: str) -> str:
+import hashlib
+import pickle
+
+
+def _file_sha256(path: Path) -> str:
     """
-    Преобразование мужской фамилии в женскую.
+    SHA-256 содержимого файла (файл читается блоками по 1 МБ).
     
-    Правила:
-    - Фамилии на "ов", "ев", "ин" -> добавляем "а"
-    - Фамилии на "ий", "ой" -> заменяем на "ая"
-    - Остальные -> добавляем "а"
+    Args:
+        path: Путь к файлу
+        
+    Returns:
+        Шестнадцатеричная строка хэша
     """
-    if male_surname.endswith('ий') or male_surname.endswith('ой'):
-        return male_surname[:-2] + 'ая'
-    elif male_surname.endswith('ов') or male_surname.endswith('ев') or male_surname.endswith('ин'):
-        return male_surname + 'а'
-    else:
-        return male_surname + 'а'
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
 
-class UserGenerator:
+class OrgUnitsLoader:
     """
-    Класс для генерации пользователей.
+    Класс для загрузки и обработки организационных единиц.
     
-    Генерирует пользователей с уникальными табельными номерами, ФИО и распределением по подразделениям.
+    Загружает данные из CSV, применяет фильтры и сохраняет в Excel.
     Использует библиотеки из стандартной установки Anaconda (pandas, openpyxl).
     """
     
     def __init__(
         self,
         config: Dict,
-        org_data: pd.DataFrame,
         output_file_base: str,
         output_dir: str = "OUT",
         logger: Optional[logging.Logger] = None
     ) -> None:
         """
-        Инициализация генератора пользователей.
+        Инициализация загрузчика организационных единиц.
         
         Args:
-            config: Словарь конфигурации из LOADER_CONFIG для генератора пользователей
-            org_data: DataFrame с данными организационных единиц (из листа ORG)
+            config: Словарь конфигурации из LOADER_CONFIG для данного загрузчика
             output_file_base: Базовое имя выходного Excel файла (без расширения)
             output_dir: Директория для выходных файлов
             logger: Логгер для записи событий
         """
         self.config = config
-        self.org_data = org_data
+        self.input_file = Path(config['input_file'])
         self.output_file_base = output_file_base
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(exist_ok=True)
+        self.output_dir.mkdir(exist_ok=True)  # Создаем папку, если её нет
         self.logger = logger or logging.getLogger(__name__)
         
-        # Настройки Excel
-        self.sheet_name = config['sheet_name']
-        self.max_column_width = config.get('max_column_width', 100)
+        # Маппинг колонок: исходное_имя -> результирующее_имя
+        self.column_mapping = config['column_mapping']
         
-        # Параметры генерации из конфигурации USERS
-        self.business_blocks = config['business_blocks']
-        self.tab_number_config = config['tab_number']
-        self.gray_zone_config = config['gray_zone']
-        self.fixed_distribution = config.get('fixed_distribution', {})  # Фиксированное распределение
+        # Фильтры для исключения строк
+        filters = config.get('filters', {})
+        self.tb_code_exclude = filters.get('tb_code_exclude', set())
+        self.gosb_code_exclude = filters.get('gosb_code_exclude', set())
         
-        # Данные для генерации ФИО
-        self.male_data = config['male_data']
-        self.female_data = config['female_data']
+        # Потоковое чтение CSV порциями (None - файл читается целиком)
+        self.chunk_size = config.get('chunk_size')
+        
+        # Каталог кэша подготовленных данных (None - кэш отключен)
+        cache_dir = config.get('cache_dir')
+        self.cache_dir = Path(cache_dir) if cache_dir else None
         
-        # Уникальные табельные номера
-        self.used_tab_numbers: set = set()
+        # Настройки Excel
+        self.sheet_name = config['sheet_name']
+        self.max_column_width = config.get('max_column_width', 100)
+        self.output_format = config.get('format', 'xlsx')  # Формат вывода листа
         
-        # Уникальные ФИО
-        self.used_fio: set = set()
+        # Подготовленные данные ORG (заполняются в prepare) для передачи следующим этапам в памяти
+        self.data: Optional[pd.DataFrame] = None
     
-    def _generate_tab_number(self) -> str:
+    def _required_columns(self) -> List[str]:
         """
-        Генерация уникального табельного номера.
-        
-        Табельный номер: от 4 до 7 значащих цифр (больше 999), 
-        записывается как текст с лидирующими нулями до 8 знаков.
+        Колонки, которые нужно прочитать из CSV: колонки маппинга и колонки фильтров.
         
         Returns:
-            Табельный номер в формате строки с лидирующими нулями
+            Список имен колонок исходного файла
         """
-        min_val = 10 ** (self.tab_number_config['min_digits'] - 1)  # 1000
-        max_val = 10 ** self.tab_number_config['max_digits'] - 1  # 9999999
-        
-        # Генерируем уникальный номер
-        while True:
-            # Генерируем случайное число от min_val до max_val
-            num = random.randint(min_val, max_val)
-            
-            if num not in self.used_tab_numbers:
-                self.used_tab_numbers.add(num)
-                # Форматируем с лидирующими нулями до 8 знаков
-                tab_number = str(num).zfill(self.tab_number_config['total_length'])
-                return tab_number
+        return list(dict.fromkeys([*self.column_mapping.keys(), 'TB_CODE', 'GOSB_CODE']))
     
-    def _generate_fio(self, gender: str) -> str:
+    def _read_csv(self, **kwargs):
         """
-        Генерация уникального ФИО.
+        Чтение CSV файла только с необходимыми колонками.
+        
+        Колонки, отсутствующие в файле, пропускаются при чтении;
+        их отсутствие обнаруживается при фильтрации и выборе колонок.
         
         Args:
-            gender: Пол ('male' или 'female')
+            **kwargs: Дополнительные параметры pd.read_csv (например, chunksize)
             
         Returns:
-            ФИО в формате "Фамилия Имя Отчество"
+            DataFrame или итератор порций DataFrame (при указании chunksize)
         """
-        if gender == 'male':
-            first_names = self.male_data['first_names']
-            surnames = self.male_data['surnames']
-            patronymics = self.male_data['patronymics']
-        else:
-            first_names = self.female_data['first_names']
-            surnames = self.female_data['surnames']
-            patronymics = self.female_data['patronymics']
-        
-        # Генерируем уникальное ФИО
-        max_attempts = 10000
-        for _ in range(max_attempts):
-            surname = random.choice(surnames)
-            first_name = random.choice(first_names)
-            patronymic = random.choice(patronymics)
-            
-            fio = f"{surname} {first_name} {patronymic}"
-            
-            if fio not in self.used_fio:
-                self.used_fio.add(fio)
-                return fio
-        
-        # Если не удалось сгенерировать уникальное ФИО, добавляем номер
-        surname = random.choice(surnames)
-        first_name = random.choice(first_names)
-        patronymic = random.choice(patronymics)
-        counter = len(self.used_fio)
-        fio = f"{surname} {first_name} {patronymic} ({counter})"
-        self.used_fio.add(fio)
-        return fio
+        required_columns = set(self._required_columns())
+        return pd.read_csv(
+            self.input_file,
+            sep=';',
+            encoding='utf-8',
+            dtype=str,  # Загружаем все как строки для корректной фильтрации
+            usecols=lambda column: column in required_columns,
+            **kwargs
+        )
     
-    def _create_user(self, org_unit, business_block_code: str) -> Dict:
+    def load_csv(self) -> pd.DataFrame:
         """
-        Создание одного пользователя для указанного подразделения и бизнес-блока.
+        Загрузка данных из CSV файла.
         
-        Args:
-            org_unit: Код подразделения (может быть строкой или числом)
-            business_block_code: Код бизнес-блока ('KMKKSB' или 'MNS')
-            
         Returns:
-            Словарь с данными пользователя
+            DataFrame с загруженными данными
+            
+        Raises:
+            FileNotFoundError: Если файл не найден
+            ValueError: Если файл пустой или неверный формат
         """
-        tab_number = self._generate_tab_number()
-        gender = 'male' if random.random() < self.business_blocks[business_block_code]['gender_distribution'] else 'female'
+        if not self.input_file.exists():
+            error_msg = f"Файл не найден: {self.input_file}"
+            self.logger.error(error_msg)
+            raise FileNotFoundError(error_msg)
+        
+        self.logger.info(f"Начало загрузки CSV файла: {self.input_file}")
+        self.logger.debug(f"Загрузка данных из файла [class: OrgUnitsLoader | def: load_csv]")
+        
+        try:
+            # Загрузка CSV с разделителем ';' (только колонки маппинга и фильтров)
+            df = self._read_csv()
+            
+            self.logger.info(f"Загружено строк: {len(df)}")
+            self.logger.debug(f"Загружено {len(df)} строк, колонок: {len(df.columns)} [class: OrgUnitsLoader | def: load_csv]")
+            
+            if df.empty:
+                raise ValueError("CSV файл пуст")
+            
+            return df
+            
+        except Exception as e:
+            error_msg = f"Ошибка при загрузке CSV: {str(e)}"
+            self.logger.error(error_msg)
+            raise
+    
+    def filter_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Фильтрация данных по заданным критериям.
+        
+        Исключает строки где:
+        - TB_CODE в списке исключений (99, 100, 101, 102)
+        - GOSB_CODE в списке исключений (0, 9038, 9040)
+        
+        Args:
+            df: Исходный DataFrame
+            
+        Returns:
+            Отфильтрованный DataFrame
+        """
+        initial_count = len(df)
+        self.logger.debug(f"Начало фильтрации данных. Исходное количество строк: {initial_count} [class: OrgUnitsLoader | def: filter_data]")
+        
+        # Проверяем наличие необходимых колонок
+        required_columns = ['TB_CODE', 'GOSB_CODE']
+        missing_columns = [col for col in required_columns if col not in df.columns]
+        if missing_columns:
+            error_msg = f"Отсутствуют необходимые колонки: {missing_columns}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        # Единая маска исключения по TB_CODE и GOSB_CODE (без копирования исходных данных)
+        tb_mask, gosb_mask = self._exclude_masks(df)
+        df_filtered = df[~(tb_mask | gosb_mask)]
+        
+        excluded_tb = int(tb_mask.sum())
+        if excluded_tb > 0:
+            self.logger.debug(f"Исключено строк по TB_CODE: {excluded_tb} [class: OrgUnitsLoader | def: filter_data]")
+        excluded_gosb = int((gosb_mask & ~tb_mask).sum())
+        if excluded_gosb > 0:
+            self.logger.debug(f"Исключено строк по GOSB_CODE: {excluded_gosb} [class: OrgUnitsLoader | def: filter_data]")
+        
+        final_count = len(df_filtered)
+        excluded_total = initial_count - final_count
+        
+        self.logger.info(f"Отфильтровано строк: {excluded_total}, осталось: {final_count}")
+        self.logger.debug(f"Фильтрация завершена. Исключено: {excluded_total}, осталось: {final_count} [class: OrgUnitsLoader | def: filter_data]")
+        
+        return df_filtered
+    
+    def _exclude_masks(self, df: pd.DataFrame) -> tuple:
+        """
+        Маски строк, исключаемых фильтрами по TB_CODE и GOSB_CODE.
+        
+        Args:
+            df: DataFrame с колонками TB_CODE и GOSB_CODE
+            
+        Returns:
+            Кортеж (маска по TB_CODE, маска по GOSB_CODE)
+        """
+        return df['TB_CODE'].isin(self.tb_code_exclude), df['GOSB_CODE'].isin(self.gosb_code_exclude)
+    
+    def load_filtered(self) -> pd.DataFrame:
+        """
+        Потоковая загрузка CSV порциями по chunk_size строк с фильтрацией каждой порции.
+        
+        Читаются только колонки маппинга и фильтров, исключенные строки
+        отбрасываются сразу, поэтому пиковое потребление памяти определяется
+        размером отфильтрованного результата, а не исходного файла.
+        
+        Returns:
+            Отфильтрованный DataFrame
+            
+        Raises:
+            FileNotFoundError: Если файл не найден
+            ValueError: Если файл пустой или отсутствуют колонки фильтров
+        """
+        if not self.input_file.exists():
+            error_msg = f"Файл не найден: {self.input_file}"
+            self.logger.error(error_msg)
+            raise FileNotFoundError(error_msg)
+        
+        self.logger.info(f"Начало потоковой загрузки CSV файла: {self.input_file} (порция: {self.chunk_size} строк)")
+        self.logger.debug(f"Потоковая загрузка с фильтрацией порций [class: OrgUnitsLoader | def: load_filtered]")
+        
+        total_count = 0
+        excluded_tb = 0
+        excluded_gosb = 0
+        survivors = []
+        try:
+            with self._read_csv(chunksize=self.chunk_size) as reader:
+                for chunk in reader:
+                    missing_columns = [col for col in ('TB_CODE', 'GOSB_CODE') if col not in chunk.columns]
+                    if missing_columns:
+                        raise ValueError(f"Отсутствуют необходимые колонки: {missing_columns}")
+                    
+                    tb_mask, gosb_mask = self._exclude_masks(chunk)
+                    exclude_mask = tb_mask | gosb_mask
+                    total_count += len(chunk)
+                    excluded_tb += int(tb_mask.sum())
+                    excluded_gosb += int((gosb_mask & ~tb_mask).sum())
+                    survivors.append(chunk[~exclude_mask])
+        except Exception as e:
+            error_msg = f"Ошибка при загрузке CSV: {str(e)}"
+            self.logger.error(error_msg)
+            raise
+        
+        if total_count == 0:
+            error_msg = "Ошибка при загрузке CSV: CSV файл пуст"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        df_filtered = pd.concat(survivors, ignore_index=True)
+        final_count = len(df_filtered)
+        
+        self.logger.info(f"Загружено строк: {total_count}")
+        self.logger.debug(f"Прочитано порций: {len(survivors)}, колонок: {len(df_filtered.columns)} [class: OrgUnitsLoader | def: load_filtered]")
+        if excluded_tb > 0:
+            self.logger.debug(f"Исключено строк по TB_CODE: {excluded_tb} [class: OrgUnitsLoader | def: load_filtered]")
+        if excluded_gosb > 0:
+            self.logger.debug(f"Исключено строк по GOSB_CODE: {excluded_gosb} [class: OrgUnitsLoader | def: load_filtered]")
+        self.logger.info(f"Отфильтровано строк: {total_count - final_count}, осталось: {final_count}")
+        
+        return df_filtered
+    
+    def select_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Выбор и переименование необходимых колонок.
+        
+        Args:
+            df: Исходный DataFrame
+            
+        Returns:
+            DataFrame с выбранными и переименованными колонками
+        """
+        self.logger.debug(f"Выбор колонок для экспорта [class: OrgUnitsLoader | def: select_columns]")
+        
+        # Проверяем наличие всех необходимых колонок
+        missing_columns = [col for col in self.column_mapping.keys() if col not in df.columns]
+        if missing_columns:
+            error_msg = f"Отсутствуют необходимые колонки в исходных данных: {missing_columns}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        # Выбираем только нужные колонки
+        selected_df = df[list(self.column_mapping.keys())].copy()
+        
+        # Переименовываем колонки
+        selected_df = selected_df.rename(columns=self.column_mapping)
+        
+        self.logger.debug(f"Выбрано и переименовано колонок: {len(selected_df.columns)} [class: OrgUnitsLoader | def: select_columns]")
+        
+        return selected_df
+    
+    def save_to_excel(self, df: pd.DataFrame, session: Optional[WorkbookSession] = None) -> str:
+        """
+        Сохранение данных в Excel файл с настройками форматирования.
+        
+        Настройки:
+        - Первая строка закреплена
+        - Автофильтр включен
+        - Ширина колонок по содержимому (максимум max_column_width)
+        
+        Args:
+            df: DataFrame для сохранения
+            session: Сессия выходной книги конвейера. Если не указана, создается
+                отдельный файл, который записывается сразу
+            
+        Returns:
+            Путь к файлу
+        """
+        own_session = session is None
+        if own_session:
+            session = WorkbookSession(self.output_file_base, str(self.output_dir), self.logger)
+        
+        self.logger.info(f"Сохранение данных в Excel: {session.output_path.name}")
+        self.logger.debug(f"Сохранение {len(df)} строк в лист {self.sheet_name} файла {session.output_path.name} [class: OrgUnitsLoader | def: save_to_excel]")
+        
+        output_path = session.add_sheet(
+            df,
+            self.sheet_name,
+            max_column_width=self.max_column_width,
+            output_format=self.output_format
+        )
+        if own_session:
+            output_path = session.save()
+        
+        return output_path
+    
+    def _cache_key(self) -> str:
+        """
+        Ключ кэша: SHA-256 содержимого входного файла, фильтров и маппинга колонок.
+        
+        Returns:
+            Шестнадцатеричная строка хэша
+        """
+        digest = hashlib.sha256(_file_sha256(self.input_file).encode('ascii'))
+        
+        # Множества сортируются, чтобы ключ не зависел от порядка элементов
+        settings = {
+            'tb_code_exclude': sorted(self.tb_code_exclude),
+            'gosb_code_exclude': sorted(self.gosb_code_exclude),
+            'column_mapping': list(self.column_mapping.items())
+        }
+        digest.update(json.dumps(settings, ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _cache_path(self, cache_key: str) -> Path:
+        """
+        Путь к файлу кэша для заданного ключа.
+        
+        Используется Feather при наличии pyarrow, иначе pickle.
+        
+        Args:
+            cache_key: Ключ кэша
+            
+        Returns:
+            Путь к файлу кэша
+        """
+        extension = '.feather' if pa is not None else '.pkl'
+        return self.cache_dir / f"{self.sheet_name}_{cache_key}{extension}"
+    
+    def _load_cache(self, cache_path: Path) -> Optional[pd.DataFrame]:
+        """
+        Загрузка подготовленных данных из кэша.
+        
+        Args:
+            cache_path: Путь к файлу кэша
+            
+        Returns:
+            DataFrame из кэша или None, если кэш отсутствует или поврежден
+        """
+        if not cache_path.exists():
+            return None
+        
+        try:
+            if cache_path.suffix == '.feather':
+                return pa_feather.read_table(cache_path).to_pandas()
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            self.logger.warning(f"Не удалось прочитать кэш {cache_path}: {str(e)}. Данные будут подготовлены заново.")
+            return None
+    
+    def _save_cache(self, df: pd.DataFrame, cache_path: Path) -> None:
+        """
+        Сохранение подготовленных данных в кэш.
+        
+        Ошибка записи кэша не прерывает обработку.
+        
+        Args:
+            df: Подготовленный DataFrame
+            cache_path: Путь к файлу кэша
+        """
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Запись во временный файл и переименование, чтобы не оставить частично записанный кэш
+            tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+            if cache_path.suffix == '.feather':
+                pa_feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+            else:
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(cache_path)
+            self.logger.debug(f"Данные сохранены в кэш: {cache_path} [class: OrgUnitsLoader | def: _save_cache]")
+        except Exception as e:
+            self.logger.warning(f"Не удалось записать кэш {cache_path}: {str(e)}")
+    
+    def prepare(self) -> pd.DataFrame:
+        """
+        Подготовка данных ORG: загрузка, фильтрация, выбор колонок.
+        
+        Результат сохраняется в атрибуте data, чтобы следующие этапы
+        получали данные в памяти, без повторного чтения выходного Excel файла.
+        Индекс результата - 0..N-1 независимо от пути (кэш, порции, файл целиком).
+        При заданном cache_dir результат берется из кэша, если входной файл,
+        фильтры и маппинг колонок не изменились.
+        
+        Returns:
+            DataFrame с подготовленными данными ORG
+        """
+        cache_path = None
+        if self.cache_dir is not None and self.input_file.exists():
+            cache_path = self._cache_path(self._cache_key())
+            cached = self._load_cache(cache_path)
+            if cached is not None:
+                self.logger.info(f"Данные ORG загружены из кэша: {cache_path} (строк: {len(cached)})")
+                self.data = cached.reset_index(drop=True)
+                return self.data
+            self.logger.debug(f"Кэш не найден, данные будут подготовлены: {cache_path} [class: OrgUnitsLoader | def: prepare]")
+        
+        if self.chunk_size:
+            # Потоковая загрузка с фильтрацией каждой порции
+            df_filtered = self.load_filtered()
+        else:
+            # Загрузка файла целиком и фильтрация
+            df_filtered = self.filter_data(self.load_csv())
+        
+        # Выбор колонок; индекс 0..N-1 на всех путях (фильтрация оставляет пропуски в индексе)
+        self.data = self.select_columns(df_filtered).reset_index(drop=True)
+        
+        if cache_path is not None:
+            self._save_cache(self.data, cache_path)
+        
+        return self.data
+    
+    def process(self, session: Optional[WorkbookSession] = None) -> str:
+        """
+        Полный цикл обработки: загрузка, фильтрация, выбор колонок, сохранение.
+        
+        Подготовленные данные доступны после вызова в атрибуте data.
+        
+        Args:
+            session: Сессия выходной книги конвейера (если не указана, файл записывается сразу)
+        
+        Returns:
+            Путь к Excel файлу
+        """
+        self.logger.info("Начало обработки организационных единиц")
+        self.logger.debug("Запуск полного цикла обработки данных [class: OrgUnitsLoader | def: process]")
+        
+        # Загрузка, фильтрация и выбор колонок
+        df_final = self.prepare()
+        
+        # Сохранение (Excel используется только как приемник данных)
+        output_file = self.save_to_excel(df_final, session)
+        
+        self.logger.info(f"Обработка завершена успешно. Файл: {output_file}")
+        self.logger.debug(f"Обработка завершена. Создан файл: {output_file} [class: OrgUnitsLoader | def: process]")
+        
+        return output_file
+
+
+def load_org_units(
+    config: Dict,
+    output_file_base: str = "result_base",
+    output_dir: str = "OUT",
+    logger: Optional[logging.Logger] = None,
+    session: Optional[WorkbookSession] = None
+) -> str:
+    """
+    Функция для загрузки и обработки организационных единиц.
+    
+    Args:
+        config: Словарь конфигурации из LOADER_CONFIG для загрузчика
+        output_file_base: Базовое имя выходного Excel файла (по умолчанию "result_base")
+        output_dir: Директория для выходных файлов (по умолчанию "OUT")
+        logger: Логгер для записи событий (опционально)
+        session: Сессия выходной книги конвейера (опционально)
+    
+    Returns:
+        Путь к созданному Excel файлу
+        
+    Example:
+        >>> output = load_org_units(
+        ...     config=LOADER_CONFIG['ORG'],
+        ...     output_file_base="result_base",
+        ...     output_dir="OUT"
+        ... )
+        >>> print(f"Создан файл: {output}")
+    """
+    loader = OrgUnitsLoader(
+        config=config,
+        output_file_base=output_file_base,
+        output_dir=output_dir,
+        logger=logger
+    )
+    return loader.process(session)
+
+
+# ============================================================================
+# МОДУЛЬ ИНДЕКСА ОРГАНИЗАЦИОННОЙ СТРУКТУРЫ
+# ============================================================================
+
+import numpy as np
+
+# Атрибуты подразделения, которые переносятся в данные пользователей
+ORG_ATTRIBUTE_COLUMNS = [
+    'Код ТБ',
+    'Полное ТБ',
+    'Короткое ТБ',
+    'Код ГОСБ',
+    'Полное ГОСБ',
+    'Короткое ГОСБ'
+]
+
+
+class OrgIndex:
+    """
+    Индекс организационной структуры для быстрого доступа к подразделениям.
+
+    Строится один раз из DataFrame листа ORG и заменяет поиск по DataFrame
+    для каждого пользователя:
+    - код подразделения -> номер строки индекса (O(1))
+    - номер строки -> кортеж атрибутов подразделения (ТБ, ГОСБ)
+    - иерархия ТБ -> ГОСБ -> массив номеров строк подразделений
+
+    Коды подразделений сравниваются как строки, поэтому индекс одинаково
+    работает с кодами, загруженными из CSV (строки) и из Excel (числа).
+    """
+
+    def __init__(self, org_data: pd.DataFrame) -> None:
+        """
+        Построение индекса.
+
+        Args:
+            org_data: DataFrame с данными организационных единиц (из листа ORG)
+
+        Raises:
+            ValueError: Если отсутствуют необходимые колонки
+        """
+        required_columns = ['Код подразделения'] + ORG_ATTRIBUTE_COLUMNS
+        missing_columns = [col for col in required_columns if col not in org_data.columns]
+        if missing_columns:
+            raise ValueError(f"Отсутствуют необходимые колонки в данных ORG: {missing_columns}")
+
+        # Оставляем первое вхождение каждого подразделения (как при поиске через .iloc[0])
+        unit_codes_all = org_data['Код подразделения'].astype(str)
+        unique_units = org_data.loc[~unit_codes_all.duplicated().to_numpy()]
+
+        # Исходные значения кодов (для записи в данные) и их строковые представления (для поиска)
+        self.unit_values: List = unique_units['Код подразделения'].tolist()
+        self.unit_codes: List[str] = [str(unit) for unit in self.unit_values]
+        self.row_by_code: Dict[str, int] = {code: row for row, code in enumerate(self.unit_codes)}
+        self.num_units = len(self.unit_codes)
+
+        # Предвычисленные кортежи атрибутов в порядке ORG_ATTRIBUTE_COLUMNS
+        self.attributes: List[tuple] = list(zip(*(unique_units[col].tolist() for col in ORG_ATTRIBUTE_COLUMNS)))
+
+        # Целочисленные идентификаторы ТБ и ГОСБ для каждой строки индекса.
+        # Код ГОСБ не уникален между ТБ (например, '0'), поэтому ГОСБ идентифицируется парой (ТБ, ГОСБ)
+        tb_codes = unique_units['Код ТБ'].astype(str)
+        gosb_keys = tb_codes + '|' + unique_units['Код ГОСБ'].astype(str)
+        tb_ids, tb_uniques = pd.factorize(tb_codes)
+        gosb_ids, _ = pd.factorize(gosb_keys)
+        self.tb_ids: np.ndarray = tb_ids.astype(np.int32)
+        self.gosb_ids: np.ndarray = gosb_ids.astype(np.int32)
+        self.tb_codes: List[str] = tb_uniques.tolist()
+
+        # Иерархия ТБ -> ГОСБ -> массив номеров строк подразделений
+        self.hierarchy: Dict[str, Dict[str, np.ndarray]] = {}
+        rows_by_gosb = pd.Series(np.arange(self.num_units)).groupby(
+            [tb_codes.to_numpy(), unique_units['Код ГОСБ'].astype(str).to_numpy()], sort=False
+        )
+        for (tb_code, gosb_code), rows in rows_by_gosb:
+            self.hierarchy.setdefault(tb_code, {})[gosb_code] = rows.to_numpy(dtype=np.int32)
+
+        # Колонки в виде массивов для векторного соединения с пользователями по номеру строки
+        self.unit_value_array: np.ndarray = np.array(self.unit_values, dtype=object)
+        self.attribute_arrays: Dict[str, np.ndarray] = {
+            col: unique_units[col].to_numpy(dtype=object) for col in ORG_ATTRIBUTE_COLUMNS
+        }
+
+    def row_of(self, org_unit) -> int:
+        """
+        Получение номера строки индекса по коду подразделения.
+
+        Args:
+            org_unit: Код подразделения (строка или число)
+
+        Returns:
+            Номер строки индекса
+
+        Raises:
+            KeyError: Если подразделение отсутствует в данных ORG
+        """
+        return self.row_by_code[str(org_unit)]
+
+    def get_attributes(self, org_unit) -> tuple:
+        """
+        Получение атрибутов подразделения (в порядке ORG_ATTRIBUTE_COLUMNS).
+
+        Args:
+            org_unit: Код подразделения (строка или число)
+
+        Returns:
+            Кортеж атрибутов подразделения
+        """
+        return self.attributes[self.row_of(org_unit)]
+
+    def attributes_frame(self, rows: np.ndarray, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Векторное получение кода и атрибутов подразделений по массиву номеров строк.
+
+        Args:
+            rows: Массив номеров строк индекса (по одному на пользователя)
+            columns: Колонки атрибутов (None - все ORG_ATTRIBUTE_COLUMNS)
+
+        Returns:
+            DataFrame с колонкой 'Код подразделения' и выбранными колонками атрибутов
+        """
+        frame = {'Код подразделения': self.unit_value_array[rows]}
+        frame.update({
+            col: values[rows] for col, values in self.attribute_arrays.items() if columns is None or col in columns
+        })
+        return pd.DataFrame(frame)
+
+    def units_in_tb(self, tb_code) -> np.ndarray:
+        """
+        Получение номеров строк всех подразделений ТБ.
+
+        Args:
+            tb_code: Код ТБ
+
+        Returns:
+            Массив номеров строк подразделений (пустой, если ТБ отсутствует)
+        """
+        gosb_map = self.hierarchy.get(str(tb_code), {})
+        if not gosb_map:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate(list(gosb_map.values()))
+
+    def units_in_gosb(self, tb_code, gosb_code) -> np.ndarray:
+        """
+        Получение номеров строк всех подразделений ГОСБ внутри ТБ.
+
+        Args:
+            tb_code: Код ТБ
+            gosb_code: Код ГОСБ
+
+        Returns:
+            Массив номеров строк подразделений (пустой, если ГОСБ отсутствует)
+        """
+        return self.hierarchy.get(str(tb_code), {}).get(str(gosb_code), np.empty(0, dtype=np.int32))
+
+
+# ============================================================================
+# МОДУЛЬ УНИКАЛЬНЫХ ИДЕНТИФИКАТОРОВ
+# ============================================================================
+
+class KeyedPermutation:
+    """
+    Ключевая псевдослучайная перестановка диапазона [0, domain_size).
+
+    Реализована сетью Фейстеля над ближайшей степенью двойки с "прогулкой по циклу"
+    (cycle walking): значения за пределами диапазона повторно шифруются, пока не
+    попадут в диапазон. Перестановка биективна, поэтому позиции 0, 1, 2, ...
+    отображаются в различные значения без хранения уже выданных значений.
+    """
+
+    # Константы перемешивания (splitmix64)
+    _MIX_MULTIPLIER_1 = np.uint64(0x9E3779B97F4A7C15)
+    _MIX_MULTIPLIER_2 = np.uint64(0xBF58476D1CE4E5B9)
+
+    def __init__(self, domain_size: int, key: int, rounds: int = 4) -> None:
+        """
+        Инициализация перестановки.
+
+        Args:
+            domain_size: Размер переставляемого диапазона
+            key: Ключ перестановки (разные ключи дают разные перестановки)
+            rounds: Количество раундов сети Фейстеля
+
+        Raises:
+            ValueError: Если размер диапазона не положительный
+        """
+        if domain_size <= 0:
+            raise ValueError(f"Размер диапазона перестановки должен быть положительным: {domain_size}")
+        self.domain_size = int(domain_size)
+        self.half_bits = max(1, ((self.domain_size - 1).bit_length() + 1) // 2)
+        self.half_mask = np.uint64((1 << self.half_bits) - 1)
+        self.round_keys = np.random.SeedSequence(key).generate_state(rounds, dtype=np.uint64)
+
+    def _round_function(self, right: np.ndarray, round_key: np.uint64) -> np.ndarray:
+        """
+        Раундовая функция сети Фейстеля (перемешивание половины блока с ключом раунда).
+
+        Args:
+            right: Правая половина блока
+            round_key: Ключ раунда
+
+        Returns:
+            Значение для XOR с левой половиной блока
+        """
+        value = (right + round_key) * self._MIX_MULTIPLIER_1
+        value ^= value >> np.uint64(29)
+        value *= self._MIX_MULTIPLIER_2
+        value ^= value >> np.uint64(32)
+        return value & self.half_mask
+
+    def _encrypt(self, values: np.ndarray) -> np.ndarray:
+        """
+        Перестановка значений в диапазоне [0, 2 ** (2 * half_bits)).
+
+        Args:
+            values: Массив значений (uint64)
+
+        Returns:
+            Массив переставленных значений
+        """
+        half_bits = np.uint64(self.half_bits)
+        left = values >> half_bits
+        right = values & self.half_mask
+        with np.errstate(over='ignore'):
+            for round_key in self.round_keys:
+                left, right = right, left ^ self._round_function(right, round_key)
+        return (left << half_bits) | right
+
+    def permute(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Векторное получение значений перестановки для массива позиций.
+
+        Args:
+            positions: Массив позиций в диапазоне [0, domain_size)
+
+        Returns:
+            Массив значений перестановки (int64) в диапазоне [0, domain_size)
+        """
+        values = self._encrypt(np.asarray(positions, dtype=np.uint64))
+        domain_size = np.uint64(self.domain_size)
+        outside = values >= domain_size
+        while outside.any():
+            values[outside] = self._encrypt(values[outside])
+            outside = values >= domain_size
+        return values.astype(np.int64)
+
+
+class TabNumberAllocator:
+    """
+    Распределитель уникальных табельных номеров без повторных попыток.
+
+    Номера выдаются по порядку позиций ключевой перестановки диапазона
+    [min_value, max_value]: каждая выдача - это сдвиг счетчика позиции, поэтому
+    память не зависит от количества выданных номеров, а коллизии невозможны.
+    """
+
+    def __init__(self, min_value: int, max_value: int, key: int) -> None:
+        """
+        Инициализация распределителя.
+
+        Args:
+            min_value: Минимальный табельный номер (включительно)
+            max_value: Максимальный табельный номер (включительно)
+            key: Ключ перестановки
+        """
+        self.min_value = min_value
+        self.max_value = max_value
+        self.permutation = KeyedPermutation(max_value - min_value + 1, key)
+        self.position = 0  # Следующая невыданная позиция перестановки
+
+    @property
+    def remaining(self) -> int:
+        """Количество еще не выданных номеров."""
+        return self.permutation.domain_size - self.position
+
+    def allocate(self, count: int) -> np.ndarray:
+        """
+        Выдача нескольких уникальных табельных номеров за одну операцию.
+
+        Args:
+            count: Количество номеров
+
+        Returns:
+            Массив табельных номеров (int64)
+
+        Raises:
+            ValueError: Если в диапазоне недостаточно невыданных номеров
+        """
+        if count > self.remaining:
+            raise ValueError(
+                f"Диапазон табельных номеров {self.min_value}..{self.max_value} исчерпан: "
+                f"запрошено {count}, осталось {self.remaining}"
+            )
+        positions = np.arange(self.position, self.position + count, dtype=np.uint64)
+        self.position += count
+        return self.permutation.permute(positions) + self.min_value
+
+    def allocate_one(self) -> int:
+        """
+        Выдача одного уникального табельного номера.
+
+        Returns:
+            Табельный номер
+        """
+        return int(self.allocate(1)[0])
+
+
+class CombinationAllocator:
+    """
+    Распределитель уникальных комбинаций значений нескольких списков без повторных попыток.
+
+    Комбинация кодируется одним целым числом в смешанной системе счисления:
+    для трех списков (a * len_b + b) * len_c + c. Комбинации выдаются по порядку
+    позиций ключевой перестановки этого пространства, т.е. выборка без возвращения
+    не требует хранения выданных комбинаций.
+
+    После исчерпания пространства выдача детерминированно продолжается следующим
+    кругом той же перестановки (номер круга возвращается вместе с индексами и
+    добавляется к строкам в скобках: "... (2)", "... (3)").
+    """
+
+    def __init__(self, value_lists: List[List[str]], key: int) -> None:
+        """
+        Инициализация распределителя.
+
+        Args:
+            value_lists: Списки значений компонент комбинации (повторы удаляются)
+            key: Ключ перестановки
+
+        Raises:
+            ValueError: Если один из списков пуст
+        """
+        self.values = [np.array(list(dict.fromkeys(values)), dtype=object) for values in value_lists]
+        self.capacity = math.prod(len(values) for values in self.values)
+        if self.capacity == 0:
+            raise ValueError(f"Пустой список значений комбинации: размеры списков {[len(values) for values in self.values]}")
+        self.permutation = KeyedPermutation(self.capacity, key)
+        self.position = 0  # Следующая невыданная позиция (с учетом кругов переполнения)
+
+    def allocate_indexes(self, count: int) -> tuple:
+        """
+        Выдача индексов нескольких уникальных комбинаций за одну операцию.
+
+        Args:
+            count: Количество комбинаций
+
+        Returns:
+            Кортеж (список массивов индексов по компонентам, номер круга)
+        """
+        positions = np.arange(self.position, self.position + count, dtype=np.int64)
+        self.position += count
+        overflow_rounds = positions // self.capacity
+        packed = self.permutation.permute(positions % self.capacity)
+        indexes = []
+        for values in reversed(self.values[1:]):
+            packed, index = np.divmod(packed, len(values))
+            indexes.append(index)
+        indexes.append(packed)
+        return indexes[::-1], overflow_rounds
+
+    @staticmethod
+    def mark_rounds(strings: np.ndarray, overflow_rounds: np.ndarray) -> np.ndarray:
+        """
+        Добавление номера круга в скобках к строкам кругов переполнения: "... (2)", "... (3)".
+
+        Args:
+            strings: Массив строк (object)
+            overflow_rounds: Номера кругов (0 - без номера в скобках)
+
+        Returns:
+            Массив строк
+        """
+        overflow = overflow_rounds > 0
+        if overflow.any():
+            strings[overflow] = strings[overflow] + ' (' + (overflow_rounds[overflow] + 1).astype(str).astype(object) + ')'
+        return strings
+
+
+class FioAllocator(CombinationAllocator):
+    """
+    Распределитель уникальных ФИО без повторных попыток.
+
+    Комбинации (фамилия, имя, отчество) выдаются CombinationAllocator по трем спискам;
+    после исчерпания пространства ФИО получают номер круга в скобках: "... (2)", "... (3)".
+    """
+
+    def __init__(self, name_data: Dict, key: int) -> None:
+        """
+        Инициализация распределителя.
+
+        Args:
+            name_data: Словарь с ключами 'surnames', 'first_names', 'patronymics'
+            key: Ключ перестановки
+        """
+        super().__init__([name_data['surnames'], name_data['first_names'], name_data['patronymics']], key)
+        self.surnames, self.first_names, self.patronymics = self.values
+
+    def allocate_indexes(self, count: int) -> tuple:
+        """
+        Выдача индексов нескольких уникальных ФИО за одну операцию.
+
+        Args:
+            count: Количество ФИО
+
+        Returns:
+            Кортеж массивов (индекс фамилии, индекс имени, индекс отчества, номер круга)
+        """
+        indexes, overflow_rounds = super().allocate_indexes(count)
+        return (*indexes, overflow_rounds)
+
+    def format(
+        self,
+        surname_idx: np.ndarray,
+        first_name_idx: np.ndarray,
+        patronymic_idx: np.ndarray,
+        overflow_rounds: np.ndarray
+    ) -> np.ndarray:
+        """
+        Сборка строк ФИО по индексам.
+
+        Args:
+            surname_idx: Индексы фамилий
+            first_name_idx: Индексы имен
+            patronymic_idx: Индексы отчеств
+            overflow_rounds: Номера кругов (0 - без номера в скобках)
+
+        Returns:
+            Массив ФИО в формате "Фамилия Имя Отчество"
+        """
+        fio = self.surnames[surname_idx] + ' ' + self.first_names[first_name_idx] + ' ' + self.patronymics[patronymic_idx]
+        return self.mark_rounds(fio, overflow_rounds)
+
+    def allocate(self, count: int) -> np.ndarray:
+        """
+        Выдача нескольких уникальных ФИО за одну операцию.
+
+        Args:
+            count: Количество ФИО
+
+        Returns:
+            Массив ФИО
+        """
+        return self.format(*self.allocate_indexes(count))
+
+    def allocate_one(self) -> str:
+        """
+        Выдача одного уникального ФИО.
+
+        Returns:
+            ФИО в формате "Фамилия Имя Отчество"
+        """
+        return str(self.allocate(1)[0])
+
+
+class InnAllocator:
+    """
+    Распределитель уникальных ИНН с контрольными цифрами без повторных попыток.
+
+    Тело ИНН (цифры без контрольных) выдается по порядку позиций ключевой
+    перестановки диапазона тел с кодом региона от 01 в первых двух цифрах.
+    Контрольные цифры вычисляются векторно, поэтому различные тела дают
+    различные ИНН:
+    - организация: 10 цифр (9 цифр тела и контрольная цифра)
+    - ИП: 12 цифр (10 цифр тела и две контрольные цифры)
+    """
+
+    # Весовые коэффициенты контрольных цифр ИНН
+    ORGANIZATION_WEIGHTS = (2, 4, 10, 3, 5, 9, 4, 6, 8)
+    PERSON_WEIGHTS_11 = (7, 2, 4, 10, 3, 5, 9, 4, 6, 8)
+    PERSON_WEIGHTS_12 = (3, 7, 2, 4, 10, 3, 5, 9, 4, 6, 8)
+
+    def __init__(self, individual: bool, key: int) -> None:
+        """
+        Инициализация распределителя.
+
+        Args:
+            individual: True - ИНН ИП (12 цифр), False - ИНН организации (10 цифр)
+            key: Ключ перестановки
+        """
+        self.individual = individual
+        self.length = 12 if individual else 10
+        body_digits = self.length - (2 if individual else 1)
+        self.min_body = 10 ** (body_digits - 2)  # Код региона 01
+        self.permutation = KeyedPermutation(10 ** body_digits - self.min_body, key)
+        self.position = 0  # Следующая невыданная позиция перестановки
+
+    @property
+    def remaining(self) -> int:
+        """Количество еще не выданных ИНН."""
+        return self.permutation.domain_size - self.position
+
+    @staticmethod
+    def check_digit(values: np.ndarray, weights: tuple) -> np.ndarray:
+        """
+        Векторное вычисление контрольной цифры: взвешенная сумма цифр по модулю 11, затем по модулю 10.
+
+        Args:
+            values: Числа из len(weights) цифр (с лидирующими нулями)
+            weights: Весовые коэффициенты цифр, начиная со старшей
+
+        Returns:
+            Массив контрольных цифр (int64)
+        """
+        total = np.zeros(len(values), dtype=np.int64)
+        for power, weight in enumerate(reversed(weights)):
+            total += (values // 10 ** power) % 10 * weight
+        return total % 11 % 10
+
+    def allocate(self, count: int) -> np.ndarray:
+        """
+        Выдача нескольких уникальных ИНН за одну операцию.
+
+        Args:
+            count: Количество ИНН
+
+        Returns:
+            Массив ИНН (int64, без лидирующих нулей)
+
+        Raises:
+            ValueError: Если в диапазоне недостаточно невыданных ИНН
+        """
+        if count > self.remaining:
+            raise ValueError(f"Диапазон ИНН длины {self.length} исчерпан: запрошено {count}, осталось {self.remaining}")
+        positions = np.arange(self.position, self.position + count, dtype=np.uint64)
+        self.position += count
+        bodies = self.permutation.permute(positions) + self.min_body
+        if not self.individual:
+            return bodies * 10 + self.check_digit(bodies, self.ORGANIZATION_WEIGHTS)
+        bodies = bodies * 10 + self.check_digit(bodies, self.PERSON_WEIGHTS_11)
+        return bodies * 10 + self.check_digit(bodies, self.PERSON_WEIGHTS_12)
+
+
+# ============================================================================
+# МОДУЛЬ ГЕНЕРАЦИИ ПОЛЬЗОВАТЕЛЕЙ
+# ============================================================================
+
+import copy
+
+# Функция для преобразования мужской фамилии в женскую
+def _convert_to_female_surname(male_surname: str) -> str:
+    """
+    Преобразование мужской фамилии в женскую.
+    
+    Правила:
+    - Фамилии на "ов", "ев", "ин" -> добавляем "а"
+    - Фамилии на "ий", "ой" -> заменяем на "ая"
+    - Остальные -> добавляем "а"
+    """
+    if male_surname.endswith('ий') or male_surname.endswith('ой'):
+        return male_surname[:-2] + 'ая'
+    elif male_surname.endswith('ов') or male_surname.endswith('ев') or male_surname.endswith('ин'):
+        return male_surname + 'а'
+    else:
+        return male_surname + 'а'
+
+
+# Колонки листа пользователей в порядке вывода
+USER_COLUMNS = ['Табельный номер', 'ФИО', 'Бизнес-блок', 'Код подразделения'] + ORG_ATTRIBUTE_COLUMNS
+
+# Схемы листа пользователей: атрибуты подразделений полностью, только код подразделения
+# или формулы поиска по листу ORG
+USER_SCHEMA_MODES = ('denormalized', 'normalized', 'formulas')
+
+# Коды пола в UserStore (индекс в кортеже; -1 - специальный пользователь без пола)
+USER_GENDERS = ('male', 'female')
+
+
+class UserVocabulary:
+    """
+    Справочники для преобразования кодов UserStore в строки.
+    
+    Хранится один раз на генератор: индекс ORG, названия блоков,
+    списки имен (через распределители ФИО) и варианты "Серой зоны".
+    """
+    
+    def __init__(
+        self,
+        org_index: OrgIndex,
+        block_names: List[str],
+        fio_allocators: Dict[str, FioAllocator],
+        gray_tab_numbers: List[str],
+        gray_fio_options: List[str],
+        total_length: int
+    ) -> None:
+        """
+        Инициализация справочников.
+        
+        Args:
+            org_index: Индекс организационной структуры
+            block_names: Названия бизнес-блоков (по кодам блоков UserStore)
+            fio_allocators: Распределители ФИО по полу (содержат списки имен)
+            gray_tab_numbers: Варианты табельных номеров "Серой зоны"
+            gray_fio_options: Варианты ФИО "Серой зоны"
+            total_length: Длина табельного номера с лидирующими нулями
+        """
+        self.org_index = org_index
+        self.block_names = np.array(block_names, dtype=object)
+        self.fio_allocators = fio_allocators
+        self.gray_tab_numbers = np.array(gray_tab_numbers, dtype=object)
+        self.gray_fio_options = np.array(gray_fio_options, dtype=object)
+        self.total_length = total_length
+
+
+class UserStore:
+    """
+    Колоночное хранилище сгенерированных пользователей.
+    
+    Пользователь хранится кодами фиксированной ширины (около 22 байт):
+    табельный номер uint32, номер строки OrgIndex, коды блока и пола,
+    индексы фамилии, имени и отчества и номер круга ФИО. Строки собираются
+    только при выводе (to_frame) по справочникам UserVocabulary.
+    
+    Специальные пользователи "Серая зона" хранятся индексами вариантов
+    табельного номера и ФИО (gray_tab, gray_fio), для обычных пользователей -1.
+    """
+    
+    # Колонки хранилища и их типы
+    FIELDS = {
+        'tab_number': np.uint32,
+        'unit_row': np.int32,
+        'block': np.int8,
+        'gender': np.int8,
+        'surname': np.int16,
+        'first_name': np.int16,
+        'patronymic': np.int16,
+        'fio_round': np.int32,
+        'gray_tab': np.int8,
+        'gray_fio': np.int8
+    }
+    
+    def __init__(self, vocabulary: Optional[UserVocabulary] = None, **columns: np.ndarray) -> None:
+        """
+        Создание хранилища из массивов колонок.
+        
+        Args:
+            vocabulary: Справочники для вывода строк (не передаются между процессами)
+            **columns: Массивы всех колонок FIELDS одинаковой длины
+            
+        Raises:
+            ValueError: Если набор колонок неполный или длины различаются
+        """
+        missing_columns = [name for name in self.FIELDS if name not in columns]
+        if missing_columns or len({len(values) for values in columns.values()}) > 1:
+            raise ValueError(f"Некорректные колонки хранилища пользователей: отсутствуют {missing_columns}")
+        self.vocabulary = vocabulary
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.asarray(columns[name], dtype=dtype))
+    
+    @classmethod
+    def concat(cls, stores: List['UserStore'], vocabulary: Optional[UserVocabulary] = None) -> 'UserStore':
+        """
+        Объединение нескольких хранилищ.
+        
+        Args:
+            stores: Список хранилищ
+            vocabulary: Справочники результата (по умолчанию - из первого хранилища)
+            
+        Returns:
+            Объединенное хранилище
+        """
+        if vocabulary is None and stores:
+            vocabulary = stores[0].vocabulary
+        return cls(vocabulary, **{
+            name: np.concatenate([store.columns[name] for store in stores]) if stores else np.empty(0, dtype=dtype)
+            for name, dtype in cls.FIELDS.items()
+        })
+    
+    def __len__(self) -> int:
+        return len(self.unit_row)
+    
+    def __getstate__(self) -> Dict:
+        # Справочники не передаются между процессами вместе с данными
+        return {**self.__dict__, 'vocabulary': None}
+    
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Словарь колонок хранилища: имя -> массив."""
+        return {name: getattr(self, name) for name in self.FIELDS}
+    
+    @property
+    def nbytes(self) -> int:
+        """Объем памяти колонок в байтах."""
+        return sum(values.nbytes for values in self.columns.values())
+    
+    def take(self, rows: np.ndarray) -> 'UserStore':
+        """
+        Выборка пользователей по номерам строк (без сборки строк).
+        
+        Args:
+            rows: Массив номеров строк или срез
+            
+        Returns:
+            Новое хранилище
+        """
+        return UserStore(self.vocabulary, **{name: values[rows] for name, values in self.columns.items()})
+    
+    def to_frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Сборка строк пользователей по справочникам.
+        
+        Args:
+            columns: Колонки из USER_COLUMNS (None - все); атрибуты подразделений
+                вне списка не собираются
+        
+        Returns:
+            DataFrame с выбранными колонками в указанном порядке
+        """
+        columns = columns or USER_COLUMNS
+        vocabulary = self.vocabulary
+        count = len(self)
+        special = self.gray_tab >= 0
+        
+        tab_numbers = np.empty(count, dtype=object)
+        tab_numbers[~special] = pd.Series(self.tab_number[~special]).astype(str).str.zfill(vocabulary.total_length).to_numpy(dtype=object)
+        tab_numbers[special] = vocabulary.gray_tab_numbers[self.gray_tab[special]]
+        
+        fio = np.empty(count, dtype=object)
+        for gender_code, gender in enumerate(USER_GENDERS):
+            mask = self.gender == gender_code
+            fio[mask] = vocabulary.fio_allocators[gender].format(
+                self.surname[mask], self.first_name[mask], self.patronymic[mask], self.fio_round[mask]
+            )
+        fio[special] = vocabulary.gray_fio_options[self.gray_fio[special]]
+        
+        users = pd.DataFrame({
+            'Табельный номер': tab_numbers,
+            'ФИО': fio,
+            'Бизнес-блок': vocabulary.block_names[self.block]
+        })
+        attributes = vocabulary.org_index.attributes_frame(self.unit_row, [col for col in columns if col in ORG_ATTRIBUTE_COLUMNS])
+        return pd.concat([users, attributes], axis=1)[columns]
+
+
+class UserStatistics:
+    """
+    Накопитель статистики пользователей по кодам (без сборки строк).
+    
+    Все разрезы (блок, ТБ, ГОСБ, пол) получаются из одного массива счетчиков
+    блок x ГОСБ x пол, который заполняется одним np.bincount на порцию
+    пользователей. Разрезы по ТБ суммируются из разрезов по ГОСБ.
+    """
+    
+    # Индексы пола в массиве счетчиков (специальные пользователи - без пола)
+    GENDER_SLOTS = 3
+    
+    def __init__(self, org_index: OrgIndex, block_names: List[str]) -> None:
+        """
+        Инициализация накопителя.
+        
+        Args:
+            org_index: Индекс организационной структуры
+            block_names: Названия бизнес-блоков (по кодам блоков UserStore)
+        """
+        self.org_index = org_index
+        self.block_names = list(block_names)
+        
+        # ГОСБ идентифицируется парой (ТБ, ГОСБ): первая строка индекса каждого ГОСБ дает его атрибуты
+        gosb_ids, self.gosb_rows = np.unique(org_index.gosb_ids, return_index=True)
+        self.num_gosb = len(gosb_ids)
+        self.gosb_tb_ids = org_index.tb_ids[self.gosb_rows]
+        self.counts = np.zeros((len(self.block_names), self.num_gosb, self.GENDER_SLOTS), dtype=np.int64)
+    
+    def add(self, block: np.ndarray, unit_row: np.ndarray, gender: np.ndarray) -> None:
+        """
+        Добавление порции пользователей (одна агрегация np.bincount).
+        
+        Args:
+            block: Коды бизнес-блоков
+            unit_row: Номера строк OrgIndex
+            gender: Коды пола (USER_GENDERS; -1 - без пола)
+        """
+        gender_slot = np.where(gender < 0, self.GENDER_SLOTS - 1, gender).astype(np.int64)
+        gosb = self.org_index.gosb_ids[unit_row].astype(np.int64)
+        keys = (block.astype(np.int64) * self.num_gosb + gosb) * self.GENDER_SLOTS + gender_slot
+        self.counts += np.bincount(keys, minlength=self.counts.size).reshape(self.counts.shape)
+    
+    def add_store(self, store: UserStore) -> None:
+        """
+        Добавление пользователей из колоночного хранилища.
+        
+        Args:
+            store: Хранилище пользователей
+        """
+        self.add(store.block, store.unit_row, store.gender)
+    
+    def report(self) -> Dict:
+        """
+        Построение отчета по накопленным счетчикам.
+        
+        Returns:
+            Словарь со сводными показателями и разрезами (пригоден для записи в JSON)
+        """
+        attributes = {col: values[self.gosb_rows] for col, values in self.org_index.attribute_arrays.items()}
+        male_slot = USER_GENDERS.index('male')
+        female_slot = USER_GENDERS.index('female')
+        
+        def counters(counts: np.ndarray) -> Dict:
+            return {
+                'total': int(counts.sum()),
+                'male': int(counts[..., male_slot].sum()),
+                'female': int(counts[..., female_slot].sum())
+            }
+        
+        block_gosb = self.counts.sum(axis=2)
+        gosb_totals = block_gosb.sum(axis=0)
+        tb_totals = np.bincount(self.gosb_tb_ids, weights=gosb_totals, minlength=len(self.org_index.tb_codes))
+        
+        by_block = [
+            {'block': name, **counters(self.counts[block_index])}
+            for block_index, name in enumerate(self.block_names)
+            if block_gosb[block_index].sum() > 0
+        ]
+        
+        by_gosb = [
+            {'gosb_name': attributes['Полное ГОСБ'][gosb], 'gosb_code': attributes['Код ГОСБ'][gosb], 'total': int(gosb_totals[gosb])}
+            for gosb in np.argsort(-gosb_totals, kind='stable').tolist()
+            if gosb_totals[gosb] > 0
+        ]
+        
+        by_block_tb = []
+        by_block_tb_gosb = []
+        for block_index, name in enumerate(self.block_names):
+            for tb_id in np.unique(self.gosb_tb_ids).tolist():
+                tb_gosb = np.flatnonzero(self.gosb_tb_ids == tb_id)
+                tb_counts = self.counts[block_index, tb_gosb]
+                if tb_counts.sum() == 0:
+                    continue
+                first_gosb = tb_gosb[0]
+                tb_fields = {'block': name, 'tb_name': attributes['Полное ТБ'][first_gosb], 'tb_code': attributes['Код ТБ'][first_gosb]}
+                by_block_tb.append({**tb_fields, **counters(tb_counts)})
+                for gosb in tb_gosb.tolist():
+                    if self.counts[block_index, gosb].sum() > 0:
+                        by_block_tb_gosb.append({
+                            **tb_fields,
+                            'gosb_name': attributes['Полное ГОСБ'][gosb],
+                            'gosb_code': attributes['Код ГОСБ'][gosb],
+                            **counters(self.counts[block_index, gosb])
+                        })
+        
+        # Порядок разрезов как у сортировки groupby: блок -> ТБ -> ГОСБ
+        by_block.sort(key=lambda item: item['block'])
+        by_block_tb.sort(key=lambda item: (item['block'], str(item['tb_name']), str(item['tb_code'])))
+        by_block_tb_gosb.sort(key=lambda item: (
+            item['block'], str(item['tb_name']), str(item['tb_code']), str(item['gosb_name']), str(item['gosb_code'])
+        ))
+        
+        return {
+            'total': int(self.counts.sum()),
+            'blocks': len(by_block),
+            'tb': int((tb_totals > 0).sum()),
+            'gosb': len(by_gosb),
+            'by_block': by_block,
+            'by_gosb': by_gosb,
+            'by_block_tb': by_block_tb,
+            'by_block_tb_gosb': by_block_tb_gosb
+        }
+    
+    def log(self, logger: logging.Logger, report: Optional[Dict] = None) -> None:
+        """
+        Вывод отчета в DEBUG лог.
+        
+        Args:
+            logger: Логгер
+            report: Готовый отчет (если не указан, строится по счетчикам)
+        """
+        report = report or self.report()
+        logger.debug(f"=== СТАТИСТИКА ПОЛЬЗОВАТЕЛЕЙ ===")
+        logger.debug(f"Всего пользователей: {report['total']}")
+        logger.debug(f"Количество блоков: {report['blocks']}")
+        logger.debug(f"Количество ТБ: {report['tb']}")
+        logger.debug(f"Количество ГОСБ: {report['gosb']}")
+        
+        logger.debug(f"\n=== СТАТИСТИКА ПО БЛОКАМ ===")
+        for item in report['by_block']:
+            logger.debug(f"{item['block']}: всего={item['total']}, мужчин={item['male']}, женщин={item['female']}")
+        
+        logger.debug(f"\n=== СТАТИСТИКА ПО ГОСБ (количество пользователей) ===")
+        for item in report['by_gosb']:
+            logger.debug(f"{item['gosb_name']} ({item['gosb_code']}): {item['total']} пользователей")
+        
+        logger.debug(f"\n=== СТАТИСТИКА ПО БЛОКАМ И ТБ ===")
+        for item in report['by_block_tb']:
+            logger.debug(f"{item['block']} | {item['tb_name']} ({item['tb_code']}): всего={item['total']}, мужчин={item['male']}, женщин={item['female']}")
+        
+        logger.debug(f"\n=== СТАТИСТИКА ПО БЛОКАМ, ТБ И ГОСБ ===")
+        for item in report['by_block_tb_gosb']:
+            logger.debug(f"{item['block']} | {item['tb_name']} ({item['tb_code']}) | {item['gosb_name']} ({item['gosb_code']}): всего={item['total']}, мужчин={item['male']}, женщин={item['female']}")
+        
+        logger.debug(f"=== КОНЕЦ СТАТИСТИКИ ===\n")
+
+
+def _user_store_from_draws(
+    block_index: int,
+    unit_rows: np.ndarray,
+    is_male: np.ndarray,
+    tab_numbers: np.ndarray,
+    male_indexes: tuple,
+    female_indexes: tuple
+) -> UserStore:
+    """
+    Сборка хранилища пользователей блока из результатов розыгрыша и выдачи идентификаторов.
+    
+    Args:
+        block_index: Код блока (индекс в списке блоков генератора)
+        unit_rows: Номера строк OrgIndex (по одному на пользователя)
+        is_male: Маска мужчин
+        tab_numbers: Табельные номера (числа)
+        male_indexes: Индексы ФИО мужчин (результат FioAllocator.allocate_indexes)
+        female_indexes: Индексы ФИО женщин (результат FioAllocator.allocate_indexes)
+        
+    Returns:
+        Хранилище пользователей блока
+    """
+    count = len(unit_rows)
+    name_columns = [np.empty(count, dtype=np.int64) for _ in range(4)]
+    for mask, indexes in ((is_male, male_indexes), (~is_male, female_indexes)):
+        for column, values in zip(name_columns, indexes):
+            column[mask] = values
+    surname, first_name, patronymic, fio_round = name_columns
+    return UserStore(
+        tab_number=tab_numbers,
+        unit_row=unit_rows,
+        block=np.full(count, block_index),
+        gender=np.where(is_male, USER_GENDERS.index('male'), USER_GENDERS.index('female')),
+        surname=surname,
+        first_name=first_name,
+        patronymic=patronymic,
+        fio_round=fio_round,
+        gray_tab=np.full(count, -1),
+        gray_fio=np.full(count, -1)
+    )
+
+
+# Общие данные процесса-исполнителя шардов (заполняются один раз при запуске процесса)
+_USER_SHARD_CONTEXT: Dict = {}
+
+
+def _init_user_shard_worker(context: Dict) -> None:
+    """
+    Инициализация процесса-исполнителя шардов пользователей.
+    
+    Индекс ORG, параметры блоков и распределители передаются в процесс один раз,
+    а не с каждым шардом.
+    
+    Args:
+        context: Словарь с ключами 'block_codes', 'tab_number_allocator', 'fio_allocators'
+    """
+    _USER_SHARD_CONTEXT.clear()
+    _USER_SHARD_CONTEXT.update(context)
+
+
+def _generate_user_shard(task: Dict) -> Dict[str, UserStore]:
+    """
+    Генерация пользователей одного шарда подразделений.
+    
+    Пол разыгрывается при планировании шардов (по нему резервируются диапазоны ФИО).
+    Табельные номера и ФИО выдаются из непересекающихся диапазонов позиций общих
+    перестановок, поэтому значения уникальны между шардами без обмена данными.
+    
+    Args:
+        task: Словарь с ключами 'block_rows' (блок -> номера строк OrgIndex),
+            'is_male' (блок -> маска мужчин), 'tab_start' и 'fio_start' (начальные позиции диапазонов)
+        
+    Returns:
+        Словарь: код бизнес-блока -> хранилище пользователей шарда
+    """
+    context = _USER_SHARD_CONTEXT
+    
+    # Копии распределителей с начальными позициями диапазонов шарда (перестановки общие)
+    tab_number_allocator = copy.copy(context['tab_number_allocator'])
+    tab_number_allocator.position = task['tab_start']
+    fio_allocators = {}
+    for gender, allocator in context['fio_allocators'].items():
+        fio_allocators[gender] = copy.copy(allocator)
+        fio_allocators[gender].position = task['fio_start'][gender]
+    
+    stores = {}
+    for block_code, unit_rows in task['block_rows'].items():
+        is_male = task['is_male'][block_code]
+        stores[block_code] = _user_store_from_draws(
+            context['block_codes'].index(block_code),
+            unit_rows,
+            is_male,
+            tab_number_allocator.allocate(len(unit_rows)),
+            fio_allocators['male'].allocate_indexes(int(is_male.sum())),
+            fio_allocators['female'].allocate_indexes(int((~is_male).sum()))
+        )
+    return stores
+
+
+class UserGenerator:
+    """
+    Класс для генерации пользователей.
+    
+    Генерирует пользователей с уникальными табельными номерами, ФИО и распределением по подразделениям.
+    Использует библиотеки из стандартной установки Anaconda (pandas, openpyxl).
+    """
+    
+    def __init__(
+        self,
+        config: Dict,
+        org_data: pd.DataFrame,
+        output_file_base: str,
+        output_dir: str = "OUT",
+        logger: Optional[logging.Logger] = None
+    ) -> None:
+        """
+        Инициализация генератора пользователей.
+        
+        Args:
+            config: Словарь конфигурации из LOADER_CONFIG для генератора пользователей
+            org_data: DataFrame с данными организационных единиц (из листа ORG)
+            output_file_base: Базовое имя выходного Excel файла (без расширения)
+            output_dir: Директория для выходных файлов
+            logger: Логгер для записи событий
+        """
+        self.config = config
+        self.org_data = org_data
+        self.org_index = OrgIndex(org_data)  # Индекс подразделений для поиска за O(1)
+        self.output_file_base = output_file_base
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(exist_ok=True)
+        self.logger = logger or logging.getLogger(__name__)
+        
+        # Настройки Excel
+        self.sheet_name = config['sheet_name']
+        self.max_column_width = config.get('max_column_width', 100)
+        self.output_format = config.get('format', 'xlsx')  # Формат вывода листа
+        
+        # Параметры генерации из конфигурации USERS
+        self.business_blocks = config['business_blocks']
+        self.tab_number_config = config['tab_number']
+        self.gray_zone_config = config['gray_zone']
+        self.fixed_distribution = config.get('fixed_distribution', {})  # Фиксированное распределение
+        self.min_per_unit = config.get('min_per_unit', {'KMKKSB': 1, 'MNS': 1})  # Минимум блока в подразделении
+        self.block_codes = list(self.business_blocks.keys())
+        
+        # Матрица количеств пользователей (подразделения x блоки), заполняется при распределении
+        self.unit_counts: Optional[np.ndarray] = None
+        
+        # Сгенерированные пользователи (заполняется в process; в потоковом режиме не сохраняются)
+        self.users: Optional[Union[UserStore, List[Dict]]] = None
+        
+        # Режим генерации: векторный ('batch') или по одному пользователю ('single')
+        self.generation_mode = config.get('generation_mode', 'batch')
+        if self.generation_mode not in ('batch', 'single'):
+            error_msg = f"Неизвестный режим генерации пользователей: {self.generation_mode}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        # Параллельная генерация по шардам подразделений (только режим 'batch')
+        self.parallel_config = config.get('parallel', {})
+        
+        # Размер порции потоковой генерации и записи (None - без потоковой записи)
+        self.stream_batch_size = config.get('stream_batch_size')
+        
+        # Запись статистики пользователей в JSON файл (помимо DEBUG лога)
+        self.statistics_report = config.get('statistics_report', False)
+        
+        # Разбиение листа пользователей на части: None, 'rows' или колонка листа
+        self.split_config = config.get('split', {})
+        split_by = self.split_config.get('by')
+        if split_by not in (None, 'rows') and split_by not in USER_COLUMNS:
+            error_msg = f"Неизвестная политика разбиения листа пользователей: {split_by}. Допустимые: None, 'rows' или колонка из {USER_COLUMNS}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        if split_by not in (None, 'rows') and self.stream_batch_size:
+            error_msg = f"Разбиение листа пользователей по колонке {split_by} не поддерживается в потоковом режиме (stream_batch_size)"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        # Схема листа: атрибуты подразделений в каждой строке, только код подразделения или формулы к листу ORG
+        self.schema_config = config.get('schema', {})
+        self.schema_mode = self.schema_config.get('mode', 'denormalized')
+        self.keep_columns = self.schema_config.get('keep_columns', [])
+        if self.schema_mode not in USER_SCHEMA_MODES:
+            error_msg = f"Неизвестная схема листа пользователей: {self.schema_mode}. Допустимые: {list(USER_SCHEMA_MODES)}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        unknown_columns = [col for col in self.keep_columns if col not in ORG_ATTRIBUTE_COLUMNS]
+        if unknown_columns:
+            error_msg = f"Колонки keep_columns отсутствуют среди атрибутов подразделений: {unknown_columns}. Допустимые: {ORG_ATTRIBUTE_COLUMNS}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        if self.schema_mode == 'formulas' and (self.output_format != 'xlsx' or split_by not in (None, 'rows')):
+            error_msg = "Схема 'formulas' требует формат xlsx и листа ORG в той же книге (разбиение по колонке на файлы не поддерживается)"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        # Генератор случайных чисел: единственный источник случайности генерации
+        # (при заданном seed результат воспроизводится)
+        self.seed = config.get('seed')
+        self.rng = np.random.default_rng(self.seed)
+        
+        # Данные для генерации ФИО
+        self.male_data = config['male_data']
+        self.female_data = config['female_data']
+        
+        # Уникальные табельные номера: выдаются по ключевой перестановке диапазона
+        self.tab_number_allocator = TabNumberAllocator(
+            min_value=10 ** (self.tab_number_config['min_digits'] - 1),  # 1000
+            max_value=10 ** self.tab_number_config['max_digits'] - 1,  # 9999999
+            key=int(self.rng.integers(2 ** 63))
+        )
+        
+        # Уникальные ФИО: выдаются по ключевой перестановке пространства комбинаций для каждого пола
+        self.fio_allocators = {
+            'male': FioAllocator(self.male_data, key=int(self.rng.integers(2 ** 63))),
+            'female': FioAllocator(self.female_data, key=int(self.rng.integers(2 ** 63)))
+        }
+        
+        # Колоночное хранилище: табельный номер uint32, индексы имен int16
+        if self.tab_number_allocator.max_value >= 2 ** 32:
+            error_msg = f"Табельные номера более 9 значащих цифр не поддерживаются: max_digits={self.tab_number_config['max_digits']}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        for gender, allocator in self.fio_allocators.items():
+            if max(len(allocator.surnames), len(allocator.first_names), len(allocator.patronymics)) >= 2 ** 15:
+                error_msg = f"Слишком большой список имен для пола {gender}: допускается не более {2 ** 15 - 1} значений"
+                self.logger.error(error_msg)
+                raise ValueError(error_msg)
+        
+        # Справочники для сборки строк из колоночного хранилища пользователей
+        self.vocabulary = UserVocabulary(
+            org_index=self.org_index,
+            block_names=[self.business_blocks[block_code]['name'] for block_code in self.block_codes],
+            fio_allocators=self.fio_allocators,
+            gray_tab_numbers=self.gray_zone_config['tab_numbers'],
+            gray_fio_options=self.gray_zone_config['fio_options'],
+            total_length=self.tab_number_config['total_length']
+        )
+    
+    def _generate_tab_number(self) -> str:
+        """
+        Генерация уникального табельного номера.
+        
+        Табельный номер: от 4 до 7 значащих цифр (больше 999), 
+        записывается как текст с лидирующими нулями до 8 знаков.
+        
+        Returns:
+            Табельный номер в формате строки с лидирующими нулями
+        """
+        try:
+            num = self.tab_number_allocator.allocate_one()
+        except ValueError as e:
+            self.logger.error(str(e))
+            raise
+        # Форматируем с лидирующими нулями до 8 знаков
+        return str(num).zfill(self.tab_number_config['total_length'])
+    
+    def _generate_fio(self, gender: str) -> str:
+        """
+        Генерация уникального ФИО.
+        
+        Args:
+            gender: Пол ('male' или 'female')
+            
+        Returns:
+            ФИО в формате "Фамилия Имя Отчество"
+        """
+        return str(self._generate_fio_batch(gender, 1)[0])
+    
+    def _generate_tab_numbers_batch(self, count: int) -> np.ndarray:
+        """
+        Векторная генерация уникальных табельных номеров.
+        
+        Все номера выдаются распределителем за одну операцию без повторных попыток.
+        
+        Args:
+            count: Количество табельных номеров
+            
+        Returns:
+            Массив табельных номеров (строки с лидирующими нулями)
+            
+        Raises:
+            ValueError: Если диапазон табельных номеров исчерпан
+        """
+        numbers = self._allocate_tab_numbers(count)
+        return pd.Series(numbers).astype(str).str.zfill(self.tab_number_config['total_length']).to_numpy(dtype=object)
+    
+    def _allocate_tab_numbers(self, count: int) -> np.ndarray:
+        """
+        Выдача уникальных табельных номеров в виде чисел (для колоночного хранилища).
+        
+        Args:
+            count: Количество табельных номеров
+            
+        Returns:
+            Массив табельных номеров (int64)
+            
+        Raises:
+            ValueError: Если диапазон табельных номеров исчерпан
+        """
+        try:
+            return self.tab_number_allocator.allocate(count)
+        except ValueError as e:
+            self.logger.error(str(e))
+            raise
+    
+    def _generate_fio_batch(self, gender: str, count: int) -> np.ndarray:
+        """
+        Векторная генерация уникальных ФИО для указанного пола.
+        
+        ФИО выдаются распределителем за одну операцию без повторных попыток.
+        При исчерпании комбинаций ФИО получают номер круга в скобках.
+        
+        Args:
+            gender: Пол ('male' или 'female')
+            count: Количество ФИО
+            
+        Returns:
+            Массив ФИО в формате "Фамилия Имя Отчество"
+        """
+        return self.fio_allocators[gender].format(*self._allocate_fio_indexes(gender, count))
+    
+    def _allocate_fio_indexes(self, gender: str, count: int) -> tuple:
+        """
+        Выдача индексов уникальных ФИО для указанного пола (для колоночного хранилища).
+        
+        Args:
+            gender: Пол ('male' или 'female')
+            count: Количество ФИО
+            
+        Returns:
+            Кортеж массивов (индекс фамилии, индекс имени, индекс отчества, номер круга)
+        """
+        allocator = self.fio_allocators[gender]
+        if allocator.position <= allocator.capacity < allocator.position + count:
+            self.logger.warning(f"Исчерпаны уникальные комбинации ФИО ({gender}: {allocator.capacity}). Следующие ФИО получат номер в скобках.")
+        return allocator.allocate_indexes(count)
+    
+    def _create_users_batch(self, business_block_code: str, unit_rows: np.ndarray) -> UserStore:
+        """
+        Векторное создание пользователей бизнес-блока за один проход.
+        
+        Пол, индексы ФИО и табельные номера генерируются массивами и сохраняются
+        в колоночном хранилище; строки собираются только при выводе.
+        
+        Args:
+            business_block_code: Код бизнес-блока ('KMKKSB' или 'MNS')
+            unit_rows: Массив номеров строк OrgIndex (по одному на пользователя)
+            
+        Returns:
+            Хранилище пользователей блока
+        """
+        count = len(unit_rows)
+        block = self.business_blocks[business_block_code]
+        
+        is_male = self.rng.random(count) < block['gender_distribution']
+        male_indexes = self._allocate_fio_indexes('male', int(is_male.sum()))
+        female_indexes = self._allocate_fio_indexes('female', int((~is_male).sum()))
+        
+        return _user_store_from_draws(
+            self.block_codes.index(business_block_code),
+            unit_rows,
+            is_male,
+            self._allocate_tab_numbers(count),
+            male_indexes,
+            female_indexes
+        )
+    
+    def _create_users_parallel(self, block_rows: Dict[str, np.ndarray]) -> List[UserStore]:
+        """
+        Параллельное создание пользователей по шардам подразделений.
+        
+        Подразделения делятся на шарды по значению колонки shard_by (по умолчанию 'Код ТБ').
+        Каждый шард получает собственный поток случайных чисел (SeedSequence.spawn) и
+        непересекающиеся диапазоны позиций перестановок табельных номеров и ФИО.
+        Для ФИО каждый шард резервирует по числу своих пользователей позиций для каждого пола.
+        Шарды обрабатываются пулом процессов, результаты объединяются по блокам.
+        
+        Args:
+            block_rows: Словарь: код бизнес-блока -> номера строк OrgIndex (по одному на пользователя)
+            
+        Returns:
+            Список хранилищ пользователей (по одному на бизнес-блок, в порядке block_rows)
+            
+        Raises:
+            ValueError: Если колонка шардирования отсутствует или диапазон табельных номеров исчерпан
+        """
+        shard_column = self.parallel_config.get('shard_by', 'Код ТБ')
+        if shard_column == 'Код подразделения':
+            shard_keys = self.org_index.unit_value_array
+        elif shard_column in self.org_index.attribute_arrays:
+            shard_keys = self.org_index.attribute_arrays[shard_column]
+        else:
+            error_msg = f"Неизвестная колонка для разбиения на шарды: {shard_column}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        shard_ids, shard_values = pd.factorize(pd.Series(shard_keys).astype(str))
+        num_shards = len(shard_values)
+        
+        total_count = sum(len(rows) for rows in block_rows.values())
+        allocator = self.tab_number_allocator
+        if total_count > allocator.remaining:
+            error_msg = (
+                f"Диапазон табельных номеров {allocator.min_value}..{allocator.max_value} исчерпан: "
+                f"запрошено {total_count}, осталось {allocator.remaining}"
+            )
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        # Номера строк каждого блока, сгруппированные по шардам (устойчивая сортировка по шарду)
+        shard_parts = {}
+        for block_code, rows in block_rows.items():
+            rows_shards = shard_ids[rows]
+            order = np.argsort(rows_shards, kind='stable')
+            bounds = np.cumsum(np.bincount(rows_shards, minlength=num_shards))[:-1]
+            shard_parts[block_code] = np.split(rows[order], bounds)
+        
+        # Задания шардов с непересекающимися диапазонами позиций. Пол разыгрывается здесь
+        # собственным потоком шарда, чтобы диапазоны ФИО резервировались по фактическому
+        # количеству мужчин и женщин шарда, а не по всему количеству пользователей
+        seeds = np.random.SeedSequence(int(self.rng.integers(2 ** 63))).spawn(num_shards)
+        tab_start = allocator.position
+        fio_start = {gender: fio_allocator.position for gender, fio_allocator in self.fio_allocators.items()}
+        tasks = []
+        for shard in range(num_shards):
+            shard_rng = np.random.default_rng(seeds[shard])
+            shard_block_rows = {block_code: parts[shard] for block_code, parts in shard_parts.items()}
+            shard_is_male = {
+                block_code: shard_rng.random(len(rows)) < self.business_blocks[block_code]['gender_distribution']
+                for block_code, rows in shard_block_rows.items()
+            }
+            tasks.append({
+                'block_rows': shard_block_rows,
+                'is_male': shard_is_male,
+                'tab_start': tab_start,
+                'fio_start': dict(fio_start)
+            })
+            tab_start += sum(len(rows) for rows in shard_block_rows.values())
+            male_count = sum(int(is_male.sum()) for is_male in shard_is_male.values())
+            fio_start['male'] += male_count
+            fio_start['female'] += sum(len(is_male) for is_male in shard_is_male.values()) - male_count
+        
+        allocator.position = tab_start
+        for gender, fio_allocator in self.fio_allocators.items():
+            if fio_allocator.position <= fio_allocator.capacity < fio_start[gender]:
+                self.logger.warning(f"Исчерпаны уникальные комбинации ФИО ({gender}: {fio_allocator.capacity}). Следующие ФИО получат номер в скобках.")
+            fio_allocator.position = fio_start[gender]
+        
+        context = {
+            'block_codes': self.block_codes,
+            'tab_number_allocator': self.tab_number_allocator,
+            'fio_allocators': self.fio_allocators
+        }
+        workers = min(self.parallel_config.get('workers') or os.cpu_count() or 1, num_shards)
+        
+        self.logger.info(f"Параллельная генерация: шардов {num_shards} (по колонке '{shard_column}'), процессов {workers}")
+        self.logger.debug(f"Запуск генерации {total_count} пользователей по {num_shards} шардам [class: UserGenerator | def: _create_users_parallel]")
+        
+        if workers <= 1:
+            # Один процесс: шарды обрабатываются последовательно в текущем процессе
+            _init_user_shard_worker(context)
+            try:
+                results = [_generate_user_shard(task) for task in tasks]
+            finally:
+                _USER_SHARD_CONTEXT.clear()
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_user_shard_worker,
+                initargs=(context,)
+            ) as pool:
+                results = list(pool.map(_generate_user_shard, tasks))
+        
+        return [UserStore.concat([result[block_code] for result in results], self.vocabulary) for block_code in block_rows]
+    
+    def _create_user(self, org_unit, business_block_code: str) -> Dict:
+        """
+        Создание одного пользователя для указанного подразделения и бизнес-блока.
+        
+        Args:
+            org_unit: Код подразделения (может быть строкой или числом)
+            business_block_code: Код бизнес-блока ('KMKKSB' или 'MNS')
+            
+        Returns:
+            Словарь с данными пользователя (код пола - служебный ключ 'Пол', на лист не записывается)
+        """
+        tab_number = self._generate_tab_number()
+        gender = 'male' if self.rng.random() < self.business_blocks[business_block_code]['gender_distribution'] else 'female'
         fio = self._generate_fio(gender)
         
-        # Ищем подразделение, сравнивая как строки для надежности
-        org_row = self.org_data[self.org_data['Код подразделения'].astype(str) == str(org_unit)].iloc[0]
+        user = {
+            'Табельный номер': tab_number,
+            'ФИО': fio,
+            'Бизнес-блок': self.business_blocks[business_block_code]['name'],
+            'Код подразделения': org_unit,
+            'Пол': USER_GENDERS.index(gender)
+        }
+        # Атрибуты подразделения берем из индекса (коды сравниваются как строки)
+        user.update(zip(ORG_ATTRIBUTE_COLUMNS, self.org_index.get_attributes(org_unit)))
+        return user
+    
+    def _plan_unit_counts(self) -> np.ndarray:
+        """
+        Расчет количества пользователей каждого блока в каждом подразделении.
+        
+        Все шаги выполняются над векторами количеств по номерам строк OrgIndex:
+        1. Фиксированные количества из fixed_distribution
+        2. Минимум min_per_unit каждого блока в каждом подразделении без фиксированного распределения
+        3. Остаток каждого блока распределяется одним мультиномиальным розыгрышем
+           (равновероятно по подразделениям без фиксированного распределения)
+        
+        Returns:
+            Матрица количеств (подразделения x блоки в порядке block_codes)
+            
+        Raises:
+            ValueError: Если пользователей блока недостаточно для минимума
+        """
+        num_org_units = self.org_index.num_units
+        block_codes = self.block_codes
+        block_totals = np.array([self.business_blocks[block_code]['count'] for block_code in block_codes], dtype=np.int64)
+        
+        # ШАГ 1: Фиксированные количества из fixed_distribution
+        counts = np.zeros((num_org_units, len(block_codes)), dtype=np.int64)
+        fixed_units = np.zeros(num_org_units, dtype=bool)
+        if self.fixed_distribution:
+            self.logger.info(f"Распределение фиксированных количеств из fixed_distribution")
+            for org_unit_code, block_counts in self.fixed_distribution.items():
+                # Проверяем, что подразделение существует (сравниваем как строки)
+                row = self.org_index.row_by_code.get(str(org_unit_code))
+                if row is None:
+                    self.logger.warning(f"Подразделение {org_unit_code} из fixed_distribution не найдено в данных ORG. Пропускаем.")
+                    continue
+                fixed_units[row] = True
+                for block_index, block_code in enumerate(block_codes):
+                    if block_code in block_counts:
+                        counts[row, block_index] += block_counts[block_code]
+                        self.logger.debug(f"Фиксированное распределение: {org_unit_code} -> {block_counts[block_code]} {block_code} [class: UserGenerator | def: _plan_unit_counts]")
+            
+            fixed_totals = counts.sum(axis=0)
+            self.logger.info(f"Распределено фиксированных: {', '.join(f'{code}={total}' for code, total in zip(block_codes, fixed_totals.tolist()))}")
+        
+        # ШАГ 2: Минимум каждого блока в подразделениях без фиксированного распределения
+        free_rows = np.flatnonzero(~fixed_units)
+        min_per_unit = np.array([self.min_per_unit.get(block_code, 0) for block_code in block_codes], dtype=np.int64)
+        remaining = block_totals - counts.sum(axis=0)
+        min_totals = min_per_unit * len(free_rows)
+        
+        # Векторная проверка: остатка каждого блока должно хватить на минимум
+        shortage = min_totals > remaining
+        if shortage.any():
+            details = ', '.join(
+                f"{block_code}: требуется минимум {min_total}, доступно {available}"
+                for block_code, min_total, available in zip(
+                    np.array(block_codes)[shortage], min_totals[shortage].tolist(), remaining[shortage].tolist()
+                )
+            )
+            error_msg = f"Недостаточно пользователей после фиксированного распределения: {details}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        self.logger.info(f"Распределение минимума: {', '.join(f'{code}={minimum}' for code, minimum in zip(block_codes, min_per_unit.tolist()))} в каждое подразделение (исключено {int(fixed_units.sum())} с фиксированным распределением)")
+        counts[free_rows] += min_per_unit
+        remaining -= min_totals
+        
+        # ШАГ 3: Остаток распределяется мультиномиальным розыгрышем по подразделениям без фиксированного распределения
+        if len(free_rows) == 0:
+            self.logger.warning("Все подразделения имеют фиксированное распределение. Случайное распределение невозможно.")
+        else:
+            self.logger.info(f"Осталось для случайного распределения: {', '.join(f'{code}={count}' for code, count in zip(block_codes, remaining.tolist()))}")
+            self.logger.debug(f"Случайное распределение по {len(free_rows)} подразделениям (исключено {int(fixed_units.sum())} с фиксированным распределением) [class: UserGenerator | def: _plan_unit_counts]")
+            
+            probabilities = np.full(len(free_rows), 1.0 / len(free_rows))
+            counts[free_rows] += self.rng.multinomial(remaining, probabilities).T
+        
+        return counts
+    
+    def _distribute_users_to_org_units(self) -> Union[List[Dict], UserStore]:
+        """
+        Распределение пользователей по подразделениям.
+        
+        Количества пользователей по подразделениям рассчитываются векторно (_plan_unit_counts),
+        затем из них одним проходом формируются массивы номеров строк OrgIndex по блокам,
+        после чего пользователи создаются векторно (режим 'batch') или по одному ('single').
+        
+        Returns:
+            Колоночное хранилище пользователей (режим 'batch') или список словарей (режим 'single')
+        """
+        # Получаем список уникальных подразделений из индекса
+        org_units_raw = self.org_index.unit_values
+        num_org_units = self.org_index.num_units
+        
+        self.logger.info(f"Всего подразделений: {num_org_units}")
+        self.logger.debug(f"Распределение пользователей по {num_org_units} подразделениям [class: UserGenerator | def: _distribute_users_to_org_units]")
+        
+        # Матрица количеств (подразделения x блоки) сохраняется для следующих этапов
+        self.unit_counts = self._plan_unit_counts()
+        block_totals = dict(zip(self.block_codes, self.unit_counts.sum(axis=0).tolist()))
+        
+        # Номера строк подразделений по блокам: каждое подразделение повторяется по своему количеству
+        unit_rows = np.arange(num_org_units)
+        block_rows = {
+            block_code: np.repeat(unit_rows, self.unit_counts[:, block_index])
+            for block_index, block_code in enumerate(self.block_codes)
+        }
+        
+        # Создаем пользователей по сформированному распределению
+        if self.generation_mode == 'batch' and self.parallel_config.get('enabled', False):
+            users = self._create_users_parallel(block_rows)
+        elif self.generation_mode == 'batch':
+            users = [self._create_users_batch(block_code, rows) for block_code, rows in block_rows.items()]
+        else:
+            users = [
+                self._create_user(org_units_raw[row], block_code)
+                for block_code, rows in block_rows.items()
+                for row in rows.tolist()
+            ]
+        num_users = sum(block_totals.values())
+        block_summary = ', '.join(f'{block_code}={total}' for block_code, total in block_totals.items())
+        
+        self.logger.info(f"Сгенерировано пользователей: {block_summary}, всего={num_users}")
+        self.logger.debug(f"Распределение завершено. {block_summary} [class: UserGenerator | def: _distribute_users_to_org_units]")
+        
+        # Добавляем специальных пользователей "Серая зона" в каждое подразделение
+        self.logger.info("Добавление специальных пользователей 'Серая зона' в каждое подразделение")
+        if self.generation_mode == 'batch':
+            users = UserStore.concat(users + [self._create_gray_zone_store()], self.vocabulary)
+            self.logger.debug(f"Хранилище пользователей: {len(users)} записей, {users.nbytes} байт [class: UserGenerator | def: _distribute_users_to_org_units]")
+        else:
+            # Используем исходные значения для специальных пользователей
+            users.extend(self._add_gray_zone_users(org_units_raw))
+        
+        self.logger.info(f"Всего пользователей после добавления 'Серая зона': {len(users)}")
+        
+        # Выводим статистику в DEBUG лог
+        self._log_statistics(users)
+        
+        return users
+    
+    def _statistics_enabled(self) -> bool:
+        """
+        Нужно ли собирать статистику: при включенном уровне DEBUG или JSON отчете.
+        
+        Returns:
+            True, если статистика будет выведена
+        """
+        return self.logger.isEnabledFor(logging.DEBUG) or bool(self.statistics_report)
+    
+    def _user_codes(self, users: List[Dict]) -> tuple:
+        """
+        Преобразование списка словарей пользователей (режим 'single') в коды для статистики.
+        
+        Код пола берется из записи пользователя (ключ 'Пол', -1 у специальных пользователей),
+        как в колоночном хранилище режима 'batch', без разбора ФИО.
+        
+        Args:
+            users: Список словарей с данными пользователей
+            
+        Returns:
+            Кортеж массивов (код блока, номер строки OrgIndex, код пола)
+        """
+        block_by_name = {name: index for index, name in enumerate(self.vocabulary.block_names)}
+        block = np.array([block_by_name[user['Бизнес-блок']] for user in users], dtype=np.int64)
+        unit_row = np.array([self.org_index.row_of(user['Код подразделения']) for user in users], dtype=np.int64)
+        gender = np.array([user['Пол'] for user in users], dtype=np.int64)
+        return block, unit_row, gender
+    
+    def _report_statistics(self, statistics: UserStatistics) -> None:
+        """
+        Вывод накопленной статистики в DEBUG лог и (при включенном statistics_report) в JSON файл.
+        
+        Args:
+            statistics: Накопитель статистики
+        """
+        report = statistics.report()
+        if self.logger.isEnabledFor(logging.DEBUG):
+            statistics.log(self.logger, report)
+        if self.statistics_report:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+            report_path = self.output_dir / f"{self.output_file_base}_{timestamp}_{self.sheet_name}_statistics.json"
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.logger.info(f"Отчет статистики пользователей: {report_path}")
+    
+    def _log_statistics(self, users: Union[List[Dict], UserStore]) -> None:
+        """
+        Вывод статистики по сгенерированным пользователям в DEBUG лог.
+        
+        Статистика собирается одной агрегацией по кодам (UserStatistics) и
+        не вычисляется, если уровень DEBUG отключен и JSON отчет не требуется.
+        
+        Args:
+            users: Колоночное хранилище или список словарей с данными пользователей
+        """
+        if not self._statistics_enabled():
+            return
+        
+        statistics = UserStatistics(self.org_index, self.vocabulary.block_names)
+        if isinstance(users, UserStore):
+            statistics.add_store(users)
+        else:
+            statistics.add(*self._user_codes(users))
+        self._report_statistics(statistics)
+    
+    def _add_gray_zone_users(self, org_units: List[str]) -> List[Dict]:
+        """
+        Добавление специальных пользователей "Серая зона" в каждое подразделение.
+        
+        В каждом подразделении добавляется один пользователь с:
+        - Табельным номером: "gray_zone", "00000000" или "-00000001"
+        - ФИО: "Серая зона" или "-"
+        - Случайным распределением по блокам КМ или МНС
+        
+        Args:
+            org_units: Список кодов подразделений
+            
+        Returns:
+            Список словарей с данными специальных пользователей
+        """
+        gray_zone_users = []
+        
+        # Получаем параметры из централизованной конфигурации
+        tab_number_options = self.gray_zone_config['tab_numbers']
+        fio_options = self.gray_zone_config['fio_options']
+        business_blocks_list = list(self.business_blocks.keys())
+        
+        # Случайно выбираем табельный номер, ФИО и бизнес-блок для всех подразделений сразу
+        tab_number_choices = self.rng.integers(len(tab_number_options), size=len(org_units))
+        fio_choices = self.rng.integers(len(fio_options), size=len(org_units))
+        block_choices = self.rng.integers(len(business_blocks_list), size=len(org_units))
+        
+        for org_unit, tab_choice, fio_choice, block_choice in zip(
+            org_units, tab_number_choices.tolist(), fio_choices.tolist(), block_choices.tolist()
+        ):
+            tab_number = tab_number_options[tab_choice]
+            fio = fio_options[fio_choice]
+            business_block_code = business_blocks_list[block_choice]
+            business_block_name = self.business_blocks[business_block_code]['name']
+            
+            user = {
+                'Табельный номер': tab_number,
+                'ФИО': fio,
+                'Бизнес-блок': business_block_name,
+                'Код подразделения': org_unit,
+                'Пол': -1  # Специальные пользователи - без пола
+            }
+            # Получаем данные подразделения из индекса
+            user.update(zip(ORG_ATTRIBUTE_COLUMNS, self.org_index.get_attributes(org_unit)))
+            gray_zone_users.append(user)
+        
+        self.logger.info(f"Добавлено {len(gray_zone_users)} специальных пользователей 'Серая зона'")
+        self.logger.debug(f"Добавлено специальных пользователей: {len(gray_zone_users)} [class: UserGenerator | def: _add_gray_zone_users]")
+        
+        return gray_zone_users
+    
+    def _create_gray_zone_store(self) -> UserStore:
+        """
+        Создание специальных пользователей "Серая зона" (по одному в каждое подразделение)
+        в колоночном хранилище (векторный аналог _add_gray_zone_users).
+        
+        Returns:
+            Хранилище специальных пользователей
+        """
+        count = self.org_index.num_units
+        gray_tab = self.rng.integers(len(self.gray_zone_config['tab_numbers']), size=count)
+        gray_fio = self.rng.integers(len(self.gray_zone_config['fio_options']), size=count)
+        block = self.rng.integers(len(self.block_codes), size=count)
+        zeros = np.zeros(count, dtype=np.int64)
+        
+        gray_zone_store = UserStore(
+            self.vocabulary,
+            tab_number=zeros,
+            unit_row=np.arange(count),
+            block=block,
+            gender=np.full(count, -1),
+            surname=zeros,
+            first_name=zeros,
+            patronymic=zeros,
+            fio_round=zeros,
+            gray_tab=gray_tab,
+            gray_fio=gray_fio
+        )
+        
+        self.logger.info(f"Добавлено {count} специальных пользователей 'Серая зона'")
+        self.logger.debug(f"Добавлено специальных пользователей: {count} [class: UserGenerator | def: _create_gray_zone_store]")
+        
+        return gray_zone_store
+    
+    def _iter_stores(self, batch_size: int) -> Iterable[UserStore]:
+        """
+        Потоковое создание пользователей порциями фиксированного размера.
+        
+        Распределение рассчитывается один раз (_plan_unit_counts). Подразделение
+        пользователя с номером p внутри блока находится бинарным поиском по накопленным
+        количествам (np.searchsorted), поэтому массивы назначений всех пользователей
+        не создаются. Табельные номера и ФИО выдаются общими распределителями,
+        т.е. остаются уникальными между порциями. Последними выдаются пользователи "Серая зона".
+        
+        Args:
+            batch_size: Количество пользователей в порции
+            
+        Returns:
+            Итератор хранилищ пользователей (все порции, кроме последней, ровно batch_size)
+            
+        Raises:
+            ValueError: Если размер порции не положительный
+        """
+        if batch_size <= 0:
+            error_msg = f"Размер порции должен быть положительным: {batch_size}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        self.unit_counts = self._plan_unit_counts()
+        
+        def segments() -> Iterable[UserStore]:
+            for block_index, block_code in enumerate(self.block_codes):
+                cumulative_counts = np.cumsum(self.unit_counts[:, block_index])
+                block_total = int(cumulative_counts[-1]) if len(cumulative_counts) else 0
+                for start in range(0, block_total, batch_size):
+                    positions = np.arange(start, min(start + batch_size, block_total))
+                    unit_rows = np.searchsorted(cumulative_counts, positions, side='right')
+                    yield self._create_users_batch(block_code, unit_rows)
+            yield self._create_gray_zone_store()
+        
+        # Выравнивание частей по границам порций
+        pending: List[UserStore] = []
+        pending_count = 0
+        for segment in segments():
+            pending.append(segment)
+            pending_count += len(segment)
+            while pending_count >= batch_size:
+                merged = UserStore.concat(pending, self.vocabulary)
+                yield merged.take(slice(0, batch_size))
+                pending = [merged.take(slice(batch_size, None))]
+                pending_count -= batch_size
+        if pending_count > 0:
+            yield UserStore.concat(pending, self.vocabulary)
+    
+    def iter_batches(self, batch_size: int, output: str = 'frame') -> Iterable:
+        """
+        Потоковая генерация пользователей порциями с ограниченным расходом памяти.
+        
+        Правила распределения и уникальность табельных номеров и ФИО сохраняются
+        для всего набора; в памяти одновременно находится только одна порция.
+        
+        Args:
+            batch_size: Количество пользователей в порции
+            output: Формат порций: 'frame' (DataFrame), 'arrow' (pyarrow.Table)
+                или 'store' (UserStore, без сборки строк)
+            
+        Returns:
+            Итератор порций пользователей
+            
+        Raises:
+            ValueError: Если формат порций неизвестен
+            ImportError: Если для формата 'arrow' не установлена библиотека pyarrow
+        """
+        if output not in ('frame', 'arrow', 'store'):
+            error_msg = f"Неизвестный формат порций пользователей: {output}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        if output == 'arrow' and pa is None:
+            error_msg = "Для формата порций 'arrow' требуется библиотека pyarrow"
+            self.logger.error(error_msg)
+            raise ImportError(error_msg)
+        
+        self.logger.info(f"Потоковая генерация пользователей порциями по {batch_size}")
+        
+        # Статистика накапливается по порциям (без хранения всех пользователей)
+        statistics = UserStatistics(self.org_index, self.vocabulary.block_names) if self._statistics_enabled() else None
+        
+        total_count = 0
+        for store in self._iter_stores(batch_size):
+            total_count += len(store)
+            if statistics is not None:
+                statistics.add_store(store)
+            self.logger.debug(f"Сформирована порция: {len(store)} пользователей, всего {total_count} [class: UserGenerator | def: iter_batches]")
+            if output == 'store':
+                yield store
+            elif output == 'arrow':
+                yield pa.Table.from_pandas(store.to_frame(), preserve_index=False)
+            else:
+                yield store.to_frame()
+        
+        self.logger.info(f"Потоковая генерация завершена. Всего пользователей: {total_count}")
+        if statistics is not None:
+            self._report_statistics(statistics)
+    
+    def save_stream(self, batch_size: int, session: Optional[WorkbookSession] = None) -> str:
+        """
+        Потоковая генерация и запись пользователей порциями.
+        
+        Порции передаются в лист по мере генерации, сортировка не выполняется
+        (пользователи записываются по блокам и подразделениям в порядке генерации).
+        
+        Args:
+            batch_size: Количество пользователей в порции
+            session: Сессия выходной книги конвейера (если не указана, файл записывается сразу)
+            
+        Returns:
+            Путь к файлу
+        """
+        own_session = session is None
+        if own_session:
+            session = WorkbookSession(self.output_file_base, str(self.output_dir), self.logger)
+        
+        self.logger.info(f"Потоковое сохранение пользователей в лист {self.sheet_name}: {session.output_path.name}")
+        
+        batches = (self._schema_frame(store) for store in self.iter_batches(batch_size, output='store'))
+        output_path = self._write_users_sheet(batches, session)
+        if own_session:
+            session.save()
+        
+        return output_path
+    
+    def _sheet_columns(self) -> List[str]:
+        """
+        Колонки листа пользователей по схеме.
+        
+        Returns:
+            USER_COLUMNS для схем 'denormalized' и 'formulas'; для 'normalized' - колонки
+            пользователя, код подразделения и атрибуты из keep_columns
+        """
+        if self.schema_mode == 'normalized':
+            return USER_COLUMNS[:4] + [col for col in ORG_ATTRIBUTE_COLUMNS if col in self.keep_columns]
+        return USER_COLUMNS
+    
+    def _formula_columns(self) -> Dict[str, str]:
+        """
+        Шаблоны формул атрибутов подразделений для схемы 'formulas'.
+        
+        Атрибут находится по коду подразделения строки на листе ORG:
+        INDEX('ORG'!$C:$C,MATCH($D{row},'ORG'!$A:$A,0)). Атрибуты из keep_columns
+        записываются значениями.
+        
+        Returns:
+            Колонка -> шаблон формулы с подстановкой {row} (пустой словарь для других схем)
+        """
+        if self.schema_mode != 'formulas':
+            return {}
+        org_sheet = "'{}'".format(self.schema_config.get('org_sheet', 'ORG').replace("'", "''"))
+        org_columns = list(self.org_data.columns)
+        code_letter = get_column_letter(USER_COLUMNS.index('Код подразделения') + 1)
+        key_letter = get_column_letter(org_columns.index('Код подразделения') + 1)
+        formulas = {}
+        for column_name in ORG_ATTRIBUTE_COLUMNS:
+            if column_name in self.keep_columns:
+                continue
+            letter = get_column_letter(org_columns.index(column_name) + 1)
+            formulas[column_name] = (
+                f"INDEX({org_sheet}!${letter}:${letter},"
+                f"MATCH(${code_letter}{{row}},{org_sheet}!${key_letter}:${key_letter},0))"
+            )
+        return formulas
+    
+    def _schema_frame(self, users: Union[UserStore, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Выбор колонок листа пользователей по схеме.
+        
+        Из колоночного хранилища собираются только записываемые значениями колонки;
+        колонки формул добавляются пустыми (заполняются при записи листа).
+        
+        Args:
+            users: Колоночное хранилище или DataFrame с колонками USER_COLUMNS
+            
+        Returns:
+            DataFrame с колонками _sheet_columns()
+        """
+        columns = self._sheet_columns()
+        if isinstance(users, UserStore):
+            formula_columns = self._formula_columns()
+            frame = users.to_frame([col for col in columns if col not in formula_columns])
+            return frame.assign(**{col: None for col in formula_columns})[columns]
+        return users[columns]
+    
+    def _store_sort_order(self, users: UserStore, fio: pd.Series) -> np.ndarray:
+        """
+        Порядок строк листа пользователей по кодам хранилища.
+        
+        Строки сравниваются рангами значений справочников (блоки, атрибуты
+        подразделений по строке OrgIndex), поэтому строки атрибутов на каждого
+        пользователя не собираются. Порядок совпадает с устойчивой сортировкой
+        по 'Бизнес-блок', 'Полное ТБ', 'Специальный', 'Полное ГОСБ', 'ФИО'.
+        
+        Args:
+            users: Колоночное хранилище пользователей
+            fio: Собранные ФИО пользователей (колонка листа)
+            
+        Returns:
+            Массив номеров строк в порядке листа
+        """
+        def ranks(values: np.ndarray) -> np.ndarray:
+            # Ранг значения в порядке сортировки, пустые значения - в конце (как в sort_values)
+            codes, uniques = pd.factorize(values, sort=True)
+            return np.where(codes < 0, len(uniques), codes)
+        
+        attribute_arrays = self.org_index.attribute_arrays
+        return np.lexsort((
+            ranks(fio.to_numpy()),
+            ranks(attribute_arrays['Полное ГОСБ'])[users.unit_row],
+            users.gray_tab >= 0,
+            ranks(attribute_arrays['Полное ТБ'])[users.unit_row],
+            ranks(np.asarray(self.vocabulary.block_names, dtype=object))[users.block]
+        ))
+    
+    def _write_users_sheet(
+        self,
+        data: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+        session: WorkbookSession
+    ) -> str:
+        """
+        Запись листа пользователей по политике разбиения split.
+        
+        - by=None: один лист; для xlsx строки сверх предела Excel переносятся
+          в листы {лист}_2, {лист}_3, ... (с предупреждением и манифестом)
+        - by='rows': листы {лист}_1..N не более max_rows строк
+        - by=колонка: отдельные файлы по значениям колонки (add_sheet_files, пул процессов)
+        
+        Табельный номер сохраняется в текстовом формате (лидирующие нули). Для
+        схемы 'formulas' лист ORG должен быть уже добавлен в книгу сессии.
+        
+        Args:
+            data: DataFrame или последовательность DataFrame-порций пользователей
+            session: Сессия выходной книги
+            
+        Returns:
+            Путь к файлу листа или к манифесту частей (при разбиении)
+            
+        Raises:
+            ValueError: Если для схемы 'formulas' в книге нет листа ORG
+        """
+        split_by = self.split_config.get('by')
+        max_rows = self.split_config.get('max_rows') or WorkbookSession.EXCEL_MAX_ROWS - 1
+        sheet_options = {
+            'max_column_width': self.max_column_width,
+            'text_columns': ['Табельный номер'],
+            'output_format': self.output_format
+        }
+        
+        formula_columns = self._formula_columns()
+        if formula_columns:
+            org_sheet = self.schema_config.get('org_sheet', 'ORG')
+            if org_sheet not in session.sheet_names:
+                error_msg = f"Для схемы 'formulas' лист {org_sheet} должен быть в книге {session.output_path.name} (листы: {session.sheet_names})"
+                self.logger.error(error_msg)
+                raise ValueError(error_msg)
+            sheet_options['formula_columns'] = formula_columns
+        
+        if split_by is None and self.output_format != 'xlsx':
+            return session.add_sheet(data, self.sheet_name, **sheet_options)
+        
+        if split_by is None:
+            parts = session.add_sheet_parts(data, self.sheet_name, WorkbookSession.EXCEL_MAX_ROWS - 1, numbered=False, columns=self._sheet_columns(), **sheet_options)
+            if len(parts) == 1:
+                return session.output_files[self.sheet_name]
+            self.logger.warning(f"Количество пользователей превышает предел строк листа Excel, лист {self.sheet_name} продолжен в листах: {[part['sheet'] for part in parts[1:]]}")
+        elif split_by == 'rows':
+            parts = session.add_sheet_parts(data, self.sheet_name, max_rows, numbered=True, columns=self._sheet_columns(), **sheet_options)
+        else:
+            groups = {key: group for key, group in data.groupby(split_by, sort=True)}
+            parts = session.add_sheet_files(groups, self.sheet_name, max_rows, self.split_config.get('workers'), **sheet_options)
+        
+        self.logger.info(f"Лист {self.sheet_name} записан частями: {len(parts)}")
+        return session.write_manifest(
+            self.sheet_name,
+            parts,
+            split_by=split_by or 'rows',
+            max_rows=max_rows if split_by else WorkbookSession.EXCEL_MAX_ROWS - 1,
+            format=self.output_format
+        )
+    
+    def save_to_excel(
+        self,
+        users: Union[List[Dict], UserStore, pd.DataFrame],
+        session: Optional[WorkbookSession] = None
+    ) -> str:
+        """
+        Сохранение данных пользователей в Excel файл с настройками форматирования.
+        
+        Строки колоночного хранилища собираются здесь, непосредственно перед записью,
+        и только для колонок схемы листа: сортировка выполняется по кодам хранилища
+        (_store_sort_order), атрибуты подразделений вне схемы не собираются.
+        
+        Args:
+            users: Колоночное хранилище, DataFrame или список словарей с данными пользователей
+            session: Сессия выходной книги конвейера (лист добавляется в общую книгу).
+                Если не указана, создается отдельный файл, который записывается сразу
+            
+        Returns:
+            Путь к файлу
+        """
+        own_session = session is None
+        if own_session:
+            session = WorkbookSession(self.output_file_base, str(self.output_dir), self.logger)
+        
+        self.logger.info(f"Сохранение данных пользователей в Excel: {session.output_path.name}")
+        self.logger.debug(f"Сохранение {len(users)} пользователей в лист {self.sheet_name} файла {session.output_path.name} [class: UserGenerator | def: save_to_excel]")
+        
+        # Единый составной ключ сортировки: Бизнес-блок -> Полное ТБ -> Специальный -> Полное ГОСБ -> ФИО.
+        # Специальные пользователи (True) идут после обычных внутри каждой пары (блок, ТБ),
+        # в том числе в группах без обычных пользователей. Сортировка устойчивая, один проход
+        if isinstance(users, UserStore):
+            # Собираются только колонки схемы, ключи подразделений берутся из кодов хранилища
+            df = self._schema_frame(users)
+            df = df.take(self._store_sort_order(users, df['ФИО'])).reset_index(drop=True)
+        else:
+            df = pd.DataFrame(users)[USER_COLUMNS]
+            
+            # Убеждаемся, что табельный номер сохранен как текст (с лидирующими нулями)
+            df['Табельный номер'] = df['Табельный номер'].astype(str).str.zfill(self.tab_number_config['total_length'])
+            
+            # Определяем специальных пользователей (серую зону) из централизованной конфигурации
+            df['Специальный'] = (
+                df['Табельный номер'].isin(self.gray_zone_config['tab_numbers']) |
+                df['ФИО'].isin(self.gray_zone_config['fio_options'])
+            )
+            df = df.sort_values(
+                by=['Бизнес-блок', 'Полное ТБ', 'Специальный', 'Полное ГОСБ', 'ФИО'],
+                kind='stable',
+                ignore_index=True
+            )
+            
+            # Удаляем временную колонку и колонки подразделений, не входящие в схему листа
+            df = self._schema_frame(df.drop(columns=['Специальный']))
+        
+        self.logger.debug(f"Данные отсортированы: Бизнес-блок -> Полное ТБ -> Полное ГОСБ -> ФИО (специальные пользователи в конце каждого ТБ) [class: UserGenerator | def: save_to_excel]")
+        
+        # Добавляем лист в книгу (по политике разбиения split)
+        output_path = self._write_users_sheet(df, session)
+        if own_session:
+            session.save()
+        
+        return output_path
+    
+    def process(self, session: Optional[WorkbookSession] = None) -> str:
+        """
+        Полный цикл генерации пользователей.
+        
+        При заданном stream_batch_size пользователи генерируются и записываются порциями.
+        
+        Args:
+            session: Сессия выходной книги конвейера (если не указана, файл записывается сразу)
+        
+        Returns:
+            Путь к Excel файлу
+        """
+        self.logger.info("Начало генерации пользователей")
+        self.logger.debug("Запуск полного цикла генерации пользователей [class: UserGenerator | def: process]")
+        
+        if self.stream_batch_size:
+            # Потоковая генерация и запись порциями (без накопления всех пользователей в памяти)
+            output_file = self.save_stream(self.stream_batch_size, session)
+        else:
+            # Генерация пользователей (сохраняются для следующих этапов, например USER_CNG)
+            self.users = self._distribute_users_to_org_units()
+            
+            # Сохранение
+            output_file = self.save_to_excel(self.users, session)
+        
+        self.logger.info(f"Генерация завершена успешно. Файл: {output_file}")
+        self.logger.debug(f"Генерация завершена. Создан файл: {output_file} [class: UserGenerator | def: process]")
+        
+        return output_file
+
+
+def generate_users(
+    config: Dict,
+    org_data: pd.DataFrame,
+    output_file_base: str = "result_base",
+    output_dir: str = "OUT",
+    logger: Optional[logging.Logger] = None,
+    session: Optional[WorkbookSession] = None
+) -> str:
+    """
+    Функция для генерации пользователей.
+    
+    Args:
+        config: Словарь конфигурации из LOADER_CONFIG для генератора пользователей
+        org_data: DataFrame с данными организационных единиц (из листа ORG)
+        output_file_base: Базовое имя выходного Excel файла (по умолчанию "result_base")
+        output_dir: Директория для выходных файлов (по умолчанию "OUT")
+        logger: Логгер для записи событий (опционально)
+        session: Сессия выходной книги конвейера (опционально)
+    
+    Returns:
+        Путь к созданному Excel файлу
+    """
+    generator = UserGenerator(
+        config=config,
+        org_data=org_data,
+        output_file_base=output_file_base,
+        output_dir=output_dir,
+        logger=logger
+    )
+    return generator.process(session)
+
+
+# ============================================================================
+# МОДУЛЬ ГЕНЕРАЦИИ ДВИЖЕНИЯ ПОЛЬЗОВАТЕЛЕЙ
+# ============================================================================
+
+# Категории движения пользователей (код категории - индекс в кортеже)
+USER_CNG_CATEGORIES = ('stay', 'gosb', 'tb', 'dismissed', 'hired')
+
+# Колонки помесячного состояния пользователя на листе USER_CNG
+USER_CNG_MONTH_COLUMNS = ('Код подразделения', 'Короткое ТБ', 'Полное ГОСБ')
+
+
+def _org_month_value_codes(org_index: OrgIndex) -> Dict[str, tuple]:
+    """
+    Коды значений колонок USER_CNG_MONTH_COLUMNS по номерам строк OrgIndex.
+    
+    К значениям строк ORG добавлено значение '-' в конце: номер строки -1
+    указывает на него, поэтому колонки месяцев собираются категориальными
+    (pd.Categorical.from_codes) без копирования строк.
+    
+    Args:
+        org_index: Индекс организационной структуры
+        
+    Returns:
+        Словарь: колонка -> (код значения каждой строки ORG и '-', уникальные значения)
+    """
+    arrays = {
+        'Код подразделения': org_index.unit_value_array,
+        'Короткое ТБ': org_index.attribute_arrays['Короткое ТБ'],
+        'Полное ГОСБ': org_index.attribute_arrays['Полное ГОСБ']
+    }
+    return {column_name: pd.factorize(np.append(values, '-')) for column_name, values in arrays.items()}
+
+
+class CapacityLedger:
+    """
+    Помесячный учет мест (месяц, подразделение, блок) для ограничений движения пользователей.
+    
+    Начальные места - матрица количеств подразделения x блоки генератора
+    пользователей (UserGenerator.unit_counts). Занятость хранится массивом
+    месяцы x подразделения x блоки; каждое перемещение, увольнение или прием
+    меняет две ячейки текущего месяца за O(1).
+    
+    Индекс свободных мест: для каждой пары (блок, ТБ) список подразделений,
+    в которых есть свободное место блока, и позиция подразделения в списке.
+    Подразделение добавляется в конец списка или удаляется заменой на последний
+    элемент (O(1)), поэтому вопрос "какие подразделения ТБ могут принять
+    сотрудника блока сейчас" не требует просмотра пользователей.
+    """
+    
+    def __init__(self, capacity: np.ndarray, org_index: OrgIndex, months: int) -> None:
+        """
+        Инициализация учета мест.
+        
+        Args:
+            capacity: Количество мест (подразделения x блоки) с листа USERS
+            org_index: Индекс организационной структуры (строки - подразделения capacity)
+            months: Количество месяцев
+        """
+        self.capacity = np.asarray(capacity, dtype=np.int32)
+        self.num_units, self.num_blocks = self.capacity.shape
+        self.org_index = org_index
+        self.num_tb = len(org_index.tb_codes)
+        self.tb_row_by_code = {str(tb_code): tb_id for tb_id, tb_code in enumerate(org_index.tb_codes)}
+        
+        self.months = months
+        self.month = 0
+        self.occupied = np.zeros((months, self.num_units, self.num_blocks), dtype=np.int32)
+        self.reserved = np.zeros((self.num_units, self.num_blocks), dtype=np.int32)  # Места принимаемых позже
+        
+        # Индекс свободных мест: ключ блок * num_tb + ТБ (подразделения одного блока идут подряд по ТБ)
+        self._free_units: List[List[int]] = [[] for _ in range(self.num_blocks * self.num_tb)]
+        self._free_position = np.full((self.num_units, self.num_blocks), -1, dtype=np.int64)
+    
+    def start(self, rows: np.ndarray, blocks: np.ndarray, reserved_rows: np.ndarray, reserved_blocks: np.ndarray) -> None:
+        """
+        Занятость первого месяца и резерв мест пользователей, принимаемых позже.
+        
+        Args:
+            rows: Строки подразделений пользователей первого месяца
+            blocks: Блоки этих пользователей
+            reserved_rows: Строки подразделений, зарезервированные за будущим приемом
+            reserved_blocks: Блоки зарезервированных мест
+        """
+        self.month = 0
+        self.occupied[0] = 0
+        self.reserved[:] = 0
+        np.add.at(self.occupied[0], (rows, blocks), 1)
+        np.add.at(self.reserved, (reserved_rows, reserved_blocks), 1)
+        
+        # Полное построение индекса выполняется один раз, дальше он поддерживается по изменениям
+        for free_list in self._free_units:
+            free_list.clear()
+        self._free_position[:] = -1
+        for unit, block in zip(*np.nonzero(self.free_slots() > 0)):
+            self._refresh(int(unit), int(block))
+    
+    def next_month(self) -> None:
+        """
+        Переход к следующему месяцу: занятость переносится без изменений,
+        поэтому индекс свободных мест остается верным.
+        """
+        self.month += 1
+        self.occupied[self.month] = self.occupied[self.month - 1]
+    
+    def free_slots(self) -> np.ndarray:
+        """
+        Свободные места текущего месяца (подразделения x блоки) с учетом резерва.
+        
+        Returns:
+            Матрица свободных мест
+        """
+        return self.capacity - self.occupied[self.month] - self.reserved
+    
+    def can_accept(self, unit: int, block: int) -> bool:
+        """
+        Есть ли в подразделении свободное место блока в текущем месяце.
+        """
+        return self._free_position[unit, block] >= 0
+    
+    def units_accepting(self, tb_code: str, block: int) -> np.ndarray:
+        """
+        Подразделения ТБ, которые могут принять сотрудника блока в текущем месяце.
+        
+        Args:
+            tb_code: Код ТБ
+            block: Номер блока (столбец capacity)
+            
+        Returns:
+            Строки подразделений OrgIndex (порядок списка индекса)
+        """
+        tb_id = self.tb_row_by_code.get(str(tb_code))
+        if tb_id is None:
+            return np.empty(0, dtype=np.int64)
+        return np.array(self._free_units[block * self.num_tb + tb_id], dtype=np.int64)
+    
+    def free_index(self) -> tuple:
+        """
+        Снимок индекса свободных мест для векторного выбора целей переходов.
+        
+        Returns:
+            Кортеж (границы списков по ключу блок * num_tb + ТБ, подразделения подряд);
+            подразделения блока во всех ТБ занимают отрезок ключей [блок * num_tb, (блок + 1) * num_tb)
+        """
+        sizes = np.fromiter((len(free_list) for free_list in self._free_units), dtype=np.int64, count=len(self._free_units))
+        bounds = np.concatenate([[0], np.cumsum(sizes)])
+        units = np.fromiter(itertools.chain.from_iterable(self._free_units), dtype=np.int64, count=int(bounds[-1]))
+        return bounds, units
+    
+    def move(self, from_unit: int, to_unit: int, block: int) -> None:
+        """
+        Перемещение сотрудника блока между подразделениями в текущем месяце за O(1).
+        
+        Args:
+            from_unit: Строка подразделения, которое сотрудник покидает
+            to_unit: Строка подразделения-цели
+            block: Номер блока
+        """
+        occupied = self.occupied[self.month]
+        occupied[from_unit, block] -= 1
+        occupied[to_unit, block] += 1
+        self._refresh(from_unit, block)
+        self._refresh(to_unit, block)
+    
+    def apply(self, rows: np.ndarray, blocks: np.ndarray, occupied_delta: int, reserved_delta: int = 0) -> None:
+        """
+        Пакетное изменение занятости и резерва текущего месяца.
+        
+        Массивы меняются векторно, индекс свободных мест обновляется
+        только для затронутых пар (подразделение, блок) - O(1) на пару.
+        
+        Args:
+            rows: Строки подразделений
+            blocks: Блоки
+            occupied_delta: Изменение занятости на каждую пару (+1 - занятие, -1 - освобождение)
+            reserved_delta: Изменение резерва на каждую пару
+        """
+        np.add.at(self.occupied[self.month], (rows, blocks), occupied_delta)
+        if reserved_delta:
+            np.add.at(self.reserved, (rows, blocks), reserved_delta)
+        for unit, block in set(zip(rows.tolist(), blocks.tolist())):
+            self._refresh(unit, block)
+    
+    def _refresh(self, unit: int, block: int) -> None:
+        """
+        Обновление индекса свободных мест для пары (подразделение, блок) за O(1).
+        
+        Args:
+            unit: Строка подразделения
+            block: Номер блока
+        """
+        has_free = self.capacity[unit, block] - self.occupied[self.month, unit, block] - self.reserved[unit, block] > 0
+        position = self._free_position[unit, block]
+        if has_free == (position >= 0):
+            return
+        
+        free_list = self._free_units[block * self.num_tb + self.org_index.tb_ids[unit]]
+        if has_free:
+            self._free_position[unit, block] = len(free_list)
+            free_list.append(unit)
+        else:
+            # Удаление заменой на последний элемент списка
+            last = free_list.pop()
+            if last != unit:
+                free_list[position] = last
+                self._free_position[last, block] = position
+            self._free_position[unit, block] = -1
+
+
+class UserChangeGenerator:
+    """
+    Генератор движения пользователей по подразделениям (лист USER_CNG).
+    
+    Состояние хранится матрицей пользователи x месяцы номеров строк OrgIndex
+    (int32, -1 - пользователь без подразделения). Категории движения
+    назначаются одной перестановкой, каждый месяц выполняется векторно:
+    увольнения, прием, предложения переходов и их прием по свободным местам.
+    Ограничения проверяются по учету мест CapacityLedger, без пересчета пользователей.
+    
+    Ограничения:
+    - Бизнес-блок пользователя не меняется
+    - Количество мест (подразделение, блок) не превышает количество с листа USERS
+      (места принимаемых позже пользователей зарезервированы за ними)
+    - В каждом (подразделение, блок) с листа USERS в каждом месяце есть хотя бы
+      один сотрудник блока: увольнения и переходы, которые оставили бы пару пустой,
+      не выполняются (увольнение переносится на следующий месяц)
+    - Пользователи "Серая зона" исключаются
+    """
+    
+    def __init__(
+        self,
+        config: Dict,
+        users_data: Union[UserStore, pd.DataFrame, List[Dict]],
+        org_data: pd.DataFrame,
+        gray_zone_config: Dict,
+        output_file_base: str = "result_base",
+        output_dir: str = "OUT",
+        logger: Optional[logging.Logger] = None,
+        users_seed: Optional[int] = None,
+        unit_counts: Optional[np.ndarray] = None,
+        block_names: Optional[List[str]] = None
+    ) -> None:
+        """
+        Инициализация генератора.
+        
+        Args:
+            config: Словарь конфигурации из LOADER_CONFIG['USER_CNG']
+            users_data: Пользователи листа USERS (колоночное хранилище, DataFrame или список словарей)
+            org_data: DataFrame с данными организационных единиц (из листа ORG)
+            gray_zone_config: Конфигурация специальных пользователей "Серая зона"
+            output_file_base: Базовое имя выходного Excel файла
+            output_dir: Директория для выходных файлов
+            logger: Логгер для записи событий
+            users_seed: seed генератора пользователей (источник seed, если в config он не задан)
+            unit_counts: Матрица количеств подразделения x блоки генератора пользователей
+                (UserGenerator.unit_counts); если не указана, считается по пользователям
+            block_names: Названия блоков в порядке столбцов unit_counts
+            
+        Raises:
+            ValueError: Если доли категорий некорректны, подразделение пользователя отсутствует в ORG
+                или unit_counts не совпадает с пользователями листа USERS
+        """
+        self.config = config
+        self.sheet_name = config['sheet_name']
+        self.max_column_width = config.get('max_column_width', 100)
+        self.output_format = config.get('format', 'xlsx')  # Формат вывода листа
+        self.output_file_base = output_file_base
+        self.output_dir = Path(output_dir)
+        self.logger = logger or logging.getLogger(__name__)
+        
+        self.months = config.get('months', 12)
+        self.move_probability = config.get('move_probability', 0.2)
+        shares = config.get('categories', {})
+        if set(shares) != set(USER_CNG_CATEGORIES) or not np.isclose(sum(shares.values()), 1.0):
+            error_msg = f"Доли категорий движения должны быть заданы для {list(USER_CNG_CATEGORIES)} и в сумме давать 1.0: {shares}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        self.category_shares = np.array([shares[category] for category in USER_CNG_CATEGORIES], dtype=np.float64)
+        
+        # Генератор случайных чисел: собственный seed или отдельный поток, производный от seed USERS
+        self.seed = config.get('seed')
+        if self.seed is None and users_seed is not None:
+            self.seed = [users_seed, 1]  # Вторая компонента отделяет поток от генератора USERS
+        self.rng = np.random.default_rng(self.seed)
+        
+        # Пользователи без "Серой зоны": хранилище выбирается по кодам, DataFrame и список - по строкам
+        users = self._regular_users(users_data, gray_zone_config)
+        self.logger.debug(f"Исключено специальных пользователей: {len(users_data) - len(users)} [class: UserChangeGenerator | def: __init__]")
+        if isinstance(users, UserStore):
+            # Коды пользователей берутся из колонок хранилища; строки собираются только при выводе (users)
+            self.org_index = users.vocabulary.org_index if users.vocabulary is not None else OrgIndex(org_data)
+            self.store, self._users = users, None
+            self.baseline_rows = users.unit_row.astype(np.int32)
+            block_ids = users.block.astype(np.int64)
+            self.block_names = list(block_names) if block_names is not None else users.vocabulary.block_names.tolist()
+            block_ids[block_ids >= len(self.block_names)] = -1
+        else:
+            self.org_index = OrgIndex(org_data)
+            self.store, self._users = None, users[USER_COLUMNS[:3]]
+            
+            # Коды пользователей: строка подразделения с листа USERS и блок
+            self.baseline_rows = pd.Index(self.org_index.unit_codes).get_indexer(users['Код подразделения'].astype(str))
+            if (self.baseline_rows < 0).any():
+                missing = users.loc[self.baseline_rows < 0, 'Код подразделения'].unique().tolist()
+                error_msg = f"Подразделения пользователей отсутствуют в данных ORG: {missing[:10]}"
+                self.logger.error(error_msg)
+                raise ValueError(error_msg)
+            self.baseline_rows = self.baseline_rows.astype(np.int32)
+            if block_names is not None:
+                block_ids = pd.Index(block_names).get_indexer(users['Бизнес-блок'])
+                self.block_names = list(block_names)
+            else:
+                block_ids, block_uniques = pd.factorize(users['Бизнес-блок'])
+                self.block_names = block_uniques.tolist()
+        if (block_ids < 0).any():
+            error_msg = f"Бизнес-блоки пользователей отсутствуют в {self.block_names}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        self.block_ids = block_ids.astype(np.int8)
+        self.num_blocks = len(self.block_names)
+        
+        # Количество мест (подразделение x блок): матрица генератора пользователей или подсчет по листу USERS
+        user_counts = np.bincount(
+            self.baseline_rows.astype(np.int64) * self.num_blocks + self.block_ids,
+            minlength=self.org_index.num_units * self.num_blocks
+        ).reshape(self.org_index.num_units, self.num_blocks)
+        if unit_counts is not None and not np.array_equal(unit_counts, user_counts):
+            error_msg = "Количества пользователей по подразделениям и блокам (unit_counts) не совпадают с листом USERS"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        self.capacity = user_counts if unit_counts is None else np.asarray(unit_counts)
+        
+        self.categories: Optional[np.ndarray] = None  # Код категории каждого пользователя
+        self.movement: Optional[np.ndarray] = None  # Матрица пользователи x месяцы номеров строк ORG
+        self.ledger: Optional[CapacityLedger] = None  # Учет мест по месяцам
+    
+    @staticmethod
+    def _regular_users(users_data: Union[UserStore, pd.DataFrame, List[Dict]], gray_zone_config: Dict) -> Union[UserStore, pd.DataFrame]:
+        """
+        Исключение специальных пользователей "Серая зона".
+        
+        Колоночное хранилище выбирается по кодам (gray_tab), без сборки строк;
+        DataFrame и список словарей фильтруются по вариантам табельного номера и ФИО.
+        
+        Args:
+            users_data: Колоночное хранилище, DataFrame или список словарей
+            gray_zone_config: Конфигурация специальных пользователей
+            
+        Returns:
+            Хранилище без специальных пользователей или DataFrame с колонками
+            'Табельный номер', 'ФИО', 'Бизнес-блок', 'Код подразделения'
+        """
+        if isinstance(users_data, UserStore):
+            return users_data.take(np.flatnonzero(users_data.gray_tab < 0))
+        df = pd.DataFrame(users_data)[USER_COLUMNS[:4]]
+        special = (
+            df['Табельный номер'].isin(gray_zone_config['tab_numbers']) |
+            df['ФИО'].isin(gray_zone_config['fio_options'])
+        )
+        return df.loc[~special.to_numpy()].reset_index(drop=True)
+    
+    @property
+    def users(self) -> pd.DataFrame:
+        """
+        Колонки пользователя листа ('Табельный номер', 'ФИО', 'Бизнес-блок').
+        
+        Для колоночного хранилища строки собираются один раз при первом обращении.
+        """
+        if self._users is None:
+            self._users = self.store.to_frame(USER_COLUMNS[:3])
+        return self._users
+    
+    def _categorize_users(self) -> np.ndarray:
+        """
+        Назначение категорий движения одной перестановкой пользователей.
+        
+        Категория hired назначается только пользователям, не являющимся опорными
+        (первый в случайном порядке пользователь каждой пары подразделение x блок),
+        чтобы в первом месяце в каждой паре был сотрудник; остальные категории
+        распределяются по долям (метод наибольших остатков) в той же перестановке.
+        
+        Returns:
+            Массив кодов категорий (int8, индекс в USER_CNG_CATEGORIES)
+        """
+        count = len(self.baseline_rows)
+        category_counts = np.floor(self.category_shares * count).astype(np.int64)
+        remainders = self.category_shares * count - category_counts
+        category_counts[np.argsort(-remainders, kind='stable')[:count - category_counts.sum()]] += 1
+        
+        # Опорные пользователи: первый в случайном порядке пользователь каждой пары (подразделение, блок)
+        order = self.rng.permutation(count)
+        unit_block = self.baseline_rows.astype(np.int64) * self.num_blocks + self.block_ids
+        _, first = np.unique(unit_block[order], return_index=True)
+        is_anchor = np.zeros(count, dtype=bool)
+        is_anchor[order[first]] = True
+        
+        hired_code = USER_CNG_CATEGORIES.index('hired')
+        eligible = order[~is_anchor[order]]
+        if category_counts[hired_code] > len(eligible):
+            self.logger.warning(f"Пользователей для приема ({category_counts[hired_code]}) больше неопорных ({len(eligible)}), доля stay увеличена")
+            category_counts[0] += category_counts[hired_code] - len(eligible)
+            category_counts[hired_code] = len(eligible)
+        hired_users = eligible[:category_counts[hired_code]]
+        
+        is_hired = np.zeros(count, dtype=bool)
+        is_hired[hired_users] = True
+        categories = np.empty(count, dtype=np.int8)
+        categories[hired_users] = hired_code
+        categories[order[~is_hired[order]]] = np.repeat(np.arange(hired_code, dtype=np.int8), category_counts[:hired_code])
+        
+        self.logger.info(
+            "Категории движения: " + ", ".join(
+                f"{category}={int(total)}" for category, total in zip(USER_CNG_CATEGORIES, np.bincount(categories, minlength=len(USER_CNG_CATEGORIES)))
+            ) + f" (опорных пользователей {len(first)})"
+        )
+        return categories
+    
+    def _slot_keys(self, rows: np.ndarray, users: np.ndarray) -> np.ndarray:
+        """
+        Плоские номера мест (подразделение, блок) пользователей.
+        
+        Args:
+            rows: Строки подразделений
+            users: Номера пользователей (источник блока)
+            
+        Returns:
+            Номера мест: строка * num_blocks + блок
+        """
+        return rows.astype(np.int64) * self.num_blocks + self.block_ids[users]
+    
+    @staticmethod
+    def _first_within_limits(keys: np.ndarray, limits: np.ndarray) -> np.ndarray:
+        """
+        Отбор первых limits[ключ] элементов каждой группы ключей.
+        
+        Элементы группируются по ключу (устойчивая сортировка сохраняет
+        случайный порядок внутри группы); в каждой группе отбираются первые
+        limits[ключ] элементов.
+        
+        Args:
+            keys: Ключи групп (номера мест)
+            limits: Допустимое количество элементов на ключ
+            
+        Returns:
+            Маска отобранных элементов
+        """
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        rank = np.arange(len(order)) - np.searchsorted(sorted_keys, sorted_keys, side='left')
+        selected = np.zeros(len(keys), dtype=bool)
+        selected[order] = rank < limits[sorted_keys]
+        return selected
+    
+    def _propose_targets(self, users: np.ndarray, rows: np.ndarray, cross_tb: np.ndarray, free_index: tuple) -> np.ndarray:
+        """
+        Векторный выбор подразделений-целей переходов по индексу свободных мест.
+        
+        Смена ГОСБ: равновероятно среди подразделений того же ТБ со свободным местом блока;
+        цель в текущем ГОСБ отклоняется. Смена ТБ: равновероятно среди подразделений
+        других ТБ со свободным местом блока (отрезок текущего ТБ в списках блока
+        пропускается сдвигом позиции, поэтому цель всегда в другом ТБ).
+        
+        Args:
+            users: Номера пользователей
+            rows: Текущие строки подразделений пользователей
+            cross_tb: Признаки перехода с возможной сменой ТБ
+            free_index: Снимок индекса свободных мест (CapacityLedger.free_index)
+            
+        Returns:
+            Строки подразделений-целей (-1 - цели в этом месяце нет)
+        """
+        bounds, free_units = free_index
+        if len(free_units) == 0:
+            return np.full(len(users), -1, dtype=np.int32)
+        
+        num_tb = self.ledger.num_tb
+        blocks = self.block_ids[users].astype(np.int64)
+        tb_key = blocks * num_tb + self.org_index.tb_ids[rows]
+        tb_start, tb_size = bounds[tb_key], bounds[tb_key + 1] - bounds[tb_key]
+        block_start = bounds[blocks * num_tb]
+        
+        # Смена ТБ: позиция среди списков блока без отрезка текущего ТБ
+        start = np.where(cross_tb, block_start, tb_start)
+        size = np.where(cross_tb, bounds[(blocks + 1) * num_tb] - block_start - tb_size, tb_size)
+        offset = np.minimum((self.rng.random(len(users)) * size).astype(np.int64), np.maximum(size - 1, 0))
+        offset += np.where(cross_tb & (start + offset >= tb_start), tb_size, 0)
+        targets = free_units[np.minimum(start + offset, len(free_units) - 1)]
+        rejected = (size == 0) | (~cross_tb & (self.org_index.gosb_ids[targets] == self.org_index.gosb_ids[rows]))
+        return np.where(rejected, -1, targets).astype(np.int32)
+    
+    def _simulate_movements(self) -> np.ndarray:
+        """
+        Помесячная симуляция движения пользователей.
+        
+        В каждом месяце (со второго): увольнение категории dismissed в ее месяц,
+        прием категории hired в ее месяц на зарезервированное место подразделения
+        с листа USERS, переходы категорий gosb и tb с вероятностью move_probability.
+        Переход принимается при свободном месте (подразделение, блок) с учетом
+        мест, зарезервированных за еще не принятыми пользователями. Увольнение
+        и переход не выполняются, если в паре (подразделение, блок) не останется
+        сотрудника. Занятость ведется в CapacityLedger по изменениям.
         
-        return {
-            'Табельный номер': tab_number,
-            'ФИО': fio,
-            'Бизнес-блок': self.business_blocks[business_block_code]['name'],
-            'Код подразделения': org_unit,
-            'Код ТБ': org_row['Код ТБ'],
-            'Полное ТБ': org_row['Полное ТБ'],
-            'Короткое ТБ': org_row['Короткое ТБ'],
-            'Код ГОСБ': org_row['Код ГОСБ'],
-            'Полное ГОСБ': org_row['Полное ГОСБ'],
-            'Короткое ГОСБ': org_row['Короткое ГОСБ']
+        Returns:
+            Матрица пользователи x месяцы номеров строк ORG (int32, -1 - без подразделения)
+        """
+        count = len(self.baseline_rows)
+        months = self.months
+        categories = self.categories
+        category_code = {category: code for code, category in enumerate(USER_CNG_CATEGORIES)}
+        hired = categories == category_code['hired']
+        dismissed = categories == category_code['dismissed']
+        movers = (categories == category_code['gosb']) | (categories == category_code['tb'])
+        cross_tb = categories == category_code['tb']
+        blocks = self.block_ids
+        
+        # Месяц приема и увольнения (со второго месяца), пользователи hired в первом месяце без подразделения
+        event_month = self.rng.integers(1, max(months, 2), size=count)
+        current = self.baseline_rows.copy()
+        current[hired] = -1
+        
+        self.ledger = ledger = CapacityLedger(self.capacity, self.org_index, months)
+        ledger.start(current[~hired], blocks[~hired], self.baseline_rows[hired], blocks[hired])
+        
+        movement = np.empty((count, months), dtype=np.int32)
+        movement[:, 0] = current
+        
+        for month in range(1, months):
+            ledger.next_month()
+            
+            # Увольнения: последний сотрудник блока в подразделении увольняется в следующем месяце
+            due = np.flatnonzero(dismissed & (event_month == month) & (current >= 0))
+            staying = (ledger.occupied[month] - 1).ravel()
+            leaving = self._first_within_limits(self._slot_keys(current[due], due), staying)
+            event_month[due[~leaving]] += 1
+            due = due[leaving]
+            ledger.apply(current[due], blocks[due], -1)
+            current[due] = -1
+            
+            # Прием на зарезервированные места
+            hired_now = np.flatnonzero(hired & (event_month == month))
+            ledger.apply(self.baseline_rows[hired_now], blocks[hired_now], 1, reserved_delta=-1)
+            current[hired_now] = self.baseline_rows[hired_now]
+            
+            # Переходы: источник сохраняет сотрудника блока, цель принимает не больше свободных мест
+            candidates = np.flatnonzero(movers & (current >= 0) & (self.rng.random(count) < self.move_probability))
+            targets = self._propose_targets(candidates, current[candidates], cross_tb[candidates], ledger.free_index())
+            possible = targets >= 0
+            candidates, targets = candidates[possible], targets[possible]
+            possible = self._first_within_limits(self._slot_keys(current[candidates], candidates), (ledger.occupied[month] - 1).ravel())
+            candidates, targets = candidates[possible], targets[possible]
+            accepted = self._first_within_limits(self._slot_keys(targets, candidates), ledger.free_slots().ravel())
+            moved, targets = candidates[accepted], targets[accepted]
+            ledger.apply(current[moved], blocks[moved], -1)
+            ledger.apply(targets, blocks[moved], 1)
+            current[moved] = targets
+            movement[:, month] = current
+            
+            self.logger.debug(
+                f"Месяц {month + 1}: переходов {len(moved)} из {len(accepted)} предложений, "
+                f"принято {len(hired_now)}, уволено {len(due)} (перенесено {int((~leaving).sum())}) "
+                f"[class: UserChangeGenerator | def: _simulate_movements]"
+            )
+        
+        return movement
+    
+    def _check_constraints(self, movement: np.ndarray) -> None:
+        """
+        Проверка ограничений движения (в DEBUG лог) по учету мест: места не превышены,
+        в каждой паре (подразделение, блок) с листа USERS в каждом месяце есть сотрудник;
+        учет мест сверяется с матрицей движения.
+        
+        Args:
+            movement: Матрица пользователи x месяцы номеров строк ORG
+        """
+        occupied = self.ledger.occupied
+        over_capacity = int((occupied > self.capacity).sum())
+        empty_slots = int(((self.capacity > 0) & (occupied == 0)).sum())
+        mismatched = 0
+        for month in range(movement.shape[1]):
+            rows = movement[:, month]
+            assigned = np.flatnonzero(rows >= 0)
+            counts = np.bincount(self._slot_keys(rows[assigned], assigned), minlength=self.capacity.size)
+            mismatched += int((counts.reshape(self.capacity.shape) != occupied[month]).sum())
+        self.logger.debug(
+            f"Проверка ограничений: превышений мест {over_capacity}, пустых пар (подразделение, блок) {empty_slots}, "
+            f"расхождений учета мест с движением {mismatched} [class: UserChangeGenerator | def: _check_constraints]"
+        )
+    
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Сборка листа USER_CNG по матрице движения.
+        
+        Колонки месяцев собираются категориальными по кодам значений строк ORG
+        (_org_month_value_codes: номер строки -1 соответствует '-').
+        
+        Returns:
+            DataFrame с колонками пользователя и Месяц_X_* для каждого месяца
+        """
+        codes = _org_month_value_codes(self.org_index)
+        
+        frame = {column_name: self.users[column_name].to_numpy() for column_name in USER_COLUMNS[:3]}
+        for month in range(self.months):
+            rows = self.movement[:, month]
+            for column_name in USER_CNG_MONTH_COLUMNS:
+                row_codes, values = codes[column_name]
+                frame[f"Месяц_{month + 1}_{column_name}"] = pd.Categorical.from_codes(row_codes[rows], values)
+        return pd.DataFrame(frame)
+    
+    def save_to_excel(self, df: pd.DataFrame, session: Optional[WorkbookSession] = None) -> str:
+        """
+        Сохранение листа USER_CNG в Excel файл с настройками форматирования.
+        
+        Args:
+            df: DataFrame листа USER_CNG
+            session: Сессия выходной книги конвейера (если не указана, файл записывается сразу)
+            
+        Returns:
+            Путь к файлу
+        """
+        own_session = session is None
+        if own_session:
+            session = WorkbookSession(self.output_file_base, str(self.output_dir), self.logger)
+        
+        self.logger.info(f"Сохранение движения пользователей в лист {self.sheet_name}: {session.output_path.name}")
+        output_path = session.add_sheet(
+            df,
+            self.sheet_name,
+            max_column_width=self.max_column_width,
+            text_columns=['Табельный номер'],
+            output_format=self.output_format
+        )
+        if own_session:
+            output_path = session.save()
+        
+        return output_path
+    
+    def process(self, session: Optional[WorkbookSession] = None) -> str:
+        """
+        Полный цикл генерации движения пользователей.
+        
+        Args:
+            session: Сессия выходной книги конвейера (если не указана, файл записывается сразу)
+            
+        Returns:
+            Путь к файлу
+        """
+        self.logger.info(f"Начало генерации движения пользователей: {len(self.baseline_rows)} пользователей, {self.months} месяцев")
+        
+        self.categories = self._categorize_users()
+        self.movement = self._simulate_movements()
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._check_constraints(self.movement)
+        
+        output_file = self.save_to_excel(self.to_frame(), session)
+        self.logger.info(f"Генерация движения пользователей завершена. Файл: {output_file}")
+        return output_file
+
+
+# ============================================================================
+# МОДУЛЬ ГЕНЕРАЦИИ КЛИЕНТОВ
+# ============================================================================
+
+# Колонки листа клиентов
+CLIENT_COLUMNS = ['ИНН', 'Наименование']
+
+# Длина ИНН на листе (ИНН организаций дополняются лидирующими нулями)
+CLIENT_INN_LENGTH = 12
+
+
+class ClientGenerator:
+    """
+    Генератор клиентов (лист CLIENTS) с уникальными ИНН и наименованиями.
+    
+    Клиент хранится кодами: ИНН (int64), признак ИП, индексы компонент
+    наименования и номер круга переполнения; строки собираются порциями
+    только при записи. ИНН выдаются InnAllocator (контрольные цифры
+    вычисляются векторно), наименования - CombinationAllocator по
+    пространству комбинаций, поэтому повторные попытки не нужны.
+    
+    Наименования:
+    - организации: ОПФ "[приставка] Название [суффикс]"
+    - ИП: "ИП Фамилия И.О." (мужские фамилии, имена и отчества листа USERS)
+    """
+    
+    def __init__(
+        self,
+        config: Dict,
+        name_data: Dict,
+        output_file_base: str = "result_base",
+        output_dir: str = "OUT",
+        logger: Optional[logging.Logger] = None,
+        users_seed: Optional[int] = None
+    ) -> None:
+        """
+        Инициализация генератора.
+        
+        Args:
+            config: Словарь конфигурации из LOADER_CONFIG['CLIENTS']
+            name_data: Мужские фамилии, имена и отчества (LOADER_CONFIG['USERS']['male_data'])
+            output_file_base: Базовое имя выходного Excel файла
+            output_dir: Директория для выходных файлов
+            logger: Логгер для записи событий
+            users_seed: seed генератора пользователей (источник seed, если в config он не задан)
+            
+        Raises:
+            ValueError: Если количество клиентов, доля ИП или списки наименований некорректны
+        """
+        self.config = config
+        self.sheet_name = config['sheet_name']
+        self.max_column_width = config.get('max_column_width', 100)
+        self.output_format = config.get('format', 'xlsx')  # Формат вывода листа
+        self.output_file_base = output_file_base
+        self.output_dir = Path(output_dir)
+        self.logger = logger or logging.getLogger(__name__)
+        
+        self.count = config.get('count', 20000)
+        self.ip_share = config.get('ip_share', 0.2)
+        self.batch_size = config.get('batch_size') or 200000
+        if self.count < 0 or not 0.0 <= self.ip_share <= 1.0:
+            error_msg = f"Некорректные параметры клиентов: count={self.count}, ip_share={self.ip_share}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        # Генератор случайных чисел: собственный seed или отдельный поток, производный от seed USERS
+        self.seed = config.get('seed')
+        if self.seed is None and users_seed is not None:
+            self.seed = [users_seed, 2]  # Вторая компонента отделяет поток от генераторов USERS и USER_CNG
+        self.rng = np.random.default_rng(self.seed)
+        
+        # Уникальные ИНН организаций и ИП: отдельные диапазоны (10 и 12 цифр)
+        self.inn_allocators = {
+            False: InnAllocator(individual=False, key=int(self.rng.integers(2 ** 63))),
+            True: InnAllocator(individual=True, key=int(self.rng.integers(2 ** 63)))
         }
+        
+        # Уникальные наименования: организации (ОПФ, приставка, название, суффикс) и ИП (фамилия, инициалы)
+        try:
+            self.org_name_allocator = CombinationAllocator(
+                [config['legal_forms'], [''] + config.get('prefixes', []), config['names'], [''] + config.get('suffixes', [])],
+                key=int(self.rng.integers(2 ** 63))
+            )
+            self.ip_name_allocator = CombinationAllocator(
+                [
+                    name_data['surnames'],
+                    [first_name[0] for first_name in name_data['first_names']],
+                    [patronymic[0] for patronymic in name_data['patronymics']]
+                ],
+                key=int(self.rng.integers(2 ** 63))
+            )
+        except ValueError as e:
+            error_msg = f"Некорректные списки наименований клиентов: {str(e)}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        
+        # Части наименования организации с разделителями (пустая приставка и суффикс без пробелов)
+        legal_forms, prefixes, names, suffixes = self.org_name_allocator.values
+        self.org_name_parts = (
+            legal_forms + ' "',
+            np.array([prefix + ' ' if prefix else '' for prefix in prefixes], dtype=object),
+            names,
+            np.array([' ' + suffix if suffix else '' for suffix in suffixes], dtype=object)
+        )
+        
+        # Коды клиентов (заполняются в _generate_clients)
+        self.inn: Optional[np.ndarray] = None  # ИНН (int64)
+        self.is_ip: Optional[np.ndarray] = None  # Признак ИП
+        self.name_codes: Optional[np.ndarray] = None  # Индексы компонент наименования (клиенты x 4)
+        self.name_rounds: Optional[np.ndarray] = None  # Номер круга переполнения наименования
     
-    def _distribute_users_to_org_units(self) -> List[Dict]:
+    def _generate_clients(self) -> None:
         """
-        Распределение пользователей по подразделениям.
+        Векторная генерация кодов клиентов.
+        
+        ИП выбираются случайно (доля ip_share), ИНН и индексы наименований
+        выдаются распределителями одной операцией на каждый вид клиентов.
         
-        Правила:
-        1. Сначала распределяются фиксированные количества из fixed_distribution
-        2. Затем в каждом подразделении должен быть минимум 1 КМ и 1 МНС (если еще не распределено)
-        3. Остальные пользователи распределяются случайно
+        Raises:
+            ValueError: Если диапазон ИНН исчерпан
+        """
+        count = self.count
+        ip_count = int(round(count * self.ip_share))
+        self.is_ip = np.zeros(count, dtype=bool)
+        self.is_ip[self.rng.permutation(count)[:ip_count]] = True
+        
+        self.inn = np.empty(count, dtype=np.int64)
+        self.name_codes = np.zeros((count, 4), dtype=np.int32)
+        self.name_rounds = np.empty(count, dtype=np.int32)
+        for individual, allocator in ((False, self.org_name_allocator), (True, self.ip_name_allocator)):
+            rows = np.flatnonzero(self.is_ip == individual)
+            try:
+                self.inn[rows] = self.inn_allocators[individual].allocate(len(rows))
+            except ValueError as e:
+                self.logger.error(str(e))
+                raise
+            indexes, overflow_rounds = allocator.allocate_indexes(len(rows))
+            self.name_codes[rows, :len(indexes)] = np.column_stack(indexes)
+            self.name_rounds[rows] = overflow_rounds
+            
+            if overflow_rounds.size and overflow_rounds[-1] > 0:
+                self.logger.warning(
+                    f"Комбинаций наименований {'ИП' if individual else 'организаций'} ({allocator.capacity}) меньше количества "
+                    f"клиентов ({len(rows)}), наименования продолжены с номером круга в скобках"
+                )
+        
+        self.logger.info(f"Сгенерировано клиентов: {count} (ИП: {ip_count}, организаций: {count - ip_count})")
+    
+    def _format_names(self, name_codes: np.ndarray, name_rounds: np.ndarray, is_ip: np.ndarray) -> np.ndarray:
+        """
+        Сборка наименований клиентов по кодам.
         
+        Args:
+            name_codes: Индексы компонент наименования (клиенты x 4)
+            name_rounds: Номера кругов переполнения
+            is_ip: Признаки ИП
+            
         Returns:
-            Список словарей с данными пользователей
+            Массив наименований (object)
         """
-        users = []
+        names = np.empty(len(name_codes), dtype=object)
         
-        # Получаем список уникальных подразделений (конвертируем в строки для единообразия)
-        org_units_raw = self.org_data['Код подразделения'].unique().tolist()
-        # Создаем словарь для конвертации: строка -> исходное значение
-        org_units_map = {str(unit): unit for unit in org_units_raw}
-        org_units = list(org_units_map.keys())  # Используем строковые ключи для сравнения
-        num_org_units = len(org_units)
+        org = ~is_ip
+        legal_forms, prefixes, titles, suffixes = self.org_name_parts
+        codes = name_codes[org]
+        names[org] = legal_forms[codes[:, 0]] + prefixes[codes[:, 1]] + titles[codes[:, 2]] + suffixes[codes[:, 3]] + '"'
         
-        self.logger.info(f"Всего подразделений: {num_org_units}")
-        self.logger.debug(f"Распределение пользователей по {num_org_units} подразделениям [class: UserGenerator | def: _distribute_users_to_org_units]")
+        surnames, first_initials, patronymic_initials = self.ip_name_allocator.values
+        codes = name_codes[is_ip]
+        names[is_ip] = 'ИП ' + surnames[codes[:, 0]] + ' ' + first_initials[codes[:, 1]] + '.' + patronymic_initials[codes[:, 2]] + '.'
         
-        # Общее количество пользователей
-        km_count = self.business_blocks['KMKKSB']['count']
-        mns_count = self.business_blocks['MNS']['count']
+        return CombinationAllocator.mark_rounds(names, name_rounds)
+    
+    def to_frame(self, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+        """
+        Сборка строк клиентов [start, stop) из кодов.
         
-        # Создаем словарь для подсчета пользователей по подразделениям (используем строковые ключи)
-        org_unit_counts = {str(unit): {'KMKKSB': 0, 'MNS': 0} for unit in org_units_raw}
+        Args:
+            start: Номер первого клиента
+            stop: Номер клиента после последнего (None - до конца)
+            
+        Returns:
+            DataFrame с колонками CLIENT_COLUMNS (ИНН - строка из 12 знаков с лидирующими нулями)
+        """
+        rows = slice(start, stop)
+        inn = pd.Series(self.inn[rows]).astype(str).str.zfill(CLIENT_INN_LENGTH).to_numpy(dtype=object)
+        names = self._format_names(self.name_codes[rows], self.name_rounds[rows], self.is_ip[rows])
+        return pd.DataFrame({'ИНН': inn, 'Наименование': names}, columns=CLIENT_COLUMNS)
+    
+    def iter_frames(self) -> Iterable[pd.DataFrame]:
+        """
+        Порции строк клиентов по batch_size для потоковой записи листа.
         
-        # ШАГ 1: Распределяем фиксированные количества из fixed_distribution
-        fixed_km_used = 0
-        fixed_mns_used = 0
+        Returns:
+            Итератор DataFrame-порций
+        """
+        for start in range(0, max(self.count, 1), self.batch_size):
+            yield self.to_frame(start, start + self.batch_size)
+    
+    def save_to_excel(self, session: Optional[WorkbookSession] = None) -> str:
+        """
+        Сохранение листа CLIENTS с настройками форматирования (ИНН как текст).
         
-        if self.fixed_distribution:
-            self.logger.info(f"Распределение фиксированных количеств из fixed_distribution")
-            for org_unit_code, block_counts in self.fixed_distribution.items():
-                # Конвертируем код в строку для сравнения
-                org_unit_code_str = str(org_unit_code)
-                
-                # Проверяем, что подразделение существует (сравниваем как строки)
-                if org_unit_code_str not in org_units:
-                    self.logger.warning(f"Подразделение {org_unit_code} из fixed_distribution не найдено в данных ORG. Пропускаем.")
-                    continue
-                
-                # Получаем исходное значение для использования в данных
-                org_unit_actual = org_units_map[org_unit_code_str]
-                
-                # Распределяем КМ для этого подразделения
-                if 'KMKKSB' in block_counts:
-                    km_fixed = block_counts['KMKKSB']
-                    fixed_km_used += km_fixed
-                    self.logger.debug(f"Фиксированное распределение: {org_unit_code} -> {km_fixed} КМ [class: UserGenerator | def: _distribute_users_to_org_units]")
-                    
-                    for _ in range(km_fixed):
-                        users.append(self._create_user(org_unit_actual, 'KMKKSB'))
-                        org_unit_counts[org_unit_code_str]['KMKKSB'] += 1
-                
-                # Распределяем МНС для этого подразделения
-                if 'MNS' in block_counts:
-                    mns_fixed = block_counts['MNS']
-                    fixed_mns_used += mns_fixed
-                    self.logger.debug(f"Фиксированное распределение: {org_unit_code} -> {mns_fixed} МНС [class: UserGenerator | def: _distribute_users_to_org_units]")
-                    
-                    for _ in range(mns_fixed):
-                        users.append(self._create_user(org_unit_actual, 'MNS'))
-                        org_unit_counts[org_unit_code_str]['MNS'] += 1
+        Строки собираются порциями; для xlsx строки сверх предела Excel
+        переносятся в листы {лист}_2, {лист}_3, ... (с предупреждением и манифестом).
+        
+        Args:
+            session: Сессия выходной книги конвейера (если не указана, файл записывается сразу)
             
-            self.logger.info(f"Распределено фиксированных: {fixed_km_used} КМ, {fixed_mns_used} МНС")
+        Returns:
+            Путь к файлу листа или к манифесту частей
+        """
+        own_session = session is None
+        if own_session:
+            session = WorkbookSession(self.output_file_base, str(self.output_dir), self.logger)
+        
+        self.logger.info(f"Сохранение клиентов в лист {self.sheet_name}: {session.output_path.name}")
+        output_path = session.add_sheet_continued(
+            self.iter_frames(),
+            self.sheet_name,
+            max_column_width=self.max_column_width,
+            text_columns=['ИНН'],
+            output_format=self.output_format
+        )
+        if own_session:
+            session.save()
         
-        # ШАГ 2: Распределяем минимум по 1 КМ и 1 МНС в каждое подразделение (если еще не распределено)
-        # Исключаем подразделения с фиксированным распределением из добавления минимума
-        fixed_units_set = set()
-        if self.fixed_distribution:
-            for org_unit_code in self.fixed_distribution.keys():
-                fixed_units_set.add(str(org_unit_code))
+        return output_path
+    
+    def process(self, session: Optional[WorkbookSession] = None) -> str:
+        """
+        Полный цикл генерации клиентов.
+        
+        Args:
+            session: Сессия выходной книги конвейера (если не указана, файл записывается сразу)
+            
+        Returns:
+            Путь к файлу
+        """
+        self.logger.info(f"Начало генерации клиентов: {self.count}")
+        self._generate_clients()
+        
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Уникальных ИНН: {pd.Series(self.inn).nunique()} из {self.count} [class: ClientGenerator | def: process]")
+        
+        output_file = self.save_to_excel(session)
+        self.logger.info(f"Генерация клиентов завершена. Файл: {output_file}")
+        return output_file
+
+
+# ============================================================================
+# МОДУЛЬ ГЕНЕРАЦИИ ДВИЖЕНИЯ КЛИЕНТОВ
+# ============================================================================
+
+# Категории движения клиентов (код категории - индекс в кортеже)
+CLIENT_CNG_CATEGORIES = ('stay', 'gosb', 'tb', 'any', 'remove')
+
+# Колонки помесячного состояния клиента на листе CLIENT_CNG
+CLIENT_CNG_MONTH_COLUMNS = ('Табельный номер', 'ФИО') + USER_CNG_MONTH_COLUMNS
+
+
+class ManagerMonthIndex:
+    """
+    Помесячный индекс активных менеджеров по ГОСБ и ТБ.
+    
+    Строится по матрице движения пользователей (пользователи x месяцы номеров
+    строк ORG). Для каждого месяца и уровня ('gosb', 'tb', 'all') менеджеры
+    с подразделением упорядочены по группе, группы заданы границами (CSR):
+    менеджеры группы g в месяце m - members[уровень][m][bounds[уровень][m, g]:bounds[уровень][m, g + 1]].
+    Выбор случайного менеджера группы выполняется векторно за O(1) на запрос.
+    """
+    
+    LEVELS = ('gosb', 'tb', 'all')
+    
+    def __init__(self, movement: np.ndarray, managers: np.ndarray, org_index: OrgIndex) -> None:
+        """
+        Построение индекса.
+        
+        Args:
+            movement: Матрица пользователи x месяцы номеров строк ORG (-1 - без подразделения)
+            managers: Маска пользователей-менеджеров
+            org_index: Индекс организационной структуры
+        """
+        self.movement = movement
+        self.org_index = org_index
+        self.months = movement.shape[1]
+        self.tb_row_by_code = {str(tb_code): tb_id for tb_id, tb_code in enumerate(org_index.tb_codes)}
+        
+        # Группа каждой строки ORG на каждом уровне
+        self.unit_groups = {
+            'gosb': org_index.gosb_ids,
+            'tb': org_index.tb_ids,
+            'all': np.zeros(org_index.num_units, dtype=np.int32)
+        }
+        num_groups = {level: int(groups.max()) + 1 if len(groups) else 0 for level, groups in self.unit_groups.items()}
+        
+        self.bounds = {level: np.zeros((self.months, num_groups[level] + 1), dtype=np.int64) for level in self.LEVELS}
+        self.members: Dict[str, List[np.ndarray]] = {level: [] for level in self.LEVELS}
+        for month in range(self.months):
+            active = np.flatnonzero(managers & (movement[:, month] >= 0))
+            for level in self.LEVELS:
+                groups = self.unit_groups[level][movement[active, month]]
+                self.members[level].append(active[np.argsort(groups, kind='stable')].astype(np.int32))
+                np.cumsum(np.bincount(groups, minlength=num_groups[level]), out=self.bounds[level][month, 1:])
+    
+    def managers(self, month: int, level: str, group: int) -> np.ndarray:
+        """
+        Менеджеры группы, активные в месяце.
+        
+        Args:
+            month: Номер месяца (с 0)
+            level: Уровень группы ('gosb', 'tb' или 'all')
+            group: Номер группы уровня (номер ГОСБ / ТБ в OrgIndex, 0 для 'all')
+            
+        Returns:
+            Номера пользователей-менеджеров (представление без копирования)
+        """
+        bounds = self.bounds[level][month]
+        return self.members[level][month][bounds[group]:bounds[group + 1]]
+    
+    def managers_in_tb(self, month: int, tb_code: str) -> np.ndarray:
+        """
+        Менеджеры ТБ, активные в месяце.
         
-        min_km_per_unit = 1
-        min_mns_per_unit = 1
+        Args:
+            month: Номер месяца (с 0)
+            tb_code: Код ТБ
+            
+        Returns:
+            Номера пользователей-менеджеров (пустой массив, если ТБ отсутствует)
+        """
+        tb_id = self.tb_row_by_code.get(str(tb_code))
+        if tb_id is None:
+            return np.empty(0, dtype=np.int32)
+        return self.managers(month, 'tb', tb_id)
+    
+    def managers_in_gosb(self, month: int, tb_code: str, gosb_code: str) -> np.ndarray:
+        """
+        Менеджеры ГОСБ внутри ТБ, активные в месяце.
+        
+        Args:
+            month: Номер месяца (с 0)
+            tb_code: Код ТБ
+            gosb_code: Код ГОСБ
+            
+        Returns:
+            Номера пользователей-менеджеров (пустой массив, если ГОСБ отсутствует)
+        """
+        unit_rows = self.org_index.units_in_gosb(tb_code, gosb_code)
+        if len(unit_rows) == 0:
+            return np.empty(0, dtype=np.int32)
+        return self.managers(month, 'gosb', int(self.org_index.gosb_ids[unit_rows[0]]))
+    
+    def sample(self, month: int, level: str, groups: np.ndarray, draws: np.ndarray) -> np.ndarray:
+        """
+        Векторный выбор случайного активного менеджера в каждой из групп.
         
-        # Вычисляем оставшиеся количества после фиксированного распределения
-        remaining_km = km_count - fixed_km_used
-        remaining_mns = mns_count - fixed_mns_used
+        Args:
+            month: Номер месяца (с 0)
+            level: Уровень групп ('gosb', 'tb' или 'all')
+            groups: Номера групп уровня
+            draws: Равномерные случайные числа [0, 1) той же длины
+            
+        Returns:
+            Номера пользователей-менеджеров (-1 - в группе нет активных менеджеров)
+        """
+        members = self.members[level][month]
+        if len(members) == 0:
+            return np.full(len(groups), -1, dtype=np.int32)
+        bounds = self.bounds[level][month]
+        start = bounds[groups]
+        size = bounds[groups + 1] - start
+        offset = np.minimum((draws * size).astype(np.int64), np.maximum(size - 1, 0))
+        return np.where(size > 0, members[np.minimum(start + offset, len(members) - 1)], -1).astype(np.int32)
+    
+    def sample_nearest(self, month: int, unit_rows: np.ndarray, draws: np.ndarray) -> np.ndarray:
+        """
+        Выбор активного менеджера ближайшего уровня к подразделениям:
+        ГОСБ подразделения, при отсутствии менеджеров - ТБ, затем любой.
         
-        # Подразделения для добавления минимума (исключаем фиксированные)
-        units_for_minimum = [unit_str for unit_str in org_units if unit_str not in fixed_units_set]
-        num_units_for_minimum = len(units_for_minimum)
+        Args:
+            month: Номер месяца (с 0)
+            unit_rows: Строки подразделений ORG
+            draws: Равномерные случайные числа [0, 1) той же длины
+            
+        Returns:
+            Номера пользователей-менеджеров (-1 - активных менеджеров в месяце нет)
+        """
+        chosen = np.full(len(unit_rows), -1, dtype=np.int32)
+        for level in self.LEVELS:
+            missing = np.flatnonzero(chosen < 0)
+            if len(missing) == 0:
+                break
+            chosen[missing] = self.sample(month, level, self.unit_groups[level][unit_rows[missing]], draws[missing])
+        return chosen
+
+
+class ClientChangeGenerator:
+    """
+    Генератор движения клиентов между менеджерами (лист CLIENT_CNG).
+    
+    Состояние хранится матрицей строки клиентов x месяцы номеров менеджеров
+    (номер пользователя UserChangeGenerator, -1 - без менеджера). Каждый
+    месяц выполняется векторно; менеджеры выбираются по ManagerMonthIndex
+    без обращения к DataFrame. Подразделение, ТБ и ГОСБ строки месяца -
+    подразделение менеджера в этом месяце по листу USER_CNG.
+    
+    Правила:
+    - В первом месяце менеджер есть у доли initial_share клиентов
+    - Клиенты без менеджера получают его с вероятностью appear_probability в месяц
+    - Категории gosb / tb / any меняют менеджера с вероятностью change_probability
+      в месяц (внутри ГОСБ, внутри ТБ или у любого менеджера)
+    - Категория remove теряет менеджера в случайный месяц, доля disappear_share
+      клиентов пропадает в случайный месяц до конца периода
+    - Менеджер без подразделения в месяце заменяется менеджером ГОСБ его прежнего
+      подразделения (при отсутствии - ТБ, затем любым)
+    - Доля multi_row_share клиентов имеет до max_extra_rows дополнительных строк
+      (тот же ИНН у менеджеров других ТБ)
+    """
+    
+    def __init__(
+        self,
+        config: Dict,
+        clients: ClientGenerator,
+        user_changes: UserChangeGenerator,
+        manager_block_name: str,
+        output_file_base: str = "result_base",
+        output_dir: str = "OUT",
+        logger: Optional[logging.Logger] = None,
+        users_seed: Optional[int] = None
+    ) -> None:
+        """
+        Инициализация генератора.
         
-        # Проверяем, достаточно ли пользователей для минимума
-        min_total = (min_km_per_unit + min_mns_per_unit) * num_units_for_minimum
-        if min_total > (remaining_km + remaining_mns):
-            error_msg = f"Недостаточно пользователей после фиксированного распределения: требуется минимум {min_total}, доступно {remaining_km + remaining_mns}"
+        Args:
+            config: Словарь конфигурации из LOADER_CONFIG['CLIENT_CNG']
+            clients: Генератор клиентов после генерации (коды клиентов листа CLIENTS)
+            user_changes: Генератор движения пользователей после симуляции (матрица листа USER_CNG)
+            manager_block_name: Название бизнес-блока менеджеров клиентов
+            output_file_base: Базовое имя выходного Excel файла
+            output_dir: Директория для выходных файлов
+            logger: Логгер для записи событий
+            users_seed: seed генератора пользователей (источник seed, если в config он не задан)
+            
+        Raises:
+            ValueError: Если доли категорий некорректны или в блоке менеджеров нет пользователей
+        """
+        self.config = config
+        self.sheet_name = config['sheet_name']
+        self.max_column_width = config.get('max_column_width', 100)
+        self.output_format = config.get('format', 'xlsx')  # Формат вывода листа
+        self.output_file_base = output_file_base
+        self.output_dir = Path(output_dir)
+        self.logger = logger or logging.getLogger(__name__)
+        self.batch_size = config.get('batch_size') or 100000
+        
+        self.initial_share = config.get('initial_share', 0.85)
+        self.appear_probability = config.get('appear_probability', 0.1)
+        self.change_probability = config.get('change_probability', 0.1)
+        self.disappear_share = config.get('disappear_share', 0.05)
+        self.multi_row_share = config.get('multi_row_share', 0.05)
+        self.max_extra_rows = config.get('max_extra_rows', 10)
+        shares = config.get('categories', {})
+        if set(shares) != set(CLIENT_CNG_CATEGORIES) or not np.isclose(sum(shares.values()), 1.0):
+            error_msg = f"Доли категорий движения клиентов должны быть заданы для {list(CLIENT_CNG_CATEGORIES)} и в сумме давать 1.0: {shares}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        self.category_shares = np.array([shares[category] for category in CLIENT_CNG_CATEGORIES], dtype=np.float64)
+        
+        # Генератор случайных чисел: собственный seed или отдельный поток, производный от seed USERS
+        self.seed = config.get('seed')
+        if self.seed is None and users_seed is not None:
+            self.seed = [users_seed, 3]  # Вторая компонента отделяет поток от генераторов USERS, USER_CNG и CLIENTS
+        self.rng = np.random.default_rng(self.seed)
+        
+        self.clients = clients
+        self.user_changes = user_changes
+        self.org_index = user_changes.org_index
+        self.months = user_changes.months
+        
+        # Менеджеры - пользователи блока менеджеров клиентов
+        if manager_block_name not in user_changes.block_names:
+            error_msg = f"Блок менеджеров {manager_block_name} отсутствует среди блоков пользователей: {user_changes.block_names}"
             self.logger.error(error_msg)
             raise ValueError(error_msg)
+        managers = user_changes.block_ids == user_changes.block_names.index(manager_block_name)
+        self.manager_index = ManagerMonthIndex(user_changes.movement, managers, self.org_index)
+        
+        # Коды значений колонок месяцев: менеджер по номеру пользователя, подразделение по строке ORG (-1 -> '-').
+        # Категориальный тип строится один раз: проверка значений не повторяется для каждой порции и месяца
+        value_codes = {
+            column_name: pd.factorize(np.append(user_changes.users[column_name].to_numpy(dtype=object), '-'))
+            for column_name in ('Табельный номер', 'ФИО')
+        }
+        value_codes.update(_org_month_value_codes(self.org_index))
+        self.value_codes = {
+            column_name: (row_codes, pd.CategoricalDtype(values))
+            for column_name, (row_codes, values) in value_codes.items()
+        }
+        
+        self.row_client: Optional[np.ndarray] = None  # Номер клиента каждой строки
+        self.categories: Optional[np.ndarray] = None  # Код категории каждой строки
+        self.assignments: Optional[np.ndarray] = None  # Матрица строки x месяцы номеров менеджеров
+    
+    def _prepare_rows(self) -> np.ndarray:
+        """
+        Строки листа: по одной на клиента и дополнительные строки клиентов
+        с несколькими строками (доля multi_row_share, от 0 до max_extra_rows).
+        
+        Returns:
+            Номер клиента каждой строки (дополнительные строки следуют за основной)
+        """
+        count = self.clients.count
+        multi = self.rng.random(count) < self.multi_row_share
+        repeats = np.ones(count, dtype=np.int64)
+        repeats[multi] += self.rng.integers(0, self.max_extra_rows + 1, size=int(multi.sum()))
+        row_client = np.repeat(np.arange(count, dtype=np.int64), repeats)
+        self.logger.info(f"Строк клиентов: {len(row_client)} (клиентов с несколькими строками: {int(multi.sum())})")
+        return row_client
+    
+    def _categorize_rows(self, count: int) -> np.ndarray:
+        """
+        Назначение категорий движения одной перестановкой строк (метод наибольших остатков).
+        
+        Args:
+            count: Количество строк
+            
+        Returns:
+            Массив кодов категорий (int8, индекс в CLIENT_CNG_CATEGORIES)
+        """
+        category_counts = np.floor(self.category_shares * count).astype(np.int64)
+        remainders = self.category_shares * count - category_counts
+        category_counts[np.argsort(-remainders, kind='stable')[:count - category_counts.sum()]] += 1
+        
+        categories = np.empty(count, dtype=np.int8)
+        categories[self.rng.permutation(count)] = np.repeat(np.arange(len(CLIENT_CNG_CATEGORIES), dtype=np.int8), category_counts)
+        self.logger.info(
+            "Категории движения клиентов: " + ", ".join(
+                f"{category}={int(total)}" for category, total in zip(CLIENT_CNG_CATEGORIES, category_counts)
+            )
+        )
+        return categories
+    
+    def _initial_assignments(self, row_client: np.ndarray) -> np.ndarray:
+        """
+        Менеджеры первого месяца.
+        
+        Основная строка клиента получает любого активного менеджера с вероятностью
+        initial_share; дополнительная строка - менеджера случайного ТБ, отличного
+        от ТБ менеджера основной строки.
+        
+        Args:
+            row_client: Номер клиента каждой строки
+            
+        Returns:
+            Номера менеджеров строк (-1 - без менеджера)
+        """
+        index = self.manager_index
+        count = len(row_client)
+        main_rows = np.flatnonzero(np.r_[True, row_client[1:] != row_client[:-1]]) if count else np.empty(0, dtype=np.int64)
+        extra = np.ones(count, dtype=bool)
+        extra[main_rows] = False
+        
+        assignments = np.full(count, -1, dtype=np.int32)
+        assigned = main_rows[self.rng.random(len(main_rows)) < self.initial_share]
+        assignments[assigned] = index.sample(0, 'all', np.zeros(len(assigned), dtype=np.int64), self.rng.random(len(assigned)))
+        
+        # ТБ основной строки клиента (-1 - без менеджера) и случайный другой ТБ для дополнительной строки
+        extra_rows = np.flatnonzero(extra)
+        main_of_row = main_rows[np.searchsorted(main_rows, extra_rows, side='right') - 1]
+        main_manager = assignments[main_of_row]
+        num_tb = len(self.org_index.tb_codes)
+        main_tb = np.where(main_manager >= 0, self.org_index.tb_ids[self.user_changes.movement[main_manager, 0]], -1)
+        other = (self.rng.random(len(extra_rows)) * max(num_tb - 1, 1)).astype(np.int64)
+        extra_tb = np.where(
+            (main_tb >= 0) & (num_tb > 1),
+            (main_tb + 1 + other) % max(num_tb, 1),
+            (self.rng.random(len(extra_rows)) * num_tb).astype(np.int64)
+        )
+        assignments[extra_rows] = index.sample(0, 'tb', extra_tb, self.rng.random(len(extra_rows)))
+        return assignments
+    
+    def _simulate_movements(self) -> np.ndarray:
+        """
+        Помесячная симуляция закрепления клиентов за менеджерами.
+        
+        Порядок событий месяца (со второго): пропадание, снятие менеджера
+        (категория remove), замена менеджеров без подразделения, смена менеджера
+        категорий gosb / tb / any, появление менеджера у клиентов без него.
         
-        self.logger.info(f"Распределение минимума: по {min_km_per_unit} КМ и {min_mns_per_unit} МНС в каждое подразделение (исключено {len(fixed_units_set)} с фиксированным распределением)")
+        Returns:
+            Матрица строки x месяцы номеров менеджеров (int32, -1 - без менеджера)
+        """
+        index = self.manager_index
+        movement = self.user_changes.movement
+        row_client = self.row_client
+        count = len(row_client)
+        months = self.months
+        categories = self.categories
+        category_code = {category: code for code, category in enumerate(CLIENT_CNG_CATEGORIES)}
+        change_level = {'gosb': 'gosb', 'tb': 'tb', 'any': 'all'}
+        
+        # Пропадание и снятие менеджера в случайный месяц (со второго); пропадание задается на клиента
+        event_month = self.rng.integers(1, max(months, 2), size=count)
+        client_gone_month = np.where(
+            self.rng.random(self.clients.count) < self.disappear_share,
+            self.rng.integers(1, max(months, 2), size=self.clients.count),
+            months
+        )
+        gone_month = client_gone_month[row_client]
+        removed = categories == category_code['remove']
+        
+        current = self._initial_assignments(row_client)
+        assignments = np.empty((count, months), dtype=np.int32)
+        assignments[:, 0] = current
         
-        for org_unit_str in units_for_minimum:
-            org_unit_actual = org_units_map[org_unit_str]
+        for month in range(1, months):
+            current[gone_month == month] = -1
+            current[removed & (event_month == month)] = -1
             
-            # КМ - добавляем только если еще нет минимума
-            if org_unit_counts[org_unit_str]['KMKKSB'] < min_km_per_unit:
-                users.append(self._create_user(org_unit_actual, 'KMKKSB'))
-                org_unit_counts[org_unit_str]['KMKKSB'] += 1
-                remaining_km -= 1
+            # Менеджер без подразделения: замена менеджером ГОСБ его подразделения в прошлом месяце
+            assigned = np.flatnonzero(current >= 0)
+            inactive = assigned[movement[current[assigned], month] < 0]
+            previous_units = movement[current[inactive], month - 1]
+            current[inactive] = index.sample_nearest(month, previous_units, self.rng.random(len(inactive)))
             
-            # МНС - добавляем только если еще нет минимума
-            if org_unit_counts[org_unit_str]['MNS'] < min_mns_per_unit:
-                users.append(self._create_user(org_unit_actual, 'MNS'))
-                org_unit_counts[org_unit_str]['MNS'] += 1
-                remaining_mns -= 1
-        
-        # ШАГ 3: Распределяем оставшихся пользователей случайно
-        # Используем уже созданный fixed_units_set из ШАГ 2
-        # Список подразделений для случайного распределения (исключаем фиксированные)
-        random_org_units = [unit_str for unit_str in org_units if unit_str not in fixed_units_set]
-        
-        if not random_org_units:
-            self.logger.warning("Все подразделения имеют фиксированное распределение. Случайное распределение невозможно.")
-        else:
-            self.logger.info(f"Осталось для случайного распределения: {remaining_km} КМ, {remaining_mns} МНС")
-            self.logger.debug(f"Случайное распределение по {len(random_org_units)} подразделениям (исключено {len(fixed_units_set)} с фиксированным распределением) [class: UserGenerator | def: _distribute_users_to_org_units]")
+            # Смена менеджера внутри ГОСБ / ТБ / у любого менеджера
+            changing = (current >= 0) & (self.rng.random(count) < self.change_probability)
+            changed = 0
+            for category, level in change_level.items():
+                rows = np.flatnonzero(changing & (categories == category_code[category]))
+                groups = index.unit_groups[level][movement[current[rows], month]]
+                chosen = index.sample(month, level, groups, self.rng.random(len(rows)))
+                current[rows] = np.where(chosen >= 0, chosen, current[rows])
+                changed += len(rows)
             
-            for _ in range(remaining_km):
-                org_unit_str = random.choice(random_org_units)
-                org_unit_actual = org_units_map[org_unit_str]
-                users.append(self._create_user(org_unit_actual, 'KMKKSB'))
-                org_unit_counts[org_unit_str]['KMKKSB'] += 1
+            # Появление менеджера у клиентов без менеджера (кроме пропавших)
+            appearing = np.flatnonzero((current < 0) & (gone_month > month) & (self.rng.random(count) < self.appear_probability))
+            current[appearing] = index.sample(month, 'all', np.zeros(len(appearing), dtype=np.int64), self.rng.random(len(appearing)))
+            assignments[:, month] = current
             
-            # Распределяем оставшихся МНС случайно
-            for _ in range(remaining_mns):
-                org_unit_str = random.choice(random_org_units)
-                org_unit_actual = org_units_map[org_unit_str]
-                users.append(self._create_user(org_unit_actual, 'MNS'))
-                org_unit_counts[org_unit_str]['MNS'] += 1
-        
-        # Проверяем распределение
-        km_total = sum(counts['KMKKSB'] for counts in org_unit_counts.values())
-        mns_total = sum(counts['MNS'] for counts in org_unit_counts.values())
-        
-        self.logger.info(f"Сгенерировано пользователей: КМ={km_total}, МНС={mns_total}, всего={len(users)}")
-        self.logger.debug(f"Распределение завершено. КМ: {km_total}, МНС: {mns_total} [class: UserGenerator | def: _distribute_users_to_org_units]")
-        
-        # Добавляем специальных пользователей "Серая зона" в каждое подразделение
-        self.logger.info("Добавление специальных пользователей 'Серая зона' в каждое подразделение")
-        # Используем исходные значения для специальных пользователей
-        org_units_actual = [org_units_map[unit_str] for unit_str in org_units]
-        users.extend(self._add_gray_zone_users(org_units_actual))
-        
-        self.logger.info(f"Всего пользователей после добавления 'Серая зона': {len(users)}")
-        
-        # Выводим статистику в DEBUG лог
-        self._log_statistics(users)
+            self.logger.debug(
+                f"Месяц {month + 1}: замен неактивных менеджеров {len(inactive)}, смен менеджера {changed}, "
+                f"появлений {len(appearing)}, без менеджера {int((current < 0).sum())} "
+                f"[class: ClientChangeGenerator | def: _simulate_movements]"
+            )
         
-        return users
+        return assignments
     
-    def _log_statistics(self, users: List[Dict]) -> None:
+    def to_frame(self, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
         """
-        Вывод статистики по сгенерированным пользователям в DEBUG лог.
+        Сборка строк листа CLIENT_CNG [start, stop) по матрице менеджеров.
+        
+        Колонки месяцев собираются категориальными: табельный номер и ФИО по
+        номеру менеджера, атрибуты подразделения по строке ORG менеджера
+        в месяце ('-' для строк без менеджера).
         
         Args:
-            users: Список словарей с данными пользователей
+            start: Номер первой строки
+            stop: Номер строки после последней (None - до конца)
+            
+        Returns:
+            DataFrame с колонками клиента и Месяц_X_* для каждого месяца
         """
-        df = pd.DataFrame(users)
-        
-        # Общая статистика
-        num_blocks = df['Бизнес-блок'].nunique()
-        num_tb = df['Код ТБ'].nunique()
-        num_gosb = df['Код ГОСБ'].nunique()
-        
-        self.logger.debug(f"=== СТАТИСТИКА ПОЛЬЗОВАТЕЛЕЙ ===")
-        self.logger.debug(f"Всего пользователей: {len(df)}")
-        self.logger.debug(f"Количество блоков: {num_blocks}")
-        self.logger.debug(f"Количество ТБ: {num_tb}")
-        self.logger.debug(f"Количество ГОСБ: {num_gosb}")
-        
-        # Определяем пол по отчеству
-        df['Пол'] = df['ФИО'].apply(lambda x: 'Мужской' if any(ending in x for ending in ['ович', 'евич', 'ич']) else 'Женский')
-        
-        # Статистика по блокам
-        self.logger.debug(f"\n=== СТАТИСТИКА ПО БЛОКАМ ===")
-        for block in df['Бизнес-блок'].unique():
-            block_df = df[df['Бизнес-блок'] == block]
-            male_count = len(block_df[block_df['Пол'] == 'Мужской'])
-            female_count = len(block_df[block_df['Пол'] == 'Женский'])
-            total = len(block_df)
-            self.logger.debug(f"{block}: всего={total}, мужчин={male_count}, женщин={female_count}")
-        
-        # Статистика по ГОСБ (количество пользователей в каждом ГОСБ)
-        self.logger.debug(f"\n=== СТАТИСТИКА ПО ГОСБ (количество пользователей) ===")
-        gosb_counts = df.groupby(['Полное ГОСБ', 'Код ГОСБ']).size().sort_values(ascending=False)
-        for (gosb_name, gosb_code), count in gosb_counts.items():
-            self.logger.debug(f"{gosb_name} ({gosb_code}): {count} пользователей")
-        
-        # Статистика по блокам и ТБ
-        self.logger.debug(f"\n=== СТАТИСТИКА ПО БЛОКАМ И ТБ ===")
-        for (block, tb_name, tb_code), group_df in df.groupby(['Бизнес-блок', 'Полное ТБ', 'Код ТБ']):
-            male_count = len(group_df[group_df['Пол'] == 'Мужской'])
-            female_count = len(group_df[group_df['Пол'] == 'Женский'])
-            total = len(group_df)
-            self.logger.debug(f"{block} | {tb_name} ({tb_code}): всего={total}, мужчин={male_count}, женщин={female_count}")
-        
-        # Статистика по блокам, ТБ и ГОСБ
-        self.logger.debug(f"\n=== СТАТИСТИКА ПО БЛОКАМ, ТБ И ГОСБ ===")
-        for (block, tb_name, tb_code, gosb_name, gosb_code), group_df in df.groupby(['Бизнес-блок', 'Полное ТБ', 'Код ТБ', 'Полное ГОСБ', 'Код ГОСБ']):
-            male_count = len(group_df[group_df['Пол'] == 'Мужской'])
-            female_count = len(group_df[group_df['Пол'] == 'Женский'])
-            total = len(group_df)
-            self.logger.debug(f"{block} | {tb_name} ({tb_code}) | {gosb_name} ({gosb_code}): всего={total}, мужчин={male_count}, женщин={female_count}")
-        
-        self.logger.debug(f"=== КОНЕЦ СТАТИСТИКИ ===\n")
+        row_client = self.row_client[start:stop]
+        if len(row_client):
+            first_client = int(row_client[0])
+            frame = self.clients.to_frame(first_client, int(row_client[-1]) + 1).iloc[row_client - first_client]
+        else:
+            frame = self.clients.to_frame(0, 0)
+        result = {column_name: frame[column_name].to_numpy() for column_name in CLIENT_COLUMNS}
+        
+        movement = self.user_changes.movement
+        assignments = self.assignments[start:stop]
+        for month in range(self.months):
+            managers = assignments[:, month]
+            unit_rows = np.where(managers >= 0, movement[managers, month], -1)
+            for column_name in CLIENT_CNG_MONTH_COLUMNS:
+                row_codes, dtype = self.value_codes[column_name]
+                rows = unit_rows if column_name in USER_CNG_MONTH_COLUMNS else managers
+                result[f"Месяц_{month + 1}_{column_name}"] = pd.Categorical.from_codes(row_codes[rows], dtype=dtype)
+        return pd.DataFrame(result)
     
-    def _add_gray_zone_users(self, org_units: List[str]) -> List[Dict]:
+    def iter_frames(self) -> Iterable[pd.DataFrame]:
         """
-        Добавление специальных пользователей "Серая зона" в каждое подразделение.
+        Порции строк листа по batch_size для потоковой записи.
         
-        В каждом подразделении добавляется один пользователь с:
-        - Табельным номером: "gray_zone", "00000000" или "-00000001"
-        - ФИО: "Серая зона" или "-"
-        - Случайным распределением по блокам КМ или МНС
+        Returns:
+            Итератор DataFrame-порций
+        """
+        for start in range(0, max(len(self.row_client), 1), self.batch_size):
+            yield self.to_frame(start, start + self.batch_size)
+    
+    def save_to_excel(self, session: Optional[WorkbookSession] = None) -> str:
+        """
+        Сохранение листа CLIENT_CNG с настройками форматирования
+        (ИНН и табельные номера как текст с лидирующими нулями).
         
         Args:
-            org_units: Список кодов подразделений
+            session: Сессия выходной книги конвейера (если не указана, файл записывается сразу)
             
         Returns:
-            Список словарей с данными специальных пользователей
+            Путь к файлу листа или к манифесту частей
         """
-        gray_zone_users = []
-        
-        # Получаем параметры из централизованной конфигурации
-        tab_number_options = self.gray_zone_config['tab_numbers']
-        fio_options = self.gray_zone_config['fio_options']
-        business_blocks_list = list(self.business_blocks.keys())
-        
-        for org_unit in org_units:
-            # Случайно выбираем табельный номер и ФИО
-            tab_number = random.choice(tab_number_options)
-            fio = random.choice(fio_options)
-            
-            # Случайно выбираем бизнес-блок
-            business_block_code = random.choice(business_blocks_list)
-            business_block_name = self.business_blocks[business_block_code]['name']
-            
-            # Получаем данные подразделения
-            org_row = self.org_data[self.org_data['Код подразделения'] == org_unit].iloc[0]
-            
-            gray_zone_users.append({
-                'Табельный номер': tab_number,
-                'ФИО': fio,
-                'Бизнес-блок': business_block_name,
-                'Код подразделения': org_unit,
-                'Код ТБ': org_row['Код ТБ'],
-                'Полное ТБ': org_row['Полное ТБ'],
-                'Короткое ТБ': org_row['Короткое ТБ'],
-                'Код ГОСБ': org_row['Код ГОСБ'],
-                'Полное ГОСБ': org_row['Полное ГОСБ'],
-                'Короткое ГОСБ': org_row['Короткое ГОСБ']
-            })
-        
-        self.logger.info(f"Добавлено {len(gray_zone_users)} специальных пользователей 'Серая зона'")
-        self.logger.debug(f"Добавлено специальных пользователей: {len(gray_zone_users)} [class: UserGenerator | def: _add_gray_zone_users]")
+        own_session = session is None
+        if own_session:
+            session = WorkbookSession(self.output_file_base, str(self.output_dir), self.logger)
+        
+        self.logger.info(f"Сохранение движения клиентов в лист {self.sheet_name}: {session.output_path.name}")
+        output_path = session.add_sheet_continued(
+            self.iter_frames(),
+            self.sheet_name,
+            max_column_width=self.max_column_width,
+            text_columns=['ИНН'] + [f"Месяц_{month + 1}_Табельный номер" for month in range(self.months)],
+            output_format=self.output_format
+        )
+        if own_session:
+            session.save()
         
-        return gray_zone_users
+        return output_path
     
-    def save_to_excel(self, users: List[Dict]) -> str:
+    def process(self, session: Optional[WorkbookSession] = None) -> str:
         """
-        Сохранение данных пользователей в Excel файл с настройками форматирования.
+        Полный цикл генерации движения клиентов.
         
         Args:
-            users: Список словарей с данными пользователей
+            session: Сессия выходной книги конвейера (если не указана, файл записывается сразу)
             
         Returns:
-            Путь к созданному файлу
+            Путь к файлу
         """
-        # Формируем имя файла с таймштампом
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-        output_file = f"{self.output_file_base}_{timestamp}.xlsx"
-        output_path = self.output_dir / output_file
-        
-        self.logger.info(f"Сохранение данных пользователей в Excel: {output_file}")
-        self.logger.debug(f"Сохранение {len(users)} пользователей в файл {output_file} [class: UserGenerator | def: save_to_excel]")
-        
-        # Создаем DataFrame
-        df = pd.DataFrame(users)
-        
-        # Определяем порядок колонок
-        column_order = [
-            'Табельный номер',
-            'ФИО',
-            'Бизнес-блок',
-            'Код подразделения',
-            'Код ТБ',
-            'Полное ТБ',
-            'Короткое ТБ',
-            'Код ГОСБ',
-            'Полное ГОСБ',
-            'Короткое ГОСБ'
-        ]
+        self.logger.info(f"Начало генерации движения клиентов: {self.clients.count} клиентов, {self.months} месяцев")
         
-        # Переупорядочиваем колонки
-        df = df[column_order]
+        self.row_client = self._prepare_rows()
+        self.categories = self._categorize_rows(len(self.row_client))
+        self.assignments = self._simulate_movements()
         
-        # Убеждаемся, что табельный номер сохранен как текст (с лидирующими нулями)
-        df['Табельный номер'] = df['Табельный номер'].astype(str)
+        output_file = self.save_to_excel(session)
+        self.logger.info(f"Генерация движения клиентов завершена. Файл: {output_file}")
+        return output_file
+
+
+# ============================================================================
+# МОДУЛЬ ГЕНЕРАЦИИ ПОКАЗАТЕЛЕЙ
+# ============================================================================
+
+METRIC_AGGREGATIONS = ('sum', 'mean')  # Агрегирование месяцев в квартал и год
+METRIC_DISTRIBUTIONS = ('normal', 'lognormal')  # Распределения месячного значения
+METRIC_QUARTER_MONTHS = 3  # Месяцев в квартале
+
+
+class IndicatorEngine:
+    """
+    Генератор показателей пользователей с помесячной разбивкой (лист METRICS).
+    
+    Значения хранятся плотным массивом показатели x пользователи x месяцы
+    (float64, NaN - месяц без подразделения пользователя) и генерируются
+    за один векторный проход по всем пользователям: латентный ряд AR(1)
+    со стандартным нормальным распределением в каждом месяце, затем
+    преобразование в распределение блока пользователя, границы и округление.
+    Кварталы и год считаются по представлениям reshape того же массива
+    (показатели x пользователи x периоды x месяцы периода) без копирования.
+    """
+    
+    def __init__(
+        self,
+        config: Dict,
+        users: pd.DataFrame,
+        block_names: Dict[str, str],
+        active: Optional[np.ndarray] = None,
+        output_file_base: str = "result_base",
+        output_dir: str = "OUT",
+        logger: Optional[logging.Logger] = None,
+        users_seed: Optional[int] = None
+    ) -> None:
+        """
+        Инициализация генератора.
         
-        # Определяем специальных пользователей (серую зону) из централизованной конфигурации
-        gray_zone_tab_numbers = self.gray_zone_config['tab_numbers']
-        gray_zone_fio = self.gray_zone_config['fio_options']
-        df['Специальный'] = (
-            df['Табельный номер'].isin(gray_zone_tab_numbers) | 
-            df['ФИО'].isin(gray_zone_fio)
-        )
+        Args:
+            config: Словарь конфигурации из LOADER_CONFIG['METRICS']
+            users: DataFrame пользователей с колонками 'Табельный номер', 'ФИО', 'Бизнес-блок'
+            block_names: Названия бизнес-блоков по кодам (код из LOADER_CONFIG['USERS']['business_blocks'])
+            active: Матрица пользователи x месяцы признаков наличия подразделения
+                (по листу USER_CNG); если не указана, пользователи активны во всех месяцах
+            output_file_base: Базовое имя выходного Excel файла
+            output_dir: Директория для выходных файлов
+            logger: Логгер для записи событий
+            users_seed: seed генератора пользователей (источник seed, если в config он не задан)
+            
+        Raises:
+            ValueError: Если параметры показателей некорректны, количество месяцев не кратно кварталу
+                или для бизнес-блока пользователей не задано распределение показателя
+        """
+        self.config = config
+        self.sheet_name = config['sheet_name']
+        self.max_column_width = config.get('max_column_width', 100)
+        self.output_format = config.get('format', 'xlsx')  # Формат вывода листа
+        self.output_file_base = output_file_base
+        self.output_dir = Path(output_dir)
+        self.logger = logger or logging.getLogger(__name__)
+        self.batch_size = config.get('batch_size') or 100000
+        
+        # Генератор случайных чисел: собственный seed или отдельный поток, производный от seed USERS
+        self.seed = config.get('seed')
+        if self.seed is None and users_seed is not None:
+            self.seed = [users_seed, 4]  # Вторая компонента отделяет поток от генераторов USERS, USER_CNG, CLIENTS и CLIENT_CNG
+        self.rng = np.random.default_rng(self.seed)
+        
+        self.users = users.reset_index(drop=True)
+        self.months = config.get('months', 12) if active is None else active.shape[1]
+        if self.months <= 0 or self.months % METRIC_QUARTER_MONTHS:
+            error_msg = f"Количество месяцев показателей должно быть положительным и кратным {METRIC_QUARTER_MONTHS}: {self.months}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        if active is None:
+            active = np.ones((len(self.users), self.months), dtype=bool)
+        elif active.shape[0] != len(self.users):
+            error_msg = f"Матрица активности ({active.shape[0]} строк) не совпадает с количеством пользователей: {len(self.users)}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        self.active = np.ascontiguousarray(active, dtype=bool)
+        
+        # Коды блоков пользователей по кодам бизнес-блоков конфигурации
+        self.block_codes = list(block_names)
+        block_ids = pd.Index([block_names[block_code] for block_code in self.block_codes]).get_indexer(self.users['Бизнес-блок'])
+        if (block_ids < 0).any():
+            missing = self.users.loc[block_ids < 0, 'Бизнес-блок'].unique().tolist()
+            error_msg = f"Бизнес-блоки пользователей отсутствуют в конфигурации блоков: {missing}"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        self.block_ids = block_ids.astype(np.intp)
+        used_blocks = [self.block_codes[block_id] for block_id in np.unique(self.block_ids)]
         
-        # Разделяем на обычных и специальных пользователей
-        df_normal = df[~df['Специальный']].copy()
-        df_special = df[df['Специальный']].copy()
+        self.indicators = list(config.get('indicators', {}))
+        if not self.indicators:
+            error_msg = "Не заданы показатели (indicators) листа METRICS"
+            self.logger.error(error_msg)
+            raise ValueError(error_msg)
+        self._parse_indicators(config['indicators'], used_blocks)
         
-        # Сортируем обычных пользователей: Бизнес-блок -> Полное ТБ -> Полное ГОСБ -> ФИО
-        df_normal = df_normal.sort_values(
-            by=['Бизнес-блок', 'Полное ТБ', 'Полное ГОСБ', 'ФИО'],
-            ascending=[True, True, True, True]
-        )
+        self.values: Optional[np.ndarray] = None  # Массив показатели x пользователи x месяцы
+        self.quarters: Optional[np.ndarray] = None  # Массив показатели x пользователи x кварталы
+        self.years: Optional[np.ndarray] = None  # Массив показатели x пользователи (итог периода)
+    
+    def _parse_indicators(self, indicators: Dict[str, Dict], used_blocks: List[str]) -> None:
+        """
+        Разбор параметров показателей в массивы показатели x блоки.
         
-        # Сортируем специальных пользователей: Бизнес-блок -> Полное ТБ -> Полное ГОСБ -> ФИО
-        # (они будут добавлены в конец каждого ТБ)
-        df_special = df_special.sort_values(
-            by=['Бизнес-блок', 'Полное ТБ', 'Полное ГОСБ', 'ФИО'],
-            ascending=[True, True, True, True]
-        )
+        Для логнормального распределения параметры логарифма подбираются по
+        среднему и отклонению значения: sigma^2 = ln(1 + std^2 / mean^2),
+        mu = ln(mean) - sigma^2 / 2.
         
-        # Объединяем: для каждого ТБ сначала обычные, потом специальные
-        result_dfs = []
-        for (block, tb), normal_group in df_normal.groupby(['Бизнес-блок', 'Полное ТБ']):
-            # Добавляем обычных пользователей этого ТБ
-            result_dfs.append(normal_group)
+        Args:
+            indicators: Параметры показателей из конфигурации
+            used_blocks: Коды бизнес-блоков, в которых есть пользователи
             
-            # Добавляем специальных пользователей этого ТБ (если есть)
-            special_group = df_special[
-                (df_special['Бизнес-блок'] == block) & 
-                (df_special['Полное ТБ'] == tb)
-            ]
-            if len(special_group) > 0:
-                result_dfs.append(special_group)
-        
-        # Объединяем все группы
-        df = pd.concat(result_dfs, ignore_index=True)
+        Raises:
+            ValueError: Если параметры показателя некорректны
+        """
+        num_indicators, num_blocks = len(self.indicators), len(self.block_codes)
+        self.aggregations = []
+        self.decimals = np.zeros(num_indicators, dtype=np.int64)
+        self.correlations = np.zeros(num_indicators, dtype=np.float64)
+        self.lower = np.full(num_indicators, -np.inf)
+        self.upper = np.full(num_indicators, np.inf)
+        self.loc = np.zeros((num_indicators, num_blocks), dtype=np.float64)  # Сдвиг латентного ряда
+        self.scale = np.zeros((num_indicators, num_blocks), dtype=np.float64)  # Масштаб латентного ряда
+        self.lognormal = np.zeros((num_indicators, num_blocks), dtype=bool)
+        
+        for k, indicator in enumerate(self.indicators):
+            params = indicators[indicator]
+            aggregation = params.get('aggregation', 'sum')
+            correlation = params.get('correlation', 0.0)
+            errors = []
+            if aggregation not in METRIC_AGGREGATIONS:
+                errors.append(f"агрегирование {aggregation} не из {list(METRIC_AGGREGATIONS)}")
+            if not -1.0 < correlation < 1.0:
+                errors.append(f"корреляция {correlation} вне интервала (-1, 1)")
+            if params.get('min', -np.inf) > params.get('max', np.inf):
+                errors.append(f"min {params.get('min')} больше max {params.get('max')}")
+            missing = [block_code for block_code in used_blocks if block_code not in params.get('blocks', {})]
+            if missing:
+                errors.append(f"не заданы распределения блоков {missing}")
+            
+            for block_code, block_params in params.get('blocks', {}).items():
+                if block_code not in self.block_codes:
+                    errors.append(f"неизвестный блок {block_code}")
+                    continue
+                b = self.block_codes.index(block_code)
+                distribution = block_params.get('distribution', 'normal')
+                mean, std = block_params['mean'], block_params.get('std', 0.0)
+                if distribution not in METRIC_DISTRIBUTIONS:
+                    errors.append(f"распределение {distribution} блока {block_code} не из {list(METRIC_DISTRIBUTIONS)}")
+                elif std < 0 or (distribution == 'lognormal' and mean <= 0):
+                    errors.append(f"некорректные параметры блока {block_code}: mean={mean}, std={std}")
+                elif distribution == 'lognormal':
+                    sigma_sq = np.log1p((std / mean) ** 2)
+                    self.loc[k, b], self.scale[k, b] = np.log(mean) - sigma_sq / 2, np.sqrt(sigma_sq)
+                    self.lognormal[k, b] = True
+                else:
+                    self.loc[k, b], self.scale[k, b] = mean, std
+            
+            if errors:
+                error_msg = f"Некорректные параметры показателя {indicator}: {'; '.join(errors)}"
+                self.logger.error(error_msg)
+                raise ValueError(error_msg)
+            
+            self.aggregations.append(aggregation)
+            self.correlations[k] = correlation
+            self.decimals[k] = params.get('decimals', 2)
+            self.lower[k] = params.get('min', -np.inf)
+            self.upper[k] = params.get('max', np.inf)
+    
+    def _generate_values(self) -> np.ndarray:
+        """
+        Генерация месячных значений всех показателей одним векторным проходом.
         
-        # Удаляем временную колонку
-        df = df.drop(columns=['Специальный'])
-        df = df.reset_index(drop=True)
+        Латентный ряд z_m = rho * z_{m-1} + sqrt(1 - rho^2) * eps_m стационарен
+        с N(0, 1) в каждом месяце, поэтому распределение месяца задается сдвигом
+        и масштабом блока (для логнормального - экспонентой), а корреляция
+        соседних месяцев латентного ряда равна rho.
         
-        self.logger.debug(f"Данные отсортированы: Бизнес-блок -> Полное ТБ -> Полное ГОСБ -> ФИО (специальные пользователи в конце каждого ТБ) [class: UserGenerator | def: save_to_excel]")
+        Returns:
+            Массив показатели x пользователи x месяцы (NaN - месяц без подразделения)
+        """
+        num_indicators, count = len(self.indicators), len(self.users)
+        values = self.rng.standard_normal((num_indicators, count, self.months))
+        
+        rho = self.correlations[:, None]
+        innovation = np.sqrt(1.0 - rho ** 2)
+        for month in range(1, self.months):
+            values[:, :, month] *= innovation
+            values[:, :, month] += rho * values[:, :, month - 1]
+        
+        # Параметры блока пользователя: показатели x пользователи
+        loc = self.loc[:, self.block_ids][:, :, None]
+        scale = self.scale[:, self.block_ids][:, :, None]
+        values *= scale
+        values += loc
+        np.exp(values, out=values, where=self.lognormal[:, self.block_ids][:, :, None])
+        np.clip(values, self.lower[:, None, None], self.upper[:, None, None], out=values)
+        for k in range(num_indicators):
+            np.round(values[k], self.decimals[k], out=values[k])
+        
+        values[:, ~self.active] = np.nan
+        self.logger.debug(
+            f"Сгенерировано значений показателей: {values.size} ({num_indicators} показателей), "
+            f"месяцев без подразделения: {int((~self.active).sum())} [class: IndicatorEngine | def: _generate_values]"
+        )
+        return values
+    
+    def _rollup(self, period_months: int) -> np.ndarray:
+        """
+        Агрегирование месяцев в периоды по представлению reshape без копирования.
         
-        # Находим последний созданный файл с таким же базовым именем
-        existing_files = list(self.output_dir.glob(f"{self.output_file_base}_*.xlsx"))
+        Суммы считаются только по месяцам с подразделением; для показателей
+        с агрегированием 'mean' сумма делится на их количество. Период без
+        таких месяцев остается пустым (NaN).
         
-        if existing_files:
-            # Используем последний созданный файл (тот же, что и для ORG)
-            excel_path = max(existing_files, key=lambda p: p.stat().st_mtime)
-            self.logger.info(f"Добавление листа USERS в существующий файл: {excel_path.name}")
-            file_mode = 'a'  # Добавляем лист в существующий файл
-        else:
-            # Создаем новый файл (не должно произойти, т.к. ORG создает файл первым)
-            excel_path = self.output_dir / output_file
-            self.logger.info(f"Создание нового файла: {excel_path.name}")
-            file_mode = 'w'
-        
-        # Сохраняем в Excel
-        with pd.ExcelWriter(excel_path, engine='openpyxl', mode=file_mode, if_sheet_exists='replace') as writer:
-            df.to_excel(writer, sheet_name=self.sheet_name, index=False)
-            
-            # Получаем объект листа для форматирования
-            worksheet = writer.sheets[self.sheet_name]
-            
-            # Устанавливаем формат текста для колонки "Табельный номер" (чтобы сохранить лидирующие нули)
-            tab_number_col_idx = column_order.index('Табельный номер') + 1  # +1 т.к. Excel считает с 1
-            tab_number_col_letter = get_column_letter(tab_number_col_idx)
-            
-            # Применяем текстовый формат ко всем ячейкам колонки (кроме заголовка)
-            for row in range(2, len(df) + 2):  # Начинаем с 2 (пропускаем заголовок)
-                cell = worksheet[f'{tab_number_col_letter}{row}']
-                cell.number_format = '@'  # Текстовый формат
-                # Убеждаемся, что значение записано как строка
-                if isinstance(cell.value, (int, float)):
-                    cell.value = str(int(cell.value)).zfill(self.tab_number_config['total_length'])
-                elif isinstance(cell.value, str):
-                    # Если уже строка, проверяем длину и добавляем нули если нужно
-                    cell.value = cell.value.zfill(self.tab_number_config['total_length'])
-            
-            # Закрепляем первую строку
-            worksheet.freeze_panes = 'A2'
-            
-            # Включаем автофильтр
-            worksheet.auto_filter.ref = worksheet.dimensions
-            
-            # Настраиваем ширину колонок
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                
-                # Находим максимальную длину содержимого в колонке
-                for cell in column:
-                    try:
-                        if cell.value:
-                            max_length = max(max_length, len(str(cell.value)))
-                    except:
-                        pass
-                
-                # Устанавливаем ширину (минимум 10, максимум max_column_width)
-                adjusted_width = min(max(max_length + 2, 10), self.max_column_width)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
+        Args:
+            period_months: Количество месяцев периода (3 - квартал, months - год)
             
-            # Делаем первую строку жирной (заголовки)
-            header_font = Font(bold=True)
-            for cell in worksheet[1]:
-                cell.font = header_font
+        Returns:
+            Массив показатели x пользователи x периоды
+        """
+        num_indicators, count = len(self.indicators), len(self.users)
+        periods = self.months // period_months
+        values = self.values.reshape(num_indicators, count, periods, period_months)
+        active = self.active.reshape(count, periods, period_months)
+        
+        totals = np.add.reduce(values, axis=-1, where=active[None], initial=0.0)
+        active_months = active.sum(axis=-1)
+        divisor = np.where(
+            np.array([aggregation == 'mean' for aggregation in self.aggregations])[:, None, None],
+            active_months[None],
+            1
+        )
+        np.divide(totals, divisor, out=totals, where=active_months[None] > 0)
+        totals[:, active_months == 0] = np.nan
+        for k in range(num_indicators):
+            np.round(totals[k], self.decimals[k], out=totals[k])
+        return totals
+    
+    def to_frame(self, start: int = 0, stop: Optional[int] = None) -> pd.DataFrame:
+        """
+        Сборка строк листа METRICS [start, stop).
         
-        self.logger.info(f"Файл успешно создан/обновлен: {excel_path.absolute()}")
-        self.logger.debug(f"Excel файл создан/обновлен: {excel_path.absolute()}, пользователей: {len(users)} [class: UserGenerator | def: save_to_excel]")
+        Args:
+            start: Номер первого пользователя
+            stop: Номер пользователя после последнего (None - до конца)
+            
+        Returns:
+            DataFrame с колонками пользователя, Месяц_X_*, Квартал_X_* и Год_* для каждого показателя
+        """
+        frame = {column_name: self.users[column_name].to_numpy()[start:stop] for column_name in USER_COLUMNS[:3]}
+        for month in range(self.months):
+            for k, indicator in enumerate(self.indicators):
+                frame[f"Месяц_{month + 1}_{indicator}"] = self.values[k, start:stop, month]
+        for quarter in range(self.quarters.shape[2]):
+            for k, indicator in enumerate(self.indicators):
+                frame[f"Квартал_{quarter + 1}_{indicator}"] = self.quarters[k, start:stop, quarter]
+        for k, indicator in enumerate(self.indicators):
+            frame[f"Год_{indicator}"] = self.years[k, start:stop]
+        return pd.DataFrame(frame)
+    
+    def iter_frames(self) -> Iterable[pd.DataFrame]:
+        """
+        Порции строк листа по batch_size для потоковой записи.
         
-        return str(excel_path.absolute())
+        Returns:
+            Итератор DataFrame-порций
+        """
+        for start in range(0, max(len(self.users), 1), self.batch_size):
+            yield self.to_frame(start, start + self.batch_size)
     
-    def process(self) -> str:
+    def save_to_excel(self, session: Optional[WorkbookSession] = None) -> str:
         """
-        Полный цикл генерации пользователей.
+        Сохранение листа METRICS с настройками форматирования.
         
+        Args:
+            session: Сессия выходной книги конвейера (если не указана, файл записывается сразу)
+            
         Returns:
-            Путь к созданному Excel файлу
+            Путь к файлу листа или к манифесту частей
         """
-        self.logger.info("Начало генерации пользователей")
-        self.logger.debug("Запуск полного цикла генерации пользователей [class: UserGenerator | def: process]")
+        own_session = session is None
+        if own_session:
+            session = WorkbookSession(self.output_file_base, str(self.output_dir), self.logger)
+        
+        self.logger.info(f"Сохранение показателей в лист {self.sheet_name}: {session.output_path.name}")
+        output_path = session.add_sheet_continued(
+            self.iter_frames(),
+            self.sheet_name,
+            max_column_width=self.max_column_width,
+            text_columns=['Табельный номер'],
+            output_format=self.output_format
+        )
+        if own_session:
+            session.save()
         
-        # Генерация пользователей
-        users = self._distribute_users_to_org_units()
+        return output_path
+    
+    def process(self, session: Optional[WorkbookSession] = None) -> str:
+        """
+        Полный цикл генерации показателей.
         
-        # Сохранение
-        output_file = self.save_to_excel(users)
+        Args:
+            session: Сессия выходной книги конвейера (если не указана, файл записывается сразу)
+            
+        Returns:
+            Путь к файлу
+        """
+        self.logger.info(
+            f"Начало генерации показателей: {len(self.users)} пользователей, "
+            f"{len(self.indicators)} показателей, {self.months} месяцев"
+        )
         
-        self.logger.info(f"Генерация завершена успешно. Файл: {output_file}")
-        self.logger.debug(f"Генерация завершена. Создан файл: {output_file} [class: UserGenerator | def: process]")
+        self.values = self._generate_values()
+        self.quarters = self._rollup(METRIC_QUARTER_MONTHS)
+        self.years = self._rollup(self.months)[:, :, 0]
         
+        output_file = self.save_to_excel(session)
+        self.logger.info(f"Генерация показателей завершена. Файл: {output_file}")
         return output_file
 
 
-def generate_users(
-    config: Dict,
-    org_data: pd.DataFrame,
-    output_file_base: str = "result_base",
-    output_dir: str = "OUT",
-    logger: Optional[logging.Logger] = None
-) -> str:
+# ============================================================================
+# ГЛАВНАЯ ФУНКЦИЯ
+# ============================================================================
+
+def _result_cache_key(loader_config: Dict, seed) -> str:
     """
-    Функция для генерации пользователей.
+    Ключ кэша результатов: хэши входных файлов, LOADER_CONFIG, seed, параметры выходных файлов,
+    движок записи xlsx и хэш кода модуля (после изменения кода результат генерируется заново).
     
     Args:
-        config: Словарь конфигурации из LOADER_CONFIG для генератора пользователей
-        org_data: DataFrame с данными организационных единиц (из листа ORG)
-        output_file_base: Базовое имя выходного Excel файла (по умолчанию "result_base")
-        output_dir: Директория для выходных файлов (по умолчанию "OUT")
-        logger: Логгер для записи событий (опционально)
-    
+        loader_config: Конфигурация загрузчиков (LOADER_CONFIG)
+        seed: Начальное значение генератора случайных чисел
+        
     Returns:
-        Путь к созданному Excel файлу
+        Шестнадцатеричная строка хэша SHA-256
     """
-    generator = UserGenerator(
-        config=config,
-        org_data=org_data,
-        output_file_base=output_file_base,
-        output_dir=output_dir,
-        logger=logger
+    input_hashes = {
+        name: _file_sha256(Path(config['input_file']))
+        for name, config in loader_config.items()
+        if 'input_file' in config
+    }
+    settings = {
+        'inputs': input_hashes,
+        'loader_config': loader_config,
+        'seed': seed,
+        'output_dir': OUTPUT_DIR,
+        'output_file_base': OUTPUT_FILE_BASE,
+        'excel_engine': EXCEL_ENGINE,
+        'code': _file_sha256(Path(__file__))
+    }
+    # Множества сериализуются отсортированными списками, чтобы ключ не зависел от порядка элементов
+    serialized = json.dumps(
+        settings,
+        sort_keys=True,
+        ensure_ascii=False,
+        default=lambda value: sorted(value) if isinstance(value, (set, frozenset)) else str(value)
     )
-    return generator.process()
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
 
 
-# ============================================================================
-# ГЛАВНАЯ ФУНКЦИЯ
-# ============================================================================
+def _load_cached_result(cache_dir: Path, cache_key: str) -> Optional[Dict]:
+    """
+    Поиск ранее созданных файлов результата по ключу кэша.
+    
+    Args:
+        cache_dir: Каталог кэша результатов
+        cache_key: Ключ кэша
+        
+    Returns:
+        Манифест результата ('output_file', 'output_files') или None, если результата
+        нет или какой-либо из его файлов удален
+    """
+    manifest_path = cache_dir / f"result_{cache_key}.json"
+    if not manifest_path.exists():
+        return None
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    files = [manifest['output_file'], *manifest['output_files'].values()]
+    if not all(Path(file).exists() for file in files):
+        return None
+    return manifest
+
+
+def _save_result_manifest(cache_dir: Path, cache_key: str, output_file: str, output_files: Dict[str, str]) -> None:
+    """
+    Сохранение манифеста созданных файлов результата в кэш.
+    
+    Args:
+        cache_dir: Каталог кэша результатов
+        cache_key: Ключ кэша
+        output_file: Путь к основному выходному файлу
+        output_files: Словарь: имя листа -> путь к файлу
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {'output_file': output_file, 'output_files': output_files}
+    with open(cache_dir / f"result_{cache_key}.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
 
 def main() -> None:
     """
@@ -1302,9 +6149,37 @@ def main() -> None:
     logger.info("Запуск приложения GENERATE_RANDOM_IFT_USER_12M_4Q_BASE")
     logger.debug("Инициализация основных компонентов приложения")
     
+    # Кэш результатов используется только для воспроизводимых запусков (задан seed)
+    seed = LOADER_CONFIG['USERS'].get('seed')
+    result_cache_key = None
+    if RESULT_CACHE_DIR and seed is not None:
+        result_cache_key = _result_cache_key(LOADER_CONFIG, seed)
+        cached_result = _load_cached_result(Path(RESULT_CACHE_DIR), result_cache_key)
+        if cached_result is not None:
+            logger.info(f"Результат с теми же входными данными, конфигурацией и seed={seed} уже создан: {cached_result['output_file']}")
+            logger.debug(f"Ключ кэша результатов: {result_cache_key}, файлы: {cached_result['output_files']} [class: main | def: main]")
+            return
+        logger.debug(f"Результат в кэше не найден, ключ: {result_cache_key} [class: main | def: main]")
+    
     # Сначала загружаем данные ORG (они нужны для генерации пользователей)
     org_data = None
     org_output_file = None
+    users_data = None
+    users_unit_counts = None  # Матрица количеств подразделения x блоки генератора пользователей
+    users_block_names = None
+    user_change_generator = None  # Движение пользователей (источник менеджеров CLIENT_CNG)
+    client_generator = None
+    
+    # Единая сессия выходной книги: все этапы добавляют листы, файл записывается один раз.
+    # При заданном seed книга записывается без зависимости от времени запуска
+    session = WorkbookSession(
+        OUTPUT_FILE_BASE,
+        OUTPUT_DIR,
+        logger,
+        reproducible=seed is not None,
+        engine=EXCEL_ENGINE,
+        workers=EXCEL_WORKERS
+    )
     
     # Загрузка и обработка данных для каждого загрузчика из конфигурации
     for loader_name, loader_config in LOADER_CONFIG.items():
@@ -1326,18 +6201,18 @@ def main() -> None:
             
             # Загрузка и обработка данных
             try:
-                org_output_file = load_org_units(
+                org_loader = OrgUnitsLoader(
                     config=loader_config,
                     output_file_base=OUTPUT_FILE_BASE,
                     output_dir=OUTPUT_DIR,
                     logger=logger
                 )
+                org_output_file = org_loader.process(session)
                 logger.info(f"Обработка загрузчика {loader_name} завершена успешно. Результат: {org_output_file}")
                 
-                # Загружаем данные из созданного Excel файла для использования в генераторе пользователей
-                org_df = pd.read_excel(org_output_file, sheet_name=loader_config['sheet_name'])
-                org_data = org_df
-                logger.info(f"Загружено {len(org_df)} подразделений из листа ORG для генерации пользователей")
+                # Передаем подготовленные данные генератору пользователей в памяти (без повторного чтения Excel)
+                org_data = org_loader.data
+                logger.info(f"Передано {len(org_data)} подразделений из листа ORG для генерации пользователей")
                 
             except Exception as e:
                 error_msg = f"Ошибка при обработке загрузчика {loader_name}: {str(e)}"
@@ -1355,20 +6230,153 @@ def main() -> None:
             logger.debug(f"Конфигурация генератора пользователей: лист={loader_config['sheet_name']} [class: main | def: main]")
             
             try:
-                # Используем тот же файл, что и для ORG
-                users_output_file = generate_users(
+                # Используем ту же книгу, что и для ORG
+                user_generator = UserGenerator(
                     config=loader_config,
                     org_data=org_data,
                     output_file_base=OUTPUT_FILE_BASE,
                     output_dir=OUTPUT_DIR,
                     logger=logger
                 )
+                users_output_file = user_generator.process(session)
                 logger.info(f"Генерация пользователей завершена успешно. Результат: {users_output_file}")
                 
+                # Передаем сгенерированных пользователей генератору движения в памяти
+                users_data = user_generator.users
+                users_unit_counts = user_generator.unit_counts
+                users_block_names = user_generator.vocabulary.block_names.tolist()
+                
             except Exception as e:
                 error_msg = f"Ошибка при генерации пользователей: {str(e)}"
                 logger.error(error_msg)
                 raise
+        
+        # Обработка генератора движения пользователей
+        elif loader_name == 'USER_CNG':
+            if users_data is None:
+                error_msg = "Пользователи не сгенерированы в памяти (лист USERS отсутствует или записан в потоковом режиме). Невозможно сгенерировать движение пользователей."
+                logger.error(error_msg)
+                raise ValueError(error_msg)
+            
+            try:
+                user_change_generator = UserChangeGenerator(
+                    config=loader_config,
+                    users_data=users_data,
+                    org_data=org_data,
+                    gray_zone_config=LOADER_CONFIG['USERS']['gray_zone'],
+                    output_file_base=OUTPUT_FILE_BASE,
+                    output_dir=OUTPUT_DIR,
+                    logger=logger,
+                    users_seed=seed,
+                    unit_counts=users_unit_counts,
+                    block_names=users_block_names
+                )
+                user_cng_output_file = user_change_generator.process(session)
+                logger.info(f"Генерация движения пользователей завершена успешно. Результат: {user_cng_output_file}")
+                
+            except Exception as e:
+                error_msg = f"Ошибка при генерации движения пользователей: {str(e)}"
+                logger.error(error_msg)
+                raise
+        
+        # Обработка генератора клиентов
+        elif loader_name == 'CLIENTS':
+            logger.info("Начало генерации клиентов")
+            logger.debug(f"Конфигурация генератора клиентов: лист={loader_config['sheet_name']}, клиентов={loader_config.get('count')} [class: main | def: main]")
+            
+            try:
+                client_generator = ClientGenerator(
+                    config=loader_config,
+                    name_data=LOADER_CONFIG['USERS']['male_data'],
+                    output_file_base=OUTPUT_FILE_BASE,
+                    output_dir=OUTPUT_DIR,
+                    logger=logger,
+                    users_seed=seed
+                )
+                clients_output_file = client_generator.process(session)
+                logger.info(f"Генерация клиентов завершена успешно. Результат: {clients_output_file}")
+                
+            except Exception as e:
+                error_msg = f"Ошибка при генерации клиентов: {str(e)}"
+                logger.error(error_msg)
+                raise
+        
+        # Обработка генератора движения клиентов
+        elif loader_name == 'CLIENT_CNG':
+            if not loader_config.get('enabled', False):
+                logger.info(f"Лист {loader_config['sheet_name']} выключен (enabled: False), генерация движения клиентов пропущена")
+                continue
+            if client_generator is None or user_change_generator is None:
+                error_msg = "Клиенты или движение пользователей не сгенерированы (листы CLIENTS и USER_CNG обязательны). Невозможно сгенерировать движение клиентов."
+                logger.error(error_msg)
+                raise ValueError(error_msg)
+            
+            try:
+                manager_block = loader_config.get('manager_block', 'KMKKSB')
+                client_change_generator = ClientChangeGenerator(
+                    config=loader_config,
+                    clients=client_generator,
+                    user_changes=user_change_generator,
+                    manager_block_name=LOADER_CONFIG['USERS']['business_blocks'][manager_block]['name'],
+                    output_file_base=OUTPUT_FILE_BASE,
+                    output_dir=OUTPUT_DIR,
+                    logger=logger,
+                    users_seed=seed
+                )
+                client_cng_output_file = client_change_generator.process(session)
+                logger.info(f"Генерация движения клиентов завершена успешно. Результат: {client_cng_output_file}")
+                
+            except Exception as e:
+                error_msg = f"Ошибка при генерации движения клиентов: {str(e)}"
+                logger.error(error_msg)
+                raise
+        
+        # Обработка генератора показателей
+        elif loader_name == 'METRICS':
+            if user_change_generator is not None:
+                # Пользователи листа USER_CNG: месяцы без подразделения остаются без значений
+                metric_users = user_change_generator.users
+                metric_active = user_change_generator.movement >= 0
+            elif users_data is not None:
+                metric_users = UserChangeGenerator._regular_users(users_data, LOADER_CONFIG['USERS']['gray_zone'])
+                if isinstance(metric_users, UserStore):
+                    metric_users = metric_users.to_frame(USER_COLUMNS[:3])
+                metric_active = None
+            else:
+                error_msg = "Пользователи не сгенерированы в памяти (лист USERS отсутствует или записан в потоковом режиме). Невозможно сгенерировать показатели."
+                logger.error(error_msg)
+                raise ValueError(error_msg)
+            
+            try:
+                indicator_engine = IndicatorEngine(
+                    config=loader_config,
+                    users=metric_users,
+                    block_names={
+                        block_code: block['name']
+                        for block_code, block in LOADER_CONFIG['USERS']['business_blocks'].items()
+                    },
+                    active=metric_active,
+                    output_file_base=OUTPUT_FILE_BASE,
+                    output_dir=OUTPUT_DIR,
+                    logger=logger,
+                    users_seed=seed
+                )
+                metrics_output_file = indicator_engine.process(session)
+                logger.info(f"Генерация показателей завершена успешно. Результат: {metrics_output_file}")
+                
+            except Exception as e:
+                error_msg = f"Ошибка при генерации показателей: {str(e)}"
+                logger.error(error_msg)
+                raise
+    
+    # Записываем книгу со всеми листами на диск (один раз)
+    output_file = session.save()
+    logger.info(f"Все листы записаны. Основной файл: {output_file}")
+    for sheet_name, sheet_file in session.output_files.items():
+        logger.debug(f"Лист {sheet_name}: {sheet_file} [class: main | def: main]")
+    
+    if result_cache_key is not None:
+        _save_result_manifest(Path(RESULT_CACHE_DIR), result_cache_key, output_file, session.output_files)
 
 
 if __name__ == "__main__":